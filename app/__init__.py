@@ -3,7 +3,8 @@ from flask_cors import CORS
 
 from app.config.cors_options import cors_options
 from app.config.config import DevelopmentConfig, ProductionConfig
-from app.routes import video_routes
+from app.commands import warmup_commands
+from app.routes import health_routes, metrics_routes, video_routes
 
 def init_app():
 
@@ -13,5 +14,8 @@ def init_app():
     CORS(app, resources= cors_options)
 
     app.register_blueprint(video_routes.main, url_prefix='/api')
+    app.register_blueprint(metrics_routes.main)
+    app.register_blueprint(health_routes.main)
+    app.register_blueprint(warmup_commands.main)
 
     return app
\ No newline at end of file
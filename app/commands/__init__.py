@@ -0,0 +1,4 @@
+# __init__.py
+import logging
+
+logging.getLogger(__name__).debug("Commands package initialized.")
\ No newline at end of file
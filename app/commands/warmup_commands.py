@@ -0,0 +1,114 @@
+import json
+import sys
+import time
+
+import click
+from flask import Blueprint
+
+from app.config.config import Config
+from app.routes.video_routes import video_service
+from app.utils.lazy import ServiceUnavailableException
+
+# Registered without a group: `flask warmup urls.txt`
+main = Blueprint('warmup_commands', __name__, cli_group=None)
+
+@main.cli.command('warmup')
+@click.argument('source', type=click.File('r', encoding='utf-8'))
+@click.option('-c', '--concurrency', type=click.IntRange(min=1), default=Config.WARMUP_CONCURRENCY, show_default=True,
+              help='Videos warmed in parallel.')
+@click.option('--summary/--no-summary', default=True, show_default=True, help='Precompute summaries.')
+@click.option('--audio/--no-audio', default=True, show_default=True, help='Precompute stored audio.')
+@click.option('--codec', default=None, help='Audio codec to store (default: the service codec).')
+@click.option('--playlist-limit', type=click.IntRange(min=1), default=Config.WARMUP_PLAYLIST_LIMIT, show_default=True,
+              help='Videos taken from each playlist URL.')
+@click.option('--state', 'state_path', default=None,
+              help='Journal of finished tasks used to resume (default: SOURCE.warmup-state; none for stdin).')
+@click.option('--fresh', is_flag=True, help='Ignore and replace the journal of a previous run.')
+@click.option('--json', 'as_json', is_flag=True, help='Print one JSON line per video and a JSON summary.')
+def warmup(source, concurrency, summary, audio, codec, playlist_limit, state_path, fresh, as_json):
+    """
+    Precomputes summaries and audio for the videos in SOURCE, a file of URLs (one per line,
+    playlists included) or NDJSON records with a "url" and optional "start"/"end". Use - for stdin.
+    """
+    # Imported here so registering the command does not load the pipeline with the app
+    from app.services.video_service import InvalidCodecException
+    from app.services.warmup_service import WarmupJournal, WarmupService, summarize
+
+    try:
+        service = WarmupService(video_service.get())
+    except ServiceUnavailableException as ex:
+        raise click.ClickException(str(ex))
+    try:
+        audio_codec = service.service._resolve_codec(codec) if audio else None
+    except InvalidCodecException as ex:
+        raise click.BadParameter(str(ex), param_hint='--codec')
+    if state_path is None and source.name != '<stdin>':
+        state_path = f"{source.name}.warmup-state"
+    journal = WarmupJournal(state_path, fresh=fresh)
+
+    items = list(service.resolve(service.read_sources(source), playlist_limit))
+    pending = [
+        item for item in items
+        if item.error is not None or any(name not in journal.done for name in service.task_names(item, summary, audio_codec))
+    ]
+    skipped = len(items) - len(pending)
+    if not as_json:
+        click.echo(f"{len(items)} videos, {skipped} already warm, {len(pending)} to go "
+                   f"(concurrency {concurrency}{f', state {state_path}' if state_path else ''})")
+
+    results = []
+    started = time.monotonic()
+    runner = service.run(pending, journal, concurrency, summary=summary, audio_codec=audio_codec)
+    interrupted = False
+    try:
+        for result in runner:
+            results.append(result)
+            click.echo(_result_line(result, len(results), len(pending), as_json))
+    except KeyboardInterrupt:
+        interrupted = True
+        click.echo("Interrupted.", err=True)
+    finally:
+        runner.close()
+        journal.close()
+
+    report = summarize(results, skipped, time.monotonic() - started)
+    report["interrupted"] = interrupted
+    click.echo(json.dumps(report) if as_json else _format_report(report))
+    if interrupted:
+        if state_path:
+            click.echo(f"Run the same command again to resume from {state_path}.", err=True)
+        sys.exit(130)
+    if report["failed"]:
+        sys.exit(1)
+
+def _result_line(result, position: int, total: int, as_json: bool) -> str:
+    item = result.item
+    if as_json:
+        line = {"source": item.source, "video_id": item.video_id, "success": result.success,
+                "seconds": round(result.seconds, 3), "tasks": [task._asdict() for task in result.tasks]}
+        if item.error is not None:
+            line["error"] = str(item.error)
+        return json.dumps(line, ensure_ascii=False)
+
+    width = len(str(total))
+    status = "ok" if result.success else "failed"
+    if item.error is not None:
+        return f"[{position:>{width}}/{total}] {status:<6} {item.source}: {item.error}"
+    parts = []
+    for task in result.tasks:
+        name = task.task.split(":", 1)[0]
+        if task.error is not None:
+            parts.append(f"{name} failed: {task.error}")
+        else:
+            parts.append(f"{name} {task.seconds:.2f}s{' (cached)' if task.cached else ''}")
+    return f"[{position:>{width}}/{total}] {status:<6} {item.key()}  {'  '.join(parts)}  total {result.seconds:.2f}s"
+
+def _format_report(report) -> str:
+    lines = [
+        "",
+        f"{report['warmed']} warmed, {report['skipped']} skipped, {report['failed']} failed of {report['items']} "
+        f"in {report['elapsed_seconds']:.1f}s ({report['items_per_second']:.2f} videos/s)",
+    ]
+    for name, stats in report["tasks"].items():
+        lines.append(f"  {name:<8} {stats['count']:>5}  p50 {stats['p50']:.2f}s  p95 {stats['p95']:.2f}s  max {stats['max']:.2f}s")
+    return "\n".join(lines)
@@ -1,2 +1,4 @@
 # __init__.py
-print("Config package initialized.")
+import logging
+
+logging.getLogger(__name__).debug("Config package initialized.")
@@ -1,9 +1,133 @@
+import os
+
 class Config:
     DEBUG = True
     # SECRET_KEY = "your_secret_key"
     # SQLALCHEMY_DATABASE_URI = "sqlite:///database.db"
     # SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Logging: records are written by a background thread; "json" or "text" lines
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+    LOG_DIRECTORY = os.getenv("LOG_DIRECTORY", os.path.join("app", "logs"))
+    LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+    LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    # Rotate by time instead of size, e.g. "midnight" or "H"
+    LOG_ROTATE_WHEN = os.getenv("LOG_ROTATE_WHEN", "") or None
+    # Records beyond this many pending are dropped rather than blocking requests
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # One traceback per error site per interval (seconds); repeats are logged without it
+    LOG_TRACEBACK_INTERVAL = float(os.getenv("LOG_TRACEBACK_INTERVAL", "60"))
+    # One structured record per request with its status, duration and stage timings
+    LOG_REQUESTS = os.getenv("LOG_REQUESTS", "true").lower() in ("1", "true", "yes")
+
+    # Startup: the video service is built on first use (or by /ready); a failed build is
+    # retried after this many seconds, which is also the Retry-After of the 503 meanwhile
+    SERVICE_RETRY_AFTER = int(os.getenv("SERVICE_RETRY_AFTER", "5"))
+    # Import yt-dlp, LangChain and Groq in the gunicorn master so forked workers share them
+    PRELOAD_SERVICES = os.getenv("PRELOAD_SERVICES", "true").lower() in ("1", "true", "yes")
+
+    # Video metadata / transcript cache
+    VIDEO_CACHE_MAX_ENTRIES = int(os.getenv("VIDEO_CACHE_MAX_ENTRIES", "512"))
+    VIDEO_CACHE_TTL = int(os.getenv("VIDEO_CACHE_TTL", str(6 * 3600)))
+    VIDEO_CACHE_NEGATIVE_TTL = int(os.getenv("VIDEO_CACHE_NEGATIVE_TTL", "600"))
+    VIDEO_CACHE_DIR = os.getenv("VIDEO_CACHE_DIR") or None
+    # Stream URLs in yt-dlp info dicts expire after a few hours
+    VIDEO_INFO_CACHE_MAX_ENTRIES = int(os.getenv("VIDEO_INFO_CACHE_MAX_ENTRIES", "64"))
+    VIDEO_INFO_CACHE_TTL = int(os.getenv("VIDEO_INFO_CACHE_TTL", "1800"))
+
+    # Shared executor and per-stage timeouts (seconds) for blocking YouTube calls
+    STAGE_EXECUTOR_WORKERS = int(os.getenv("STAGE_EXECUTOR_WORKERS", "16"))
+    METADATA_TIMEOUT = float(os.getenv("METADATA_TIMEOUT", "30"))
+    TRANSCRIPT_TIMEOUT = float(os.getenv("TRANSCRIPT_TIMEOUT", "20"))
+    YTDLP_SOCKET_TIMEOUT = float(os.getenv("YTDLP_SOCKET_TIMEOUT", "15"))
+
+    # Summary job pool
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+    JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "32"))
+    JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", "900"))
+    JOB_RETRY_AFTER = int(os.getenv("JOB_RETRY_AFTER", "5"))
+    # Longest a synchronous summary request waits for its job; the job itself keeps running
+    JOB_WAIT_TIMEOUT = float(os.getenv("JOB_WAIT_TIMEOUT", "120"))
+
+    # Admission control: requests running at once per endpoint, how many may wait and for how long
+    SUMMARY_MAX_CONCURRENCY = int(os.getenv("SUMMARY_MAX_CONCURRENCY", "8"))
+    SUMMARY_MAX_QUEUE = int(os.getenv("SUMMARY_MAX_QUEUE", "16"))
+    SUMMARY_QUEUE_TIMEOUT = float(os.getenv("SUMMARY_QUEUE_TIMEOUT", "10"))
+    AUDIO_MAX_CONCURRENCY = int(os.getenv("AUDIO_MAX_CONCURRENCY", "8"))
+    AUDIO_MAX_QUEUE = int(os.getenv("AUDIO_MAX_QUEUE", "16"))
+    AUDIO_QUEUE_TIMEOUT = float(os.getenv("AUDIO_QUEUE_TIMEOUT", "10"))
+    # Retry-After for shed requests until the average request time is known
+    ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "5"))
+
+    # Batch and playlist summaries
+    BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "50"))
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+    # `flask warmup` defaults
+    WARMUP_CONCURRENCY = int(os.getenv("WARMUP_CONCURRENCY", "4"))
+    WARMUP_PLAYLIST_LIMIT = int(os.getenv("WARMUP_PLAYLIST_LIMIT", "200"))
+
+    # Summaries in flight at once on the ASGI (asyncio) entry point
+    ASYNC_MAX_CONCURRENT_SUMMARIES = int(os.getenv("ASYNC_MAX_CONCURRENT_SUMMARIES", "256"))
+
+    # Video limits and map-reduce summarization of long transcripts
+    MAX_VIDEO_DURATION = int(os.getenv("MAX_VIDEO_DURATION", str(3 * 3600)))
+    SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "6000"))
+    SUMMARY_MAP_CONCURRENCY = int(os.getenv("SUMMARY_MAP_CONCURRENCY", "4"))
+
+    # Model routing: short, plain transcripts go to the fast model (empty LLM_FAST_MODEL disables it)
+    LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.1-70b-versatile")
+    LLM_FAST_MODEL = os.getenv("LLM_FAST_MODEL", "llama-3.1-8b-instant") or None
+    LLM_SHORT_TRANSCRIPT_TOKENS = int(os.getenv("LLM_SHORT_TRANSCRIPT_TOKENS", "1500"))
+    LLM_DENSE_WORD_RATIO = float(os.getenv("LLM_DENSE_WORD_RATIO", "0.25"))
+    # Seconds the primary model may take before the call moves to the fast model
+    LLM_LATENCY_BUDGET = float(os.getenv("LLM_LATENCY_BUDGET", "20")) or None
+
+    # Groq rate limiting (per process; split the account quota across workers)
+    GROQ_REQUESTS_PER_MINUTE = float(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30"))
+    GROQ_TOKENS_PER_MINUTE = float(os.getenv("GROQ_TOKENS_PER_MINUTE", "20000"))
+    GROQ_FAST_REQUESTS_PER_MINUTE = float(os.getenv("GROQ_FAST_REQUESTS_PER_MINUTE", "30"))
+    GROQ_FAST_TOKENS_PER_MINUTE = float(os.getenv("GROQ_FAST_TOKENS_PER_MINUTE", "20000"))
+    GROQ_COMPLETION_TOKENS = int(os.getenv("GROQ_COMPLETION_TOKENS", "1024"))
+    GROQ_INITIAL_CONCURRENCY = int(os.getenv("GROQ_INITIAL_CONCURRENCY", "4"))
+    GROQ_MIN_CONCURRENCY = int(os.getenv("GROQ_MIN_CONCURRENCY", "1"))
+    GROQ_MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", "32"))
+    GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "4"))
+    GROQ_BACKOFF_BASE = float(os.getenv("GROQ_BACKOFF_BASE", "1"))
+    GROQ_BACKOFF_MAX = float(os.getenv("GROQ_BACKOFF_MAX", "30"))
+    # Longest a call may wait for a slot or for rate budget before failing with 503
+    GROQ_ACQUIRE_TIMEOUT = float(os.getenv("GROQ_ACQUIRE_TIMEOUT", "60"))
+    GROQ_RETRY_AFTER = int(os.getenv("GROQ_RETRY_AFTER", "10"))
+
+    # Audio delivery
+    AUDIO_STREAMING = os.getenv("AUDIO_STREAMING", "false").lower() in ("1", "true", "yes")
+    AUDIO_STREAM_CHUNK_SIZE = int(os.getenv("AUDIO_STREAM_CHUNK_SIZE", str(64 * 1024)))
+    FFMPEG_PATH = os.getenv("FFMPEG_PATH", "ffmpeg")
+    # Directory of the audio store: downloaded sources and transcoded files
+    OUTPUT_FOLDER = os.getenv("OUTPUT_FOLDER", os.path.join("app", "temp_audios"))
+    AUDIO_STORE_QUOTA_MB = int(os.getenv("AUDIO_STORE_QUOTA_MB", "2048"))
+    AUDIO_STORE_JANITOR_INTERVAL = float(os.getenv("AUDIO_STORE_JANITOR_INTERVAL", "60"))
+    # FFmpeg transcodes per process (defaults to the number of CPU cores)
+    TRANSCODE_CONCURRENCY = int(os.getenv("TRANSCODE_CONCURRENCY", "0")) or None
+    TRANSCODE_MAX_WAITING = int(os.getenv("TRANSCODE_MAX_WAITING", "32"))
+    TRANSCODE_WAIT_TIMEOUT = float(os.getenv("TRANSCODE_WAIT_TIMEOUT", "120"))
+    TRANSCODE_RETRY_AFTER = int(os.getenv("TRANSCODE_RETRY_AFTER", "10"))
+    # "x-accel" (nginx) or "x-sendfile" to let the front proxy send stored audio files
+    AUDIO_OFFLOAD = os.getenv("AUDIO_OFFLOAD", "").lower() or None
+    AUDIO_OFFLOAD_PREFIX = os.getenv("AUDIO_OFFLOAD_PREFIX", "/protected-audio/")
+
+    # Summary store shared between worker processes
+    SUMMARY_STORE_BACKEND = os.getenv("SUMMARY_STORE_BACKEND", "sqlite")
+    SUMMARY_STORE_PATH = os.getenv("SUMMARY_STORE_PATH", os.path.join("app", "data", "summaries.db"))
+    SUMMARY_STORE_MAX_ENTRIES = int(os.getenv("SUMMARY_STORE_MAX_ENTRIES", "10000"))
+    # Entries of other prompt versions unused for this long are purged when a store is created
+    SUMMARY_STORE_STALE_VERSION_TTL = float(os.getenv("SUMMARY_STORE_STALE_VERSION_TTL", "86400"))
+    # Near-duplicate transcripts (re-uploads, mirrors, lyric videos) reuse a stored summary when
+    # their 64-bit SimHash fingerprints differ in at most NEAR_DUPLICATE_MAX_DISTANCE bits (0-7)
+    NEAR_DUPLICATE_SUMMARIES = os.getenv("NEAR_DUPLICATE_SUMMARIES", "true").lower() in ("1", "true", "yes")
+    NEAR_DUPLICATE_MAX_DISTANCE = int(os.getenv("NEAR_DUPLICATE_MAX_DISTANCE", "5"))
+    # Shorter transcripts are too generic to fingerprint reliably
+    NEAR_DUPLICATE_MIN_WORDS = int(os.getenv("NEAR_DUPLICATE_MIN_WORDS", "150"))
+
 class DevelopmentConfig(Config):
     DEBUG = True
 
@@ -1,2 +1,4 @@
 # __init__.py
-print("Routes package initialized.")
\ No newline at end of file
+import logging
+
+logging.getLogger(__name__).debug("Routes package initialized.")
\ No newline at end of file
@@ -0,0 +1,116 @@
+import asyncio
+import time
+from functools import wraps
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from app.config.config import Config
+from app.routes import video_routes
+from app.routes.metrics_routes import log_request, request_id
+from app.utils.lazy import LazyService, ServiceUnavailableException
+from app.utils.logger import start_log_context, stop_log_context
+from app.utils.metrics import (
+    IN_FLIGHT,
+    REQUEST_SECONDS,
+    REQUESTS,
+    server_timing_header,
+    start_request_timings,
+    stop_request_timings,
+)
+
+def _create_video_service():
+    # Shares caches, stores and the job pool with the Flask routes' service.
+    from app.services.async_video_service import AsyncVideoService
+    return AsyncVideoService(video_routes.video_service.get())
+
+video_service = LazyService('async video', _create_video_service, retry_interval=Config.SERVICE_RETRY_AFTER)
+
+async def _service():
+    """
+    The async service. A cold build imports the pipeline and creates its clients and stores,
+    so it runs on a worker thread and the event loop keeps serving other requests meanwhile.
+    """
+    if video_service.ready:
+        return video_service.get()
+    return await asyncio.to_thread(video_service.get)
+
+def _instrumented(path: str):
+    """
+    Counts, times and logs a handler under its route path and adds the Server-Timing and
+    X-Request-ID headers, like the Flask metrics hooks. Streamed bodies only report the
+    stages run before the response starts.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        async def wrapper(request: Request):
+            started = time.monotonic()
+            token = start_request_timings()
+            current_request_id = request_id(request.headers.get('X-Request-ID'))
+            log_token = start_log_context(request_id=current_request_id)
+            IN_FLIGHT.inc(endpoint=path)
+            status_code = 500
+            try:
+                try:
+                    response = await handler(request)
+                except ServiceUnavailableException as ex:
+                    response = JSONResponse(
+                        {"message": str(ex), "success": False, "context": ""},
+                        status_code=503,
+                        headers={"Retry-After": str(Config.SERVICE_RETRY_AFTER)},
+                    )
+                status_code = response.status_code
+                header = server_timing_header(time.monotonic() - started)
+                if header:
+                    response.headers['Server-Timing'] = header
+                response.headers['X-Request-ID'] = current_request_id
+                return response
+            finally:
+                elapsed = time.monotonic() - started
+                if Config.LOG_REQUESTS:
+                    log_request(request.method, request.url.path, status_code, elapsed)
+                IN_FLIGHT.dec(endpoint=path)
+                stop_request_timings(token)
+                stop_log_context(log_token)
+                REQUESTS.inc(endpoint=path, status=str(status_code))
+                REQUEST_SECONDS.observe(elapsed, endpoint=path)
+        return wrapper
+    return decorator
+
+async def generate_video_summary(request: Request):
+    body = await _json_body(request)
+    video_url = body.get('url')
+    start, end = body.get('start'), body.get('end')
+    service = await _service()
+    if body.get('async', False):
+        return await service.submit_video_summary(video_url, start, end)
+    return await service.generate_video_summary(video_url, start, end)
+
+async def stream_video_summary(request: Request):
+    video_url = request.query_params.get('url')
+    service = await _service()
+    return await service.stream_video_summary(
+        video_url, request.query_params.get('start'), request.query_params.get('end')
+    )
+
+async def batch_video_summaries(request: Request):
+    body = await _json_body(request)
+    service = await _service()
+    return await service.batch_video_summaries(body.get('urls'), body.get('playlist'))
+
+async def _json_body(request: Request) -> dict:
+    try:
+        body = await request.json()
+    except ValueError:
+        return {}
+    return body if isinstance(body, dict) else {}
+
+# Full paths rather than a Mount, so unmatched /api paths fall through to the Flask app.
+URL_PREFIX = '/api'
+routes = [
+    Route(path, _instrumented(path)(handler), methods=methods)
+    for path, handler, methods in (
+        (f'{URL_PREFIX}/generate_video_summary', generate_video_summary, ['POST']),
+        (f'{URL_PREFIX}/generate_video_summary/stream', stream_video_summary, ['GET']),
+        (f'{URL_PREFIX}/generate_video_summary/batch', batch_video_summaries, ['POST']),
+    )
+]
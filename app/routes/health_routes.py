@@ -0,0 +1,27 @@
+from flask import Blueprint, jsonify
+from app.config.config import Config
+from app.routes.video_routes import video_service
+
+main = Blueprint('health_routes', __name__)
+
+@main.route('/health', methods=['GET'])
+def health():
+    """
+    Liveness: the process is up and serving requests. Never builds or touches the services.
+    """
+    return jsonify({"status": "ok"}), 200
+
+@main.route('/ready', methods=['GET'])
+def ready():
+    """
+    Readiness: 200 once the video service is built. Until then it starts the build in the
+    background and answers 503, so the readiness probe itself warms a new worker.
+    """
+    if video_service.ready:
+        return jsonify({"status": "ready", "init_seconds": round(video_service.init_seconds or 0.0, 3)}), 200
+
+    video_service.start()
+    error = video_service.error
+    response = jsonify({"status": "error", "error": str(error)} if error is not None else {"status": "starting"})
+    response.headers['Retry-After'] = str(Config.SERVICE_RETRY_AFTER)
+    return response, 503
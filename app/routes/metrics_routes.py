@@ -0,0 +1,90 @@
+import re
+import time
+import uuid
+from flask import Blueprint, Response, g, request
+from app.config.config import Config
+from app.utils.logger import Logger, start_log_context, stop_log_context
+from app.utils.metrics import (
+    CONTENT_TYPE,
+    IN_FLIGHT,
+    REGISTRY,
+    REQUEST_SECONDS,
+    REQUESTS,
+    request_stage_durations,
+    server_timing_header,
+    start_request_timings,
+    stop_request_timings,
+)
+
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,128}$")
+
+main = Blueprint('metrics_routes', __name__)
+logger = Logger()
+
+@main.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+@main.before_app_request
+def start_request():
+    g.metrics_endpoint = _endpoint()
+    g.metrics_started = time.monotonic()
+    g.metrics_timings = start_request_timings()
+    g.request_id = request_id(request.headers.get('X-Request-ID'))
+    g.log_context = start_log_context(request_id=g.request_id)
+    IN_FLIGHT.inc(endpoint=g.metrics_endpoint)
+
+@main.after_app_request
+def finish_request(response):
+    started = g.get('metrics_started')
+    if started is None:
+        return response
+    elapsed = time.monotonic() - started
+    header = server_timing_header(elapsed)
+    if header:
+        response.headers['Server-Timing'] = header
+    response.headers['X-Request-ID'] = g.request_id
+    REQUESTS.inc(endpoint=g.metrics_endpoint, status=str(response.status_code))
+    REQUEST_SECONDS.observe(elapsed, endpoint=g.metrics_endpoint)
+    if Config.LOG_REQUESTS:
+        log_request(request.method, request.path, response.status_code, elapsed)
+    return response
+
+@main.teardown_app_request
+def end_request(_exception=None):
+    # Streamed responses keep the request context, and so the in-flight count, until they finish.
+    if g.get('metrics_started') is None:
+        return
+    IN_FLIGHT.dec(endpoint=g.metrics_endpoint)
+    stop_request_timings(g.metrics_timings)
+    stop_log_context(g.log_context)
+
+def request_id(header_value: str = None) -> str:
+    """
+    The caller's X-Request-ID when it is a sane token, else a new one.
+    """
+    if header_value and REQUEST_ID_PATTERN.match(header_value):
+        return header_value
+    return uuid.uuid4().hex
+
+def log_request(method: str, path: str, status_code: int, elapsed: float) -> None:
+    """
+    Structured access record with the stage timings of the request, in milliseconds.
+    Streamed responses are logged when the response starts.
+    """
+    stages = {name: round(seconds * 1000, 1) for name, seconds in (request_stage_durations() or {}).items()}
+    logger.add_to_log(
+        "info",
+        "request",
+        method=method,
+        path=path,
+        status=status_code,
+        duration_ms=round(elapsed * 1000, 1),
+        stages=stages,
+    )
+
+def _endpoint() -> str:
+    """
+    The matched route pattern, so label values stay bounded whatever the URL.
+    """
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
@@ -1,16 +1,58 @@
 from flask import Blueprint, request
-from app.services.video_service import VideoService
+from app.config.config import Config
+from app.utils.errors import Errors
+from app.utils.lazy import LazyService, ServiceUnavailableException
 
 main = Blueprint('video_routes', __name__)
-video_service = VideoService()
+
+def _create_video_service():
+    # Imported here so yt-dlp, LangChain and the Groq client load on first use, not with the app
+    from app.services.video_service import VideoService
+    return VideoService()
+
+video_service = LazyService('video', _create_video_service, retry_interval=Config.SERVICE_RETRY_AFTER)
+
+@main.errorhandler(ServiceUnavailableException)
+def service_unavailable(ex: ServiceUnavailableException):
+    response, status_code = Errors.handle_errors(str(ex), ex, 503)
+    response.headers['Retry-After'] = str(Config.SERVICE_RETRY_AFTER)
+    return response, status_code
 
 @main.route('/generate_video_summary', methods=['POST'])
 def generate_video_summary():
     video_url: str = request.json['url']
-    return video_service.generate_video_summary(video_url)
+    start, end = request.json.get('start'), request.json.get('end')
+    if request.json.get('async', False):
+        return video_service.get().submit_video_summary(video_url, start, end)
+    return video_service.get().generate_video_summary(video_url, start, end)
+
+@main.route('/generate_video_summary/stream', methods=['GET'])
+def stream_video_summary():
+    video_url = request.args.get('url')
+    return video_service.get().stream_video_summary(video_url, request.args.get('start'), request.args.get('end'))
+
+@main.route('/generate_video_summary/batch', methods=['POST'])
+def batch_video_summaries():
+    body = request.get_json(silent=True) or {}
+    return video_service.get().batch_video_summaries(body.get('urls'), body.get('playlist'))
+
+@main.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id: str):
+    return video_service.get().get_job(job_id)
 
 @main.route('/download_audio', methods=['GET'])
 def download_audio():
     video_url = request.args.get('url')
-    return video_service.download_audio(video_url)
+    stream = request.args.get('stream', str(Config.AUDIO_STREAMING)).lower() in ('1', 'true', 'yes')
+    codec = request.args.get('codec') or _codec_from_accept()
+    return video_service.get().download_audio(
+        video_url, stream=stream, codec=codec, start=request.args.get('start'), end=request.args.get('end')
+    )
+
+def _codec_from_accept():
+    """
+    Picks a passthrough codec when the client explicitly prefers a native audio container.
+    """
+    best = request.accept_mimetypes.best_match(['audio/mpeg', 'audio/webm', 'audio/mp4'], default='audio/mpeg')
+    return {'audio/webm': 'webm', 'audio/mp4': 'm4a'}.get(best)
 
@@ -0,0 +1,284 @@
+import asyncio
+import time
+from contextvars import copy_context
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+from starlette.responses import JSONResponse, StreamingResponse
+
+# Config
+from app.config.config import Config
+
+# Services
+from app.services.job_service import QueueFullException
+from app.services.video_service import InvalidBatchException, VideoService
+
+# Utils
+from app.utils.admission import AdmissionRejectedException
+from app.utils.clip import ClipRange, parse_clip
+from app.utils.executor import StageTimeoutError, get_executor
+from app.utils.metrics import count_cache, stage
+
+class AsyncVideoService:
+    """
+    Asyncio front end for a VideoService, served by the ASGI app.
+
+    It shares the wrapped service's caches, summary store, job pool and model client.
+    The LLM is awaited through the chain's async interface and the blocking yt-dlp steps
+    run on the shared bounded stage executor, so a request waiting on YouTube or Groq
+    holds no thread. Concurrent requests for the same video share one summary task.
+    """
+
+    def __init__(self, service: VideoService, max_concurrency: int = Config.ASYNC_MAX_CONCURRENT_SUMMARIES):
+        self.service = service
+        self.langchain = service.langchain
+        self.logger = service.logger
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._summaries: Dict[str, asyncio.Future] = {}
+
+    async def generate_video_summary(self, video_url: str, start=None, end=None) -> JSONResponse:
+        """
+        Generates a summary for a given video URL, or for the start/end range of the video.
+        """
+        try:
+            video_id = self.service._validate_url(video_url)
+            clip = parse_clip(start, end)
+            async with self.service.summary_admission.aslot():
+                response_data = await self._summarize(video_id, clip)
+            return JSONResponse(response_data, status_code=200)
+        except AdmissionRejectedException as ex:
+            return JSONResponse(
+                self.service._shed_payload(ex),
+                status_code=ex.status_code,
+                headers={"Retry-After": str(ex.retry_after)},
+            )
+        except Exception as ex:
+            message, status_code = self.service._summary_error(ex)
+            response = self._error_response(message, ex, status_code)
+            retry_after = self.service._summary_retry_after(ex)
+            if retry_after is not None:
+                response.headers["Retry-After"] = str(retry_after)
+            return response
+
+    async def submit_video_summary(self, video_url: str, start=None, end=None) -> JSONResponse:
+        """
+        Queues a summary job on the shared job pool and returns its ID immediately.
+        """
+        try:
+            job = self.service._submit_summary_job(video_url, start, end)
+            return JSONResponse(self.service._job_payload(job), status_code=202)
+        except QueueFullException as ex:
+            return JSONResponse(
+                {
+                    "message": str(ex),
+                    "success": False,
+                    "context": "",
+                    "queue_depth": ex.queue_depth,
+                    "queue_capacity": ex.queue_capacity,
+                },
+                status_code=429,
+                headers={"Retry-After": str(Config.JOB_RETRY_AFTER)},
+            )
+        except Exception as ex:
+            message, status_code = self.service._summary_error(ex)
+            return self._error_response(message, ex, status_code)
+
+    async def stream_video_summary(self, video_url: str, start=None, end=None):
+        """
+        Streams a summary over Server-Sent Events, like VideoService.stream_video_summary.
+        """
+        try:
+            video_id = self.service._validate_url(video_url)
+            video_info = await self._fetch_video_info(video_id, parse_clip(start, end))
+        except Exception as ex:
+            message, status_code = self.service._summary_error(ex)
+            return self._error_response(message, ex, status_code)
+
+        return StreamingResponse(
+            self._summary_events(video_id, video_info),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    async def batch_video_summaries(self, video_urls: List[str] = None, playlist_url: str = None):
+        """
+        Summarizes several videos and streams one NDJSON line per video as each finishes,
+        like VideoService.batch_video_summaries.
+        """
+        try:
+            sources = self.service._batch_sources(video_urls, playlist_url)
+        except InvalidBatchException as ex:
+            return self._error_response(str(ex), ex, 422)
+
+        return StreamingResponse(
+            self._batch_results(sources),
+            media_type="application/x-ndjson",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    # Private helper methods
+    async def _summarize(self, video_id: str, clip: ClipRange = None) -> Dict:
+        """
+        Returns the summary payload, joining the task already running for the same video and range.
+        The task is shielded so one disconnecting client does not cancel it for the others.
+        """
+        key = video_id if clip is None else f"{video_id}@{clip.key()}"
+        task = self._summaries.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._build_summary(video_id, clip))
+            self._summaries[key] = task
+            task.add_done_callback(lambda _: self._summaries.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _build_summary(self, video_id: str, clip: ClipRange = None) -> Dict:
+        async with self._slots:
+            video_info = await self._fetch_video_info(video_id, clip)
+            transcription = video_info.get("transcription", "").lower()
+            compressed, prompt_tokens = self.service._compress_transcription(transcription)
+            summary, llm = await self._generate_summary(self.service._summary_key(video_id, video_info), compressed)
+            return self.service._summary_payload(video_id, video_info, transcription, summary, prompt_tokens, llm)
+
+    async def _generate_summary(self, summary_key: str, transcription: str) -> Tuple[str, Dict]:
+        summary, llm, fingerprint = await self._stored_summary(summary_key, transcription)
+        if summary is not None:
+            return summary, llm
+
+        with stage("llm"):
+            summary, usage = await self.langchain.asummarize_transcript(transcription)
+        self.service.summary_store.set(summary_key, summary, fingerprint, usage.model)
+        return summary, {**usage._asdict(), "cached": False}
+
+    async def _stored_summary(self, summary_key: str, transcription: str) -> Tuple[Optional[str], Optional[Dict], Optional[int]]:
+        """
+        VideoService._stored_summary on the stage executor: fingerprinting and the first
+        load of the near-duplicate index are CPU-bound.
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            get_executor(), copy_context().run, self.service._stored_summary, summary_key, transcription
+        )
+
+    async def _fetch_video_info(self, video_id: str, clip: ClipRange = None) -> Dict[str, str]:
+        """
+        Async variant of VideoService._fetch_video_info: missing parts are loaded concurrently
+        on the stage executor, and a metadata failure cancels the transcript stage.
+        """
+        metadata_key, transcript_key = f"metadata:{video_id}", f"segments:{video_id}"
+        metadata = self.service._cache_lookup(metadata_key)
+        segments = self.service._cache_lookup(transcript_key)
+        count_cache("video", metadata is not None)
+        count_cache("video", segments is not None)
+        if metadata is not None and segments is not None:
+            return self.service._video_info(metadata, segments, clip)
+
+        transcript_task = None
+        if segments is None:
+            transcript_task = asyncio.ensure_future(self._stage(
+                lambda: self.service._cached(transcript_key, lambda: self.service._generate_transcription(video_id)),
+                Config.TRANSCRIPT_TIMEOUT,
+                "transcript",
+            ))
+        try:
+            if metadata is None:
+                metadata = await self._stage(
+                    lambda: self.service._cached(metadata_key, lambda: self.service._extract_metadata(video_id)),
+                    Config.METADATA_TIMEOUT,
+                    "metadata",
+                )
+        except BaseException:
+            if transcript_task is not None:
+                transcript_task.cancel()
+            raise
+        if transcript_task is not None:
+            segments = await transcript_task
+
+        return self.service._video_info(metadata, segments, clip)
+
+    async def _stage(self, fn: Callable, timeout: float, stage: str):
+        """
+        Runs a blocking stage on the shared stage executor, raising StageTimeoutError on timeout.
+        As with wait_for, a stage that is already running keeps its thread until it returns.
+        """
+        future = asyncio.get_running_loop().run_in_executor(get_executor(), copy_context().run, fn)
+        done, _ = await asyncio.wait({future}, timeout=timeout)
+        if not done:
+            future.cancel()
+            raise StageTimeoutError(f"Stage '{stage}' did not finish within {timeout} seconds.")
+        return future.result()
+
+    async def _summary_events(self, video_id: str, video_info: Dict) -> AsyncIterator[str]:
+        """
+        Yields the SSE events for a streamed summary and stores the summary once complete.
+        """
+        transcription = video_info.get("transcription", "").lower()
+        compressed, prompt_tokens = self.service._compress_transcription(transcription)
+        yield self.service._sse("metadata", {
+            "channel": video_info.get("channel", ""),
+            "title": video_info.get("title", ""),
+            "thumbnail": video_info.get("thumbnail", ""),
+            "transcription": transcription,
+            "prompt_tokens": prompt_tokens,
+        })
+
+        summary_key = self.service._summary_key(video_id, video_info)
+        summary, llm, fingerprint = await self._stored_summary(summary_key, compressed)
+        if summary is not None:
+            yield self.service._sse("summary", {"chunk": summary})
+        else:
+            chunks = []
+            llm = {"cached": False}
+            try:
+                with stage("llm"):
+                    async for chunk in self.langchain.astream_transcript_summary(compressed, usage=llm):
+                        chunks.append(chunk)
+                        yield self.service._sse("summary", {"chunk": chunk})
+            except Exception as ex:
+                message, status_code = self.service._summary_error(ex)
+                self.logger.add_to_log("error", f"{message}: {ex}")
+                yield self.service._sse("error", {"message": message, "status_code": status_code})
+                return
+            self.service.summary_store.set(summary_key, "".join(chunks), fingerprint, llm.get("model"))
+
+        yield self.service._sse("done", {"audio_download_link": self.service._audio_download_link(video_id, video_info), "llm": llm})
+
+    async def _batch_results(self, sources: List[str]) -> AsyncIterator[str]:
+        """
+        Runs the batch with at most BATCH_CONCURRENCY summaries in flight and yields an
+        NDJSON line per video in completion order. Unfinished work is cancelled if the
+        client disconnects; summaries shared with other requests keep running.
+        """
+        started = time.monotonic()
+        # Playlist expansion is a blocking yt-dlp call.
+        items = await asyncio.get_running_loop().run_in_executor(
+            get_executor(), copy_context().run, lambda: list(self.service._batch_items(sources))
+        )
+        semaphore = asyncio.Semaphore(Config.BATCH_CONCURRENCY)
+
+        async def run(index: int, item: Dict):
+            if item["error"] is not None:
+                return index, item, None, item["error"]
+            async with semaphore:
+                try:
+                    return index, item, await self._summarize(item["video_id"]), None
+                except Exception as ex:
+                    return index, item, None, ex
+
+        tasks = [asyncio.ensure_future(run(index, item)) for index, item in enumerate(items)]
+        succeeded = failed = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, item, result, error = await next_done
+                if error is None:
+                    succeeded += 1
+                else:
+                    failed += 1
+                yield self.service._batch_line(index, item, result=result, error=error)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        yield self.service._batch_totals_line(succeeded, failed, started)
+
+    def _error_response(self, message: str, exception: Exception, status_code: int) -> JSONResponse:
+        """
+        Same logging and body as Errors.handle_errors, without Flask's jsonify.
+        """
+        self.logger.log_exception(message, exception, status_code=status_code)
+        return JSONResponse({'message': message, 'success': False, 'context': ""}, status_code=status_code)
@@ -0,0 +1,120 @@
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# Job statuses
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Custom Exceptions
+class QueueFullException(Exception):
+    def __init__(self, queue_depth: int, queue_capacity: int):
+        super().__init__(f"The job queue is full ({queue_depth}/{queue_capacity}).")
+        self.queue_depth = queue_depth
+        self.queue_capacity = queue_capacity
+
+class Job:
+    def __init__(self, key: Hashable):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = PENDING
+        self.future: Future = Future()
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def result(self) -> Any:
+        return self.future.result() if self.status == SUCCEEDED else None
+
+    @property
+    def error(self) -> Optional[BaseException]:
+        return self.future.exception() if self.status == FAILED else None
+
+    def wait(self, timeout: Optional[float] = None) -> Any:
+        """
+        Blocks until the job finishes and returns its result, raising its exception on failure.
+        """
+        return self.future.result(timeout=timeout)
+
+class JobService:
+    """
+    Runs jobs on a fixed-size worker pool with a bounded queue.
+
+    Submitting a key that already has a pending, running or successfully finished job
+    returns that job instead of starting a new one. Finished jobs are kept for
+    result_ttl seconds so clients can poll for them.
+    """
+
+    def __init__(self, workers: int = 4, queue_size: int = 32, result_ttl: int = 900):
+        self.workers = workers
+        self.queue_capacity = workers + queue_size
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._jobs: Dict[str, Job] = {}
+        self._jobs_by_key: Dict[Hashable, Job] = {}
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def submit(self, key: Hashable, fn: Callable[[], Any]) -> Job:
+        """
+        Queues fn under key, or returns the existing job for that key.
+        Raises QueueFullException when the queue is at capacity.
+        """
+        with self._lock:
+            self._purge_expired()
+            job = self._jobs_by_key.get(key)
+            if job is not None and job.status != FAILED:
+                return job
+            if self._active >= self.queue_capacity:
+                raise QueueFullException(self._active, self.queue_capacity)
+
+            job = Job(key)
+            self._jobs[job.id] = job
+            self._jobs_by_key[key] = job
+            self._active += 1
+
+        # Run in a copy of the submitter's context so per-request stage timings are attributed.
+        self._executor.submit(copy_context().run, self._run, job, fn)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._purge_expired()
+            return self._jobs.get(job_id)
+
+    def queue_depth(self) -> int:
+        with self._lock:
+            return self._active
+
+    def _run(self, job: Job, fn: Callable[[], Any]) -> None:
+        job.status = RUNNING
+        try:
+            result = fn()
+        except BaseException as ex:
+            self._finish(job, FAILED)
+            job.future.set_exception(ex)
+        else:
+            self._finish(job, SUCCEEDED)
+            job.future.set_result(result)
+
+    def _finish(self, job: Job, status: str) -> None:
+        with self._lock:
+            job.status = status
+            job.finished_at = time.time()
+            self._active -= 1
+
+    def _purge_expired(self) -> None:
+        """
+        Drops finished jobs older than result_ttl. Must be called with the lock held.
+        """
+        cutoff = time.time() - self.result_ttl
+        expired = [job for job in self._jobs.values() if job.finished_at is not None and job.finished_at < cutoff]
+        for job in expired:
+            del self._jobs[job.id]
+            if self._jobs_by_key.get(job.key) is job:
+                del self._jobs_by_key[job.key]
@@ -1,23 +1,85 @@
 import atexit
+import copy
+import json
+import math
 import os
 import re
-import threading
 import time
-from typing import Dict
-from flask import Response, after_this_request, jsonify, send_file
+from collections import deque
+from contextvars import copy_context
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+from flask import Response, after_this_request, jsonify, request, send_file, stream_with_context
 from yt_dlp import YoutubeDL
-from langchain_community.document_loaders import YoutubeLoader
+
+# Config
+from app.config.config import Config
+
+# Services
+from app.services.job_service import JobService, QueueFullException
 
 # Utils
+from app.utils.admission import AdmissionController, AdmissionRejectedException
+from app.utils.audio_store import AudioStore
+from app.utils.clip import ClipRange, InvalidClipException, parse_clip
+from app.utils.cache import VideoCache
 from app.utils.errors import Errors
-from app.utils.langchain import Langchain
-from app.utils.logger import Logger
+from app.utils.executor import StageTimeoutError, get_executor, wait_for
+from app.utils.ffmpeg import (
+    FFmpegError,
+    TranscodeStream,
+    build_transcode_command,
+    select_audio_format,
+    transcode_file,
+    transcode_range,
+)
+from app.utils.fingerprint import simhash
+from app.utils.langchain import RETRYABLE_EXCEPTIONS, Langchain, LangchainError, LangchainRateLimitError
+from app.utils.logger import Logger, update_log_context
+from app.utils.metrics import (
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_RUNNING,
+    JOB_QUEUE_DEPTH,
+    LLM_CONCURRENCY_LIMIT,
+    LLM_IN_FLIGHT,
+    NEAR_DUPLICATE_INDEX_ENTRIES,
+    PROMPT_TOKENS,
+    TRANSCODES,
+    TRANSCRIPT_CHARACTERS,
+    count_cache,
+    record_stage,
+    stage,
+)
+from app.utils.model_router import ModelRouter
+from app.utils.rate_limiter import RateLimiter
+from app.utils.single_flight import SingleFlight
+from app.utils.summary_store import SummaryStore
+from app.utils.transcoder import TranscodeQueueFullException, TranscodeScheduler
+from app.utils.transcript import TranscriptSegments, compress_transcript
+from app.utils.youtube import (
+    canonical_playlist_url,
+    canonical_video_url,
+    extract_playlist_id,
+    extract_video_id,
+    parse_captions,
+    select_caption_track,
+)
 
 # Constants
-OUTPUT_FOLDER = os.path.join("app", "temp_audios")
+OUTPUT_FOLDER = Config.OUTPUT_FOLDER
 DEFAULT_CODEC = "mp3"
 DEFAULT_QUALITY = "192"
-MAX_VIDEO_DURATION = 600
+MAX_VIDEO_DURATION = Config.MAX_VIDEO_DURATION
+# Native YouTube audio containers served without re-encoding, and the yt-dlp format for each
+PASSTHROUGH_FORMATS = {
+    "webm": "bestaudio[ext=webm]/bestaudio",
+    "m4a": "bestaudio[ext=m4a]/bestaudio",
+}
+CODEC_ALIASES = {"opus": "webm", "aac": "m4a"}
+AUDIO_MIMETYPES = {"webm": "audio/webm", "m4a": "audio/mp4"}
+SOURCE_QUALITY = "source"
 
 # Custom Exceptions
 class InvalidURLException(Exception):
@@ -26,6 +88,12 @@ class InvalidURLException(Exception):
 class FetchVideoInfoException(Exception):
     pass
 
+class UnsupportedVideoException(FetchVideoInfoException):
+    """
+    Permanent failure for a video (too long, no captions) that is safe to cache.
+    """
+    pass
+
 class GenerateSummaryException(Exception):
     pass
 
@@ -35,6 +103,15 @@ class AudioDownloadException(Exception):
 class FileNotFoundError(Exception):
     pass
 
+class JobNotFoundException(Exception):
+    pass
+
+class InvalidCodecException(Exception):
+    pass
+
+class InvalidBatchException(Exception):
+    pass
+
 class VideoService:
     def __init__(self, output_folder: str = OUTPUT_FOLDER, codec: str = DEFAULT_CODEC, quality: str = DEFAULT_QUALITY, max_video_duration: int = MAX_VIDEO_DURATION):
         self.output_folder = output_folder
@@ -43,84 +120,708 @@ class VideoService:
         self.max_video_duration = max_video_duration
         self.logger = Logger()
         self.errors = Errors()
-        self.langchain = Langchain()
+        self.langchain = Langchain(
+            model_name=Config.LLM_MODEL,
+            chunk_tokens=Config.SUMMARY_CHUNK_TOKENS,
+            map_concurrency=Config.SUMMARY_MAP_CONCURRENCY,
+            rate_limiter=RateLimiter.from_config(Config, retryable_exceptions=RETRYABLE_EXCEPTIONS),
+            completion_tokens=Config.GROQ_COMPLETION_TOKENS,
+            router=ModelRouter(
+                Config.LLM_MODEL,
+                Config.LLM_FAST_MODEL,
+                short_transcript_tokens=Config.LLM_SHORT_TRANSCRIPT_TOKENS,
+                dense_word_ratio=Config.LLM_DENSE_WORD_RATIO,
+            ),
+            # Groq quotas are per model, so the fast model has its own budget.
+            fast_rate_limiter=RateLimiter.from_config(
+                Config,
+                requests_per_minute=Config.GROQ_FAST_REQUESTS_PER_MINUTE,
+                tokens_per_minute=Config.GROQ_FAST_TOKENS_PER_MINUTE,
+                retryable_exceptions=RETRYABLE_EXCEPTIONS,
+            ),
+            latency_budget=Config.LLM_LATENCY_BUDGET,
+        )
+        self.video_cache = VideoCache(
+            max_entries=Config.VIDEO_CACHE_MAX_ENTRIES,
+            ttl=Config.VIDEO_CACHE_TTL,
+            negative_ttl=Config.VIDEO_CACHE_NEGATIVE_TTL,
+            directory=Config.VIDEO_CACHE_DIR,
+        )
+        # Full yt-dlp info dicts, kept in memory only so the audio download can reuse them.
+        self.info_cache = VideoCache(
+            max_entries=Config.VIDEO_INFO_CACHE_MAX_ENTRIES,
+            ttl=Config.VIDEO_INFO_CACHE_TTL,
+        )
+        self.summary_store = SummaryStore.from_config(
+            Config,
+            prompt_version=self.langchain.prompt_version(),
+            model_name=self.langchain.model_name,
+        )
+        self.single_flight = SingleFlight()
+        self.jobs = JobService(
+            workers=Config.JOB_WORKERS,
+            queue_size=Config.JOB_QUEUE_SIZE,
+            result_ttl=Config.JOB_RESULT_TTL,
+        )
         os.makedirs(self.output_folder, exist_ok=True)
+        self.audio_store = AudioStore(
+            self.output_folder,
+            quota_bytes=Config.AUDIO_STORE_QUOTA_MB * 1024 * 1024,
+            janitor_interval=Config.AUDIO_STORE_JANITOR_INTERVAL,
+        )
+        self.audio_store.start_janitor()
+        self.transcoder = TranscodeScheduler(
+            max_concurrency=Config.TRANSCODE_CONCURRENCY,
+            max_waiting=Config.TRANSCODE_MAX_WAITING,
+            wait_timeout=Config.TRANSCODE_WAIT_TIMEOUT,
+        )
+        # Synchronous summaries and audio downloads are admitted here before any pipeline work.
+        self.summary_admission = AdmissionController(
+            "summary",
+            Config.SUMMARY_MAX_CONCURRENCY,
+            max_queue=Config.SUMMARY_MAX_QUEUE,
+            queue_timeout=Config.SUMMARY_QUEUE_TIMEOUT,
+            default_retry_after=Config.ADMISSION_RETRY_AFTER,
+        )
+        self.audio_admission = AdmissionController(
+            "audio",
+            Config.AUDIO_MAX_CONCURRENCY,
+            max_queue=Config.AUDIO_MAX_QUEUE,
+            queue_timeout=Config.AUDIO_QUEUE_TIMEOUT,
+            default_retry_after=Config.ADMISSION_RETRY_AFTER,
+        )
+        self._register_gauges()
 
-    def generate_video_summary(self, video_url: str):
+    def generate_video_summary(self, video_url: str, start=None, end=None):
         """
-        Generates a summary for a given video URL.
+        Generates a summary for a given video URL, or for the start/end range of the video.
+        Runs on the job pool and waits for the job to finish.
         """
         try:
-            self._validate_url(video_url)
-            video_info = self._fetch_video_info(video_url)
-            transcription = video_info.get("transcription", "").lower()
-
-            prompt = self.langchain.generate_prompt_template_video_analysis(transcription)
-            summary = self.langchain.generate_summary(prompt)
-
-            response_data = {
-                "channel": video_info.get("channel", ""),
-                "title": video_info.get("title", ""),
-                "thumbnail": video_info.get("thumbnail", ""),
-                "transcription": transcription,
-                "summary": summary,
-                "audio_download_link": f"download_audio?url={video_url}"
-            }
+            with self.summary_admission.slot():
+                job = self._submit_summary_job(video_url, start, end)
+                response_data = self._wait_for_job(job, Config.JOB_WAIT_TIMEOUT)
             return jsonify(response_data), 200
 
-        except (InvalidURLException, FetchVideoInfoException) as ex:
-            return self.errors.handle_errors(str(ex), ex, 422)
-        except GenerateSummaryException as ex:
-            return self.errors.handle_errors("An error occurred while generating the summary.", ex, 500)
+        except AdmissionRejectedException as ex:
+            return self._shed_response(ex)
+        except QueueFullException as ex:
+            return self._queue_full_response(ex)
         except Exception as ex:
-            return self.errors.handle_errors("An unexpected error occurred while generating the summary.", ex, 500)
+            message, status_code = self._summary_error(ex)
+            response, status_code = self.errors.handle_errors(message, ex, status_code)
+            retry_after = self._summary_retry_after(ex)
+            if retry_after is not None:
+                response.headers["Retry-After"] = str(retry_after)
+            return response, status_code
+
+    def submit_video_summary(self, video_url: str, start=None, end=None):
+        """
+        Queues a summary job for a given video URL and returns its ID immediately.
+        """
+        try:
+            job = self._submit_summary_job(video_url, start, end)
+            return jsonify(self._job_payload(job)), 202
+
+        except QueueFullException as ex:
+            return self._queue_full_response(ex)
+        except Exception as ex:
+            message, status_code = self._summary_error(ex)
+            return self.errors.handle_errors(message, ex, status_code)
+
+    def stream_video_summary(self, video_url: str, start=None, end=None):
+        """
+        Streams a summary over Server-Sent Events: metadata first, then summary chunks
+        as the model produces them. Errors before the stream starts use the usual JSON errors.
+        """
+        try:
+            video_id = self._validate_url(video_url)
+            video_info = self._fetch_video_info(video_id, parse_clip(start, end))
+        except Exception as ex:
+            message, status_code = self._summary_error(ex)
+            return self.errors.handle_errors(message, ex, status_code)
+
+        events = self._summary_events(video_id, video_info)
+        return Response(
+            stream_with_context(events),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
 
-    def download_audio(self, video_url: str) -> Response:
+    def batch_video_summaries(self, video_urls: List[str] = None, playlist_url: str = None):
         """
-        Downloads audio from the video URL.
+        Summarizes several videos and streams one NDJSON line per video as each finishes.
+        Playlist URLs are expanded into their videos. A failing video produces an error
+        line instead of failing the batch; a final line reports the batch totals.
         """
         try:
-            self._validate_url(video_url)
-            file_path = self._download_audio_file(video_url)
-            return self._serve_file(file_path)
-        except (InvalidURLException, AudioDownloadException) as ex:
+            sources = self._batch_sources(video_urls, playlist_url)
+        except InvalidBatchException as ex:
             return self.errors.handle_errors(str(ex), ex, 422)
+
+        return Response(
+            stream_with_context(self._batch_results(sources)),
+            mimetype="application/x-ndjson",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    def get_job(self, job_id: str):
+        """
+        Reports the status of a summary job, including its result once it has finished.
+        """
+        try:
+            job = self.jobs.get(job_id)
+            if job is None:
+                raise JobNotFoundException(f"Job {job_id} not found or expired.")
+            return jsonify(self._job_payload(job)), 200
+        except JobNotFoundException as ex:
+            return self.errors.handle_errors(str(ex), ex, 404)
+
+    def download_audio(self, video_url: str, stream: bool = False, codec: str = None, start=None, end=None) -> Response:
+        """
+        Downloads audio from the video URL, or only its start/end range.
+        In streaming mode the audio is transcoded on the fly and sent as it is encoded.
+        Passthrough codecs (webm/opus, m4a/aac) serve YouTube's native audio without re-encoding,
+        always from the audio store since there is nothing to transcode.
+        """
+        try:
+            video_id = self._validate_url(video_url)
+            codec = self._resolve_codec(codec)
+            clip = parse_clip(start, end)
+            passthrough = codec in PASSTHROUGH_FORMATS
+            # The slot covers the download and transcode; body transfer runs after it is released.
+            with self.audio_admission.slot():
+                if clip is not None:
+                    clip = self._bound_audio_clip(video_id, clip)
+                if stream and not passthrough:
+                    return self._stream_audio(video_id, clip)
+                file_path = self._stored_audio(video_id, codec, clip)
+                return self._serve_file(file_path, video_id, self._audio_download_name(video_id, file_path))
+        except AdmissionRejectedException as ex:
+            return self._shed_response(ex)
+        except (InvalidURLException, InvalidCodecException, InvalidClipException, AudioDownloadException) as ex:
+            return self.errors.handle_errors(str(ex), ex, 422)
+        except TranscodeQueueFullException as ex:
+            response, status_code = self.errors.handle_errors(str(ex), ex, 503)
+            response.headers["Retry-After"] = str(Config.TRANSCODE_RETRY_AFTER)
+            return response, status_code
         except FileNotFoundError as ex:
             return self.errors.handle_errors("File not found.", ex, 404)
         except Exception as ex:
             return self.errors.handle_errors("An error occurred while downloading the audio.", ex, 500)
 
     # Private helper methods
-    def _validate_url(self, video_url: str) -> None:
+    def _register_gauges(self) -> None:
+        """
+        Exposes the job queue, transcoder, LLM limiter and index state as gauges read at scrape time.
+        """
+        JOB_QUEUE_DEPTH.set_function(self.jobs.queue_depth)
+        TRANSCODES.set_function(lambda: {
+            ("running",): self.transcoder.stats()["running"],
+            ("waiting",): self.transcoder.stats()["waiting"],
+        })
+        limiters = {name: client.rate_limiter for name, client in self.langchain.clients.items() if client.rate_limiter}
+        LLM_IN_FLIGHT.set_function(lambda: {(name,): limiter.concurrency.stats()["in_flight"] for name, limiter in limiters.items()})
+        LLM_CONCURRENCY_LIMIT.set_function(lambda: {(name,): limiter.concurrency.limit for name, limiter in limiters.items()})
+        admissions = (self.summary_admission, self.audio_admission)
+        ADMISSION_QUEUE_DEPTH.set_function(lambda: {(admission.name,): admission.queue_depth() for admission in admissions})
+        ADMISSION_RUNNING.set_function(lambda: {(admission.name,): admission.stats()["running"] for admission in admissions})
+        if self.summary_store.near_duplicates:
+            NEAR_DUPLICATE_INDEX_ENTRIES.set_function(self.summary_store.index_size)
+
+    @staticmethod
+    def _wait_for_job(job, timeout: float):
+        """
+        Waits for a job's result, raising StageTimeoutError on timeout. The job keeps running
+        and stays keyed, so a retry of the same request picks up its result.
+        """
+        try:
+            return job.wait(timeout)
+        except FutureTimeoutError:
+            if job.future.done():
+                # The job itself raised a TimeoutError (e.g. a socket timeout).
+                raise
+            raise StageTimeoutError(f"Job {job.id} did not finish within {timeout} seconds.")
+
+    def _submit_summary_job(self, video_url: str, start=None, end=None):
+        """
+        Submits the summary pipeline to the job pool, reusing any live job for the same video and range.
+        """
+        video_id = self._validate_url(video_url)
+        clip = parse_clip(start, end)
+        key = ("summary", video_id) if clip is None else ("summary", video_id, clip.key())
+        return self.jobs.submit(key, lambda: self._build_summary(video_id, clip))
+
+    def _job_payload(self, job) -> Dict:
+        payload = {
+            "job_id": job.id,
+            "status": job.status,
+            "video_id": job.key[1],
+            "status_url": f"jobs/{job.id}",
+            "queue_depth": self.jobs.queue_depth(),
+            "result": job.result,
+            "error": None,
+        }
+        if job.error is not None:
+            message, status_code = self._summary_error(job.error)
+            payload["error"] = {"message": message, "status_code": status_code}
+        return payload
+
+    def _batch_sources(self, video_urls: List[str] = None, playlist_url: str = None) -> List[str]:
+        """
+        Validates the batch request body and returns its URLs, playlist first.
+        """
+        if video_urls is not None and (not isinstance(video_urls, list) or not all(isinstance(url, str) for url in video_urls)):
+            raise InvalidBatchException("'urls' must be a list of URLs.")
+        sources = ([playlist_url] if playlist_url else []) + (video_urls or [])
+        if not sources:
+            raise InvalidBatchException("Provide a list of 'urls' or a 'playlist' URL.")
+        if len(sources) > Config.BATCH_MAX_ITEMS:
+            raise InvalidBatchException(f"A batch accepts at most {Config.BATCH_MAX_ITEMS} URLs.")
+        return sources
+
+    def _batch_items(self, sources: List[str]) -> Iterator[Dict]:
+        """
+        Yields one item per video, expanding playlist URLs; items that failed to resolve carry their error.
+        """
+        remaining = Config.BATCH_MAX_ITEMS
+        for url in sources:
+            if remaining <= 0:
+                yield {"url": url, "video_id": None, "error": InvalidBatchException(
+                    f"The batch is limited to {Config.BATCH_MAX_ITEMS} videos.")}
+                continue
+            playlist_id = extract_playlist_id(url)
+            try:
+                if playlist_id and not extract_video_id(url):
+                    video_ids = self._expand_playlist(playlist_id, remaining)
+                else:
+                    video_ids = [self._validate_url(url)]
+            except Exception as ex:
+                yield {"url": url, "video_id": None, "error": ex}
+                continue
+            for video_id in video_ids:
+                remaining -= 1
+                yield {"url": canonical_video_url(video_id), "video_id": video_id, "error": None}
+
+    def _expand_playlist(self, playlist_id: str, limit: int) -> List[str]:
+        """
+        Lists the video IDs of a playlist with a flat extraction (no per-video requests).
+        """
+        options = {**self._ydl_options(), "extract_flat": "in_playlist", "playlistend": limit}
+        try:
+            with YoutubeDL(options) as ydl:
+                info = ydl.extract_info(canonical_playlist_url(playlist_id), download=False)
+        except Exception as e:
+            raise FetchVideoInfoException(f"Error expanding playlist: {e}")
+        video_ids = [entry["id"] for entry in (info or {}).get("entries") or [] if entry and entry.get("id")]
+        if not video_ids:
+            raise UnsupportedVideoException("The playlist has no videos.")
+        return video_ids[:limit]
+
+    def _batch_results(self, sources: List[str]) -> Iterator[str]:
+        """
+        Runs the batch through the job pool with at most BATCH_CONCURRENCY jobs in flight
+        and yields an NDJSON line per video in completion order. Videos repeated in the
+        batch, or already being summarized elsewhere, share one job. A job not finished
+        within JOB_WAIT_TIMEOUT of its submission gets an error line; it keeps running and
+        stays keyed, as for a synchronous request.
+        """
+        started = time.monotonic()
+        items = deque(enumerate(self._batch_items(sources)))
+        in_flight: Dict = {}
+        deadlines: Dict = {}
+        succeeded = failed = 0
+
+        while items or in_flight:
+            while items and len(in_flight) < Config.BATCH_CONCURRENCY:
+                index, item = items.popleft()
+                if item["error"] is None:
+                    try:
+                        job = self._submit_summary_job(item["url"])
+                    except QueueFullException as ex:
+                        if in_flight:
+                            # Retry once one of this batch's own jobs frees a slot
+                            items.appendleft((index, item))
+                            break
+                        item["error"] = ex
+                    else:
+                        deadlines.setdefault(job.future, (job.id, time.monotonic() + Config.JOB_WAIT_TIMEOUT))
+                        in_flight.setdefault(job.future, []).append((index, item))
+                        continue
+                failed += 1
+                yield self._batch_line(index, item, error=item["error"])
+
+            if not in_flight:
+                continue
+            timeout = max(0.0, min(deadline for _, deadline in deadlines.values()) - time.monotonic())
+            done, _ = wait(list(in_flight), timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                deadlines.pop(future)
+                for index, item in in_flight.pop(future):
+                    if future.exception() is None:
+                        succeeded += 1
+                        yield self._batch_line(index, item, result=future.result())
+                    else:
+                        failed += 1
+                        yield self._batch_line(index, item, error=future.exception())
+
+            now = time.monotonic()
+            for future in [future for future, (_, deadline) in deadlines.items() if deadline <= now]:
+                job_id, _ = deadlines.pop(future)
+                error = StageTimeoutError(f"Job {job_id} did not finish within {Config.JOB_WAIT_TIMEOUT} seconds.")
+                for index, item in in_flight.pop(future):
+                    failed += 1
+                    yield self._batch_line(index, item, error=error)
+
+        yield self._batch_totals_line(succeeded, failed, started)
+
+    def _batch_line(self, index: int, item: Dict, result: Dict = None, error: BaseException = None) -> str:
+        line = {"index": index, "url": item["url"], "video_id": item["video_id"], "success": error is None}
+        if error is None:
+            line["result"] = result
+        else:
+            message, status_code = self._batch_error(error)
+            self.logger.add_to_log("error", f"{message}: {error}", video_id=item["video_id"])
+            line["error"] = {"message": message, "status_code": status_code}
+        return json.dumps(line, ensure_ascii=False) + "\n"
+
+    @staticmethod
+    def _batch_totals_line(succeeded: int, failed: int, started: float) -> str:
+        return json.dumps({
+            "done": True,
+            "total": succeeded + failed,
+            "succeeded": succeeded,
+            "failed": failed,
+            "elapsed_seconds": round(time.monotonic() - started, 3),
+        }) + "\n"
+
+    def _batch_error(self, ex: BaseException) -> Tuple[str, int]:
+        if isinstance(ex, InvalidBatchException):
+            return str(ex), 422
+        if isinstance(ex, QueueFullException):
+            return str(ex), 429
+        return self._summary_error(ex)
+
+    def _summary_events(self, video_id: str, video_info: Dict) -> Iterator[str]:
+        """
+        Yields the SSE events for a streamed summary and stores the summary once complete.
+        """
+        transcription = video_info.get("transcription", "").lower()
+        compressed, prompt_tokens = self._compress_transcription(transcription)
+        yield self._sse("metadata", {
+            "channel": video_info.get("channel", ""),
+            "title": video_info.get("title", ""),
+            "thumbnail": video_info.get("thumbnail", ""),
+            "transcription": transcription,
+            "prompt_tokens": prompt_tokens,
+        })
+
+        summary_key = self._summary_key(video_id, video_info)
+        summary, llm, fingerprint = self._stored_summary(summary_key, compressed)
+        if summary is not None:
+            yield self._sse("summary", {"chunk": summary})
+        else:
+            chunks = []
+            llm = {"cached": False}
+            try:
+                with stage("llm"):
+                    for chunk in self.langchain.stream_transcript_summary(compressed, usage=llm):
+                        chunks.append(chunk)
+                        yield self._sse("summary", {"chunk": chunk})
+            except Exception as ex:
+                message, status_code = self._summary_error(ex)
+                self.logger.add_to_log("error", f"{message}: {ex}")
+                yield self._sse("error", {"message": message, "status_code": status_code})
+                return
+            self.summary_store.set(summary_key, "".join(chunks), fingerprint, llm.get("model"))
+
+        yield self._sse("done", {"audio_download_link": self._audio_download_link(video_id, video_info), "llm": llm})
+
+    @staticmethod
+    def _sse(event: str, data: Dict) -> str:
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    def _summary_error(self, ex: BaseException) -> Tuple[str, int]:
+        """
+        Maps a summary pipeline exception to a client message and HTTP status code.
+        """
+        if isinstance(ex, (InvalidURLException, InvalidClipException, FetchVideoInfoException)):
+            return str(ex), 422
+        if isinstance(ex, StageTimeoutError):
+            return "Timed out while fetching the video.", 504
+        if isinstance(ex, LangchainRateLimitError):
+            return "The summary model is busy. Please try again later.", 503
+        if isinstance(ex, (GenerateSummaryException, LangchainError)):
+            return "An error occurred while generating the summary.", 500
+        return "An unexpected error occurred while generating the summary.", 500
+
+    @staticmethod
+    def _summary_retry_after(ex: BaseException):
+        """
+        Seconds a client should wait before retrying a summary that failed on the LLM rate limit.
+        """
+        if not isinstance(ex, LangchainRateLimitError):
+            return None
+        return math.ceil(ex.retry_after or Config.GROQ_RETRY_AFTER)
+
+    def _shed_response(self, ex: AdmissionRejectedException):
+        """
+        Fast rejection for a shed request. Shedding is expected under load, so it is only
+        counted, not logged with a traceback like handle_errors would.
+        """
+        response = jsonify(self._shed_payload(ex))
+        response.headers["Retry-After"] = str(ex.retry_after)
+        return response, ex.status_code
+
+    @staticmethod
+    def _shed_payload(ex: AdmissionRejectedException) -> Dict:
+        return {
+            "message": str(ex),
+            "success": False,
+            "context": "",
+            "queue_depth": ex.queue_depth,
+        }
+
+    def _queue_full_response(self, ex: QueueFullException):
+        response = jsonify({
+            "message": str(ex),
+            "success": False,
+            "context": "",
+            "queue_depth": ex.queue_depth,
+            "queue_capacity": ex.queue_capacity,
+        })
+        response.headers["Retry-After"] = str(Config.JOB_RETRY_AFTER)
+        return response, 429
+
+    def _build_summary(self, video_id: str, clip: ClipRange = None) -> Dict[str, str]:
+        """
+        Runs the summary pipeline for a video, or for a range of it, and returns the response payload.
+        """
+        video_info = self._fetch_video_info(video_id, clip)
+        transcription = video_info.get("transcription", "").lower()
+        compressed, prompt_tokens = self._compress_transcription(transcription)
+        summary, llm = self._generate_summary(self._summary_key(video_id, video_info), compressed)
+        return self._summary_payload(video_id, video_info, transcription, summary, prompt_tokens, llm)
+
+    @staticmethod
+    def _summary_payload(video_id: str, video_info: Dict, transcription: str, summary: str,
+                         prompt_tokens: Dict[str, int], llm: Dict) -> Dict:
+        return {
+            "channel": video_info.get("channel", ""),
+            "title": video_info.get("title", ""),
+            "thumbnail": video_info.get("thumbnail", ""),
+            "transcription": transcription,
+            "summary": summary,
+            "prompt_tokens": prompt_tokens,
+            "llm": llm,
+            "clip": video_info.get("clip"),
+            "audio_download_link": VideoService._audio_download_link(video_id, video_info),
+        }
+
+    @staticmethod
+    def _summary_key(video_id: str, video_info: Dict) -> str:
+        """
+        Summary store key: the video ID, plus the range for clip summaries.
+        """
+        clip = video_info.get("clip")
+        return video_id if clip is None else f"{video_id}@{ClipRange(**clip).key()}"
+
+    @staticmethod
+    def _audio_download_link(video_id: str, video_info: Dict) -> str:
+        link = f"download_audio?url={canonical_video_url(video_id)}"
+        clip = video_info.get("clip")
+        if clip is not None:
+            link += f"&start={clip['start']:g}&end={clip['end']:g}"
+        return link
+
+    def _compress_transcription(self, transcription: str) -> Tuple[str, Dict[str, int]]:
         """
-        Validates the YouTube URL format.
+        Strips caption noise from the transcript and reports the estimated prompt size before and after.
         """
-        youtube_url_pattern = re.compile(r"^(https?://)?(www\.)?(youtube\.com|youtu\.be)/.+$")
-        if not video_url or not youtube_url_pattern.match(video_url):
-            raise InvalidURLException("The provided URL is invalid or empty.")
+        with stage("prompt_build"):
+            compressed = compress_transcript(transcription)
+            prompt_tokens = {
+                "before_compression": self.langchain.count_prompt_tokens(transcription),
+                "after_compression": self.langchain.count_prompt_tokens(compressed),
+            }
+        PROMPT_TOKENS.observe(prompt_tokens["before_compression"], phase="before_compression")
+        PROMPT_TOKENS.observe(prompt_tokens["after_compression"], phase="after_compression")
+        return compressed, prompt_tokens
+
+    def _validate_url(self, video_url: str) -> str:
+        """
+        Validates the YouTube URL format and returns its canonical video ID.
+        """
+        with stage("validate_url"):
+            youtube_url_pattern = re.compile(r"^(https?://)?((www|m|music)\.)?(youtube\.com|youtu\.be)/.+$")
+            if not video_url or not youtube_url_pattern.match(video_url):
+                raise InvalidURLException("The provided URL is invalid or empty.")
+            video_id = extract_video_id(video_url)
+            if not video_id:
+                raise InvalidURLException("The provided URL does not reference a YouTube video.")
+            update_log_context(video_id=video_id)
+            return video_id
 
-    def _fetch_video_info(self, video_url: str) -> Dict[str, str]:
+    def _fetch_video_info(self, video_id: str, clip: ClipRange = None) -> Dict[str, str]:
         """
         Fetches video information and transcription, and validates duration.
+        Both parts are served from the video cache when possible. Missing parts are
+        loaded concurrently on the shared stage executor, sharing one yt-dlp extraction,
+        and a duration violation discards the transcript work. With a clip, the
+        transcription is only the text of the segments inside it.
         """
-        info = self._extract_video_info(video_url)
-        self._validate_video_duration(info)
-        transcription = self._generate_transcription(video_url)
+        metadata_key, transcript_key = f"metadata:{video_id}", f"segments:{video_id}"
+        metadata = self._cache_lookup(metadata_key)
+        segments = self._cache_lookup(transcript_key)
+        count_cache("video", metadata is not None)
+        count_cache("video", segments is not None)
+        if metadata is not None and segments is not None:
+            return self._video_info(metadata, segments, clip)
+
+        # Stages run in a copy of this context so their timings reach the request's Server-Timing.
+        executor = get_executor()
+        metadata_future = transcript_future = None
+        if metadata is None:
+            metadata_future = executor.submit(
+                copy_context().run, self._cached, metadata_key, lambda: self._extract_metadata(video_id)
+            )
+        if segments is None:
+            transcript_future = executor.submit(
+                copy_context().run, self._cached, transcript_key, lambda: self._generate_transcription(video_id)
+            )
+
+        try:
+            if metadata_future is not None:
+                metadata = wait_for(metadata_future, Config.METADATA_TIMEOUT, "metadata")
+        except Exception:
+            if transcript_future is not None:
+                transcript_future.cancel()
+            raise
+        if transcript_future is not None:
+            segments = wait_for(transcript_future, Config.TRANSCRIPT_TIMEOUT, "transcript")
+
+        return self._video_info(metadata, segments, clip)
+
+    @staticmethod
+    def _video_info(metadata: Dict, segments: Dict, clip: ClipRange = None) -> Dict:
+        """
+        Merges metadata with the transcription of the whole video or of the clip.
+        """
+        transcript = TranscriptSegments.from_dict(segments)
+        if clip is None:
+            return {**metadata, "transcription": transcript.text}
+        clip = clip.bounded(metadata.get("duration") or transcript.duration)
+        transcription = transcript.window(clip.start, clip.end)
+        if not transcription:
+            raise InvalidClipException("There are no captions in the requested range.")
+        return {**metadata, "transcription": transcription, "clip": clip._asdict()}
+
+    def _cache_lookup(self, key: str):
+        """
+        Returns a cached value or None. Negative entries are raised again.
+        """
+        entry = self.video_cache.get(key)
+        if entry is None:
+            return None
+        if entry.error is not None:
+            raise UnsupportedVideoException(entry.error)
+        return entry.value
+
+    def _cached(self, key: str, loader: Callable):
+        """
+        Returns a cached value, or runs the loader and caches its result.
+        Permanent failures are cached as negative entries and raised again on a hit.
+        """
+        value = self._cache_lookup(key)
+        if value is not None:
+            return value
+
+        try:
+            value = loader()
+        except UnsupportedVideoException as ex:
+            self.video_cache.set_error(key, str(ex))
+            raise
+        self.video_cache.set(key, value)
+        return value
+
+    def _get_info(self, video_id: str) -> Dict:
+        """
+        Returns the yt-dlp info dict for a video, extracting it only once while it is cached.
+        """
+        entry = self.info_cache.get(video_id)
+        count_cache("info", entry is not None)
+        if entry is not None:
+            return entry.value
+        return self.single_flight.do(("info", video_id), lambda: self._extract_and_cache_info(video_id))
+
+    def _extract_and_cache_info(self, video_id: str) -> Dict:
+        info = self._extract_video_info(canonical_video_url(video_id))
+        self.info_cache.set(video_id, info)
+        return info
 
+    def _extract_metadata(self, video_id: str) -> Dict:
+        """
+        Extracts and validates video metadata, keeping only the fields we serve.
+        """
+        info = self._get_info(video_id)
+        self._validate_video_duration(info)
         return {
             "title": info.get("title", "Unknown"),
             "channel": info.get("uploader", "Unknown"),
             "duration": info.get("duration", 0),
             "thumbnail": info.get("thumbnail", None),
-            "transcription": transcription,
         }
 
+    def _generate_summary(self, summary_key: str, transcription: str) -> Tuple[str, Dict]:
+        """
+        Returns the stored summary for the video (or clip), generating and storing it on a miss,
+        along with the model used and its latency.
+        """
+        summary, llm, fingerprint = self._stored_summary(summary_key, transcription)
+        if summary is not None:
+            return summary, llm
+
+        with stage("llm"):
+            summary, usage = self.langchain.summarize_transcript(transcription)
+        # Keyed by the model that produced it: a fallback summary is not stored as the routed model's.
+        self.summary_store.set(summary_key, summary, fingerprint, usage.model)
+        return summary, {**usage._asdict(), "cached": False}
+
+    def _stored_summary(self, summary_key: str, transcription: str) -> Tuple[Optional[str], Optional[Dict], Optional[int]]:
+        """
+        Looks up the summary the routed model stored for the key, then the summary of a
+        near-identical transcript stored under another key (a re-upload or mirror), which
+        is then also stored under this key. Returns the summary and its LLM usage, both None
+        on a miss, and the transcript fingerprint to store with a newly generated summary.
+        """
+        model_name = self.langchain.router.select(transcription)
+        summary = self.summary_store.get(summary_key, model_name)
+        count_cache("summary", summary is not None)
+        if summary is not None:
+            return summary, self._cached_llm_usage(model_name), None
+        if not self.summary_store.near_duplicates:
+            return None, None, None
+
+        with stage("near_duplicate"):
+            fingerprint = simhash(transcription, min_words=Config.NEAR_DUPLICATE_MIN_WORDS)
+            match = self.summary_store.find_similar(fingerprint, model_name) if fingerprint is not None else None
+        count_cache("near_duplicate", match is not None)
+        if match is None:
+            return None, None, fingerprint
+        self.summary_store.set(summary_key, match.summary, fingerprint, model_name)
+        llm = {**self._cached_llm_usage(model_name), "reused_from": match.video_id, "distance": match.distance}
+        return match.summary, llm, fingerprint
+
+    @staticmethod
+    def _cached_llm_usage(model_name: Optional[str] = None) -> Dict:
+        return {"model": model_name, "latency_seconds": 0.0, "fallback": False, "cached": True}
+
     def _extract_video_info(self, video_url: str) -> Dict:
         """
         Extracts video metadata using YoutubeDL.
         """
         try:
-            with YoutubeDL(self._ydl_options()) as ydl:
+            with stage("extract_info"), YoutubeDL(self._ydl_options()) as ydl:
                 info = ydl.extract_info(video_url, download=False)
                 if not info:
                     raise FetchVideoInfoException("Failed to extract video information.")
@@ -132,82 +833,291 @@ class VideoService:
         """
         Ensures the video duration is within allowed limits.
         """
-        duration = info.get("duration", 0)
+        duration = info.get("duration") or 0
         if duration > self.max_video_duration:
-            raise FetchVideoInfoException(
+            raise UnsupportedVideoException(
                 f"Video duration {duration} seconds exceeds the allowed limit of {self.max_video_duration} seconds."
             )
 
-    def _generate_transcription(self, video_url: str) -> str:
+    def _generate_transcription(self, video_id: str) -> Dict:
         """
-        Generates a transcription using YoutubeLoader.
+        Generates a transcription from the caption tracks listed in the video's info dict,
+        keeping segment timings so clips can be cut from it (see TranscriptSegments).
+        The duration is checked first so over-long videos never download captions.
         """
+        info = self._get_info(video_id)
+        self._validate_video_duration(info)
+        track = select_caption_track(info)
+        if track is None:
+            raise UnsupportedVideoException("No captions available for this video.")
+
         try:
-            loader = YoutubeLoader.from_youtube_url(video_url, language=["es", "pt", "en"])
-            transcription = ''.join(doc.page_content for doc in loader.load())
-            if not transcription:
-                raise FetchVideoInfoException("Transcription is empty.")
-            return transcription
+            with stage("transcript"), YoutubeDL(self._ydl_options()) as ydl:
+                content = ydl.urlopen(track["url"]).read().decode("utf-8")
+                segments = parse_captions(content, track.get("ext"))
         except Exception as e:
             raise FetchVideoInfoException(f"Error generating transcription: {e}")
 
-    def _download_audio_file(self, video_url: str) -> str:
+        transcript = TranscriptSegments.from_captions(segments)
+        if not transcript.text:
+            raise UnsupportedVideoException("Transcription is empty.")
+        TRANSCRIPT_CHARACTERS.observe(len(transcript.text))
+        return transcript.to_dict()
+
+    def _resolve_codec(self, codec: str = None) -> str:
         """
-        Downloads audio from the video URL.
+        Normalizes the requested codec; defaults to the service codec (transcoded).
         """
+        codec = (codec or self.codec).lower()
+        codec = CODEC_ALIASES.get(codec, codec)
+        if codec != self.codec and codec not in PASSTHROUGH_FORMATS:
+            supported = ", ".join([self.codec, *PASSTHROUGH_FORMATS, *CODEC_ALIASES])
+            raise InvalidCodecException(f"Unsupported codec '{codec}'. Supported codecs: {supported}.")
+        return codec
+
+    def _stored_audio(self, video_id: str, codec: str, clip: ClipRange = None) -> str:
+        """
+        Returns the audio store path of the video (or bounded clip) in the codec, downloading
+        it on a miss. The path is acquired once for the caller, who must release it.
+        """
+        quality = self._audio_quality(codec, clip)
+        file_path = self.audio_store.acquire_existing(video_id, codec, quality)
+        count_cache("audio", file_path is not None)
+        if file_path is None:
+            file_path = self.single_flight.do(
+                ("audio", video_id, codec, quality),
+                lambda: self._download_audio_file(video_id, codec, clip),
+                on_complete=self.audio_store.acquire,
+            )
+        return file_path
+
+    def _audio_quality(self, codec: str, clip: ClipRange = None) -> str:
+        """
+        Quality part of an audio store key: the bitrate, "source" for passthrough codecs,
+        followed by the range for clips.
+        """
+        quality = SOURCE_QUALITY if codec in PASSTHROUGH_FORMATS else self.quality
+        return quality if clip is None else f"{quality}-{clip.key()}"
+
+    def _download_audio_file(self, video_id: str, codec: str, clip: ClipRange = None) -> str:
+        """
+        Downloads audio for the video into the audio store, reusing the cached info dict when
+        there is one. Passthrough codecs are stored as downloaded when YouTube serves that
+        container; anything else is transcoded under the transcode scheduler. The artifact is
+        always stored in the requested codec, under the key _stored_audio looks up.
+        """
+        staging_directory = self.audio_store.create_staging_directory()
         try:
-            with YoutubeDL(self._ydl_options()) as ydl:
-                info = ydl.extract_info(video_url, download=True)
-                return ydl.prepare_filename(info)
+            if clip is not None:
+                return self._download_audio_clip(video_id, codec, clip, staging_directory)
+            audio_format = PASSTHROUGH_FORMATS.get(codec, "bestaudio/best")
+            source_file = self._download_source_audio(video_id, staging_directory, audio_format)
+            if codec in PASSTHROUGH_FORMATS and source_file.endswith(f".{codec}"):
+                return self.audio_store.commit(source_file, video_id, codec, SOURCE_QUALITY)
+
+            # The selector fell back to another container for passthrough codecs, so those are encoded too.
+            target_file = os.path.join(staging_directory, f"{video_id}-{self.quality}.{codec}")
+            with self.transcoder.slot(), stage("transcode"):
+                transcode_file(Config.FFMPEG_PATH, source_file, target_file, self.quality)
+            return self.audio_store.commit(target_file, video_id, codec, self._audio_quality(codec))
+        except (AudioDownloadException, TranscodeQueueFullException):
+            raise
         except Exception as e:
             raise AudioDownloadException(f"Error downloading audio: {e}")
+        finally:
+            self.audio_store.discard_staging_directory(staging_directory)
 
-    def _serve_file(self, file_path: str):
-        sanitized_path = os.path.abspath(file_path.replace(".webm", f".{self.codec}") if file_path.endswith(".webm") else file_path)
-        if not os.path.exists(sanitized_path):
-            print(f"ERROR: File not found: {sanitized_path}")
-            raise FileNotFoundError(f"File not found: {sanitized_path}")
-        
+    def _download_audio_clip(self, video_id: str, codec: str, clip: ClipRange, staging_directory: str) -> str:
+        """
+        Cuts the clip straight from the remote stream with FFmpeg input seeking, so only the
+        bytes around the range are fetched. Passthrough codecs copy the native stream when
+        the video offers that container, and are encoded into it otherwise.
+        """
+        info = self._get_info(video_id)
+        audio_format = select_audio_format(info, ext=codec) if codec in PASSTHROUGH_FORMATS else None
+        passthrough = audio_format is not None
+        if audio_format is None:
+            audio_format = select_audio_format(info)
+        if audio_format is None:
+            raise AudioDownloadException("No audio stream is available for this video.")
 
-        def delete_file_later():
-            try:
-                time.sleep(2)
-                if os.path.exists(sanitized_path):
-                    os.remove(sanitized_path)
-                    print(f"INFO: File {sanitized_path} deleted after serving.")
-                else:
-                    print(f"INFO: File {sanitized_path} not found during cleanup.")
-            except Exception as e:
-                print(f"ERROR: Failed to delete file {sanitized_path}: {str(e)}")
+        target_file = os.path.join(staging_directory, f"{video_id}-{clip.key()}.{codec}")
+        with self.transcoder.slot(), stage("transcode"):
+            transcode_range(
+                Config.FFMPEG_PATH,
+                audio_format["url"],
+                audio_format.get("http_headers") or {},
+                target_file,
+                None if passthrough else self.quality,
+                clip.start,
+                clip.duration,
+            )
+        return self.audio_store.commit(target_file, video_id, codec, self._audio_quality(codec, clip))
 
+    def _bound_audio_clip(self, video_id: str, clip: ClipRange) -> ClipRange:
         try:
-            threading.Thread(target=delete_file_later).start()
-            return send_file(
-                sanitized_path,
-                as_attachment=True,
-                download_name=os.path.basename(sanitized_path),
-                mimetype=f"audio/{self.codec}"
+            info = self._get_info(video_id)
+        except FetchVideoInfoException as e:
+            raise AudioDownloadException(f"Error downloading audio: {e}")
+        return clip.bounded(info.get("duration"))
+
+    def _download_source_audio(self, video_id: str, staging_directory: str, audio_format: str) -> str:
+        """
+        Downloads the selected audio stream, as served by YouTube, into the staging directory.
+        """
+        output_template = os.path.join(staging_directory, f"{video_id}.%(ext)s")
+        with stage("audio_download"), YoutubeDL(self._ydl_options(output_template, audio_format)) as ydl:
+            entry = self.info_cache.get(video_id)
+            if entry is not None:
+                # process_ie_result mutates the dict, so work on a private copy.
+                info = copy.deepcopy(entry.value)
+                for key in ("requested_downloads", "filepath", "_filename", "filename"):
+                    info.pop(key, None)
+                ydl.process_ie_result(info, download=True)
+            else:
+                ydl.extract_info(canonical_video_url(video_id), download=True)
+
+        downloaded = [name for name in os.listdir(staging_directory) if name.startswith(f"{video_id}.")]
+        if not downloaded:
+            raise AudioDownloadException("The audio stream was not downloaded.")
+        return os.path.join(staging_directory, downloaded[0])
+
+    def _audio_download_name(self, video_id: str, file_path: str) -> str:
+        """
+        File name offered to the client: the video title when it is known, else the video ID.
+        """
+        title = None
+        entry = self.video_cache.get(f"metadata:{video_id}")
+        if entry is not None and entry.value:
+            title = entry.value.get("title")
+        if not title:
+            info_entry = self.info_cache.get(video_id)
+            title = info_entry.value.get("title") if info_entry is not None else None
+        return f"{title or video_id}{os.path.splitext(file_path)[1]}"
+
+    def _stream_audio(self, video_id: str, clip: ClipRange = None) -> Response:
+        """
+        Pipes the best audio stream, or the clip of it, through FFmpeg and sends the encoded
+        bytes as a chunked response, so nothing is written to disk and memory per transfer stays bounded.
+        """
+        try:
+            info = self._get_info(video_id)
+        except FetchVideoInfoException as e:
+            raise AudioDownloadException(f"Error streaming audio: {e}")
+        audio_format = select_audio_format(info)
+        if audio_format is None:
+            raise AudioDownloadException("No audio stream is available for this video.")
+
+        command = build_transcode_command(
+            Config.FFMPEG_PATH,
+            audio_format["url"],
+            audio_format.get("http_headers") or {},
+            self.codec,
+            self.quality,
+            start=clip.start if clip is not None else None,
+            duration=clip.duration if clip is not None else None,
+        )
+        self.transcoder.acquire()
+        started = time.monotonic()
+
+        def on_close():
+            self.transcoder.release()
+            record_stage("transcode", time.monotonic() - started)
+
+        try:
+            transcode = TranscodeStream(
+                command,
+                chunk_size=Config.AUDIO_STREAM_CHUNK_SIZE,
+                on_close=on_close,
             )
-        
+        except FFmpegError as e:
+            raise AudioDownloadException(f"Error streaming audio: {e}")
+
+        filename = f"{info.get('title') or video_id}.{self.codec}"
+        return Response(
+            transcode,
+            mimetype=f"audio/{self.codec}",
+            headers={
+                "Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}",
+                "X-Accel-Buffering": "no",
+            },
+        )
+
+    def _serve_file(self, file_path: str, video_id: str, download_name: str):
+        """
+        Sends a stored audio file and releases its reference when the response is closed.
+        Supports Range and conditional requests through a strong ETag, or hands the transfer
+        to the front proxy when offloading is configured.
+        """
+        if not os.path.exists(file_path):
+            self.audio_store.release(file_path)
+            self.logger.add_to_log("error", f"File not found: {file_path}")
+            raise FileNotFoundError(f"File not found: {file_path}")
+
+        etag = self._file_etag(file_path)
+        codec = os.path.splitext(file_path)[1].lstrip(".")
+        mimetype = AUDIO_MIMETYPES.get(codec, f"audio/{codec}")
+        try:
+            with stage("serve_file"):
+                response = self._file_response(file_path, etag, download_name, mimetype)
         except Exception as e:
-            print(f"ERROR: Failed to serve file {sanitized_path}: {str(e)}")
+            self.audio_store.release(file_path)
+            self.logger.add_to_log("error", f"Failed to serve file {file_path}: {str(e)}")
             raise e
+        response.call_on_close(lambda: self.audio_store.release(file_path))
+        return response
+
+    @staticmethod
+    def _file_etag(file_path: str) -> str:
+        """
+        Strong validator of a stored file: the artifact name (video ID, quality, codec) plus its
+        size and modification time, so a file evicted and stored again gets a new ETag.
+        """
+        stat = os.stat(file_path)
+        return f"{os.path.basename(file_path)}-{stat.st_size:x}-{stat.st_mtime_ns:x}"
+
+    def _file_response(self, file_path: str, etag: str, download_name: str, mimetype: str) -> Response:
+        if Config.AUDIO_OFFLOAD:
+            return self._offload_file(file_path, etag, download_name, mimetype)
+        return send_file(
+            file_path,
+            as_attachment=True,
+            download_name=download_name,
+            mimetype=mimetype,
+            etag=etag,
+            conditional=True,
+        )
+
+    def _offload_file(self, file_path: str, etag: str, download_name: str, mimetype: str) -> Response:
+        """
+        Returns an empty response that tells nginx (X-Accel-Redirect) or Apache/lighttpd
+        (X-Sendfile) to send the file, so the worker is free as soon as headers are written.
+        Conditional requests are still answered here with a 304.
+        """
+        response = Response(mimetype=mimetype)
+        response.headers["Content-Disposition"] = f"attachment; filename*=UTF-8''{quote(download_name)}"
+        response.set_etag(etag)
+        response.last_modified = int(os.path.getmtime(file_path))
+        response = response.make_conditional(request)
+        if response.status_code == 304:
+            return response
+        if Config.AUDIO_OFFLOAD == "x-accel":
+            response.headers["X-Accel-Redirect"] = Config.AUDIO_OFFLOAD_PREFIX.rstrip("/") + "/" + os.path.basename(file_path)
+        else:
+            response.headers["X-Sendfile"] = file_path
+        return response
 
-    def _ydl_options(self) -> Dict:
+    def _ydl_options(self, output_template: str = None, audio_format: str = "bestaudio/best") -> Dict:
         """
-        Options for YoutubeDL.
+        Options for YoutubeDL. Transcoding is done by the service, not by yt-dlp postprocessors.
         """
         return {
             "quiet": True,
-            "format": "bestaudio/best",
-            "outtmpl": os.path.join(self.output_folder, "%(title)s.%(ext)s"),
-            "postprocessors": [
-                {
-                    "key": "FFmpegExtractAudio",
-                    "preferredcodec": self.codec,
-                    "preferredquality": self.quality,
-                }
-            ],
+            "socket_timeout": Config.YTDLP_SOCKET_TIMEOUT,
+            "format": audio_format,
+            "outtmpl": output_template or os.path.join(self.output_folder, "%(id)s.%(ext)s"),
+            # Keep the download time as mtime instead of the upload date from the server
+            "updatetime": False,
         }
 
 # import atexit
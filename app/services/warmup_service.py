@@ -0,0 +1,238 @@
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, TextIO
+
+# Services
+from app.services.video_service import VideoService
+
+# Utils
+from app.utils.clip import ClipRange, parse_clip
+from app.utils.youtube import extract_playlist_id, extract_video_id
+
+# NDJSON fields read as the URL, before falling back to any string value that is a YouTube URL
+URL_FIELDS = ("url", "video_url", "playlist")
+
+class WarmupItem(NamedTuple):
+    """
+    One video (or clip) to precompute; error is set when the source could not be resolved.
+    """
+    source: str
+    video_id: Optional[str]
+    clip: Optional[ClipRange]
+    error: Optional[BaseException] = None
+
+    def key(self) -> str:
+        return self.video_id if self.clip is None else f"{self.video_id}@{self.clip.key()}"
+
+class TaskResult(NamedTuple):
+    task: str
+    seconds: float
+    cached: bool
+    error: Optional[str] = None
+
+class ItemResult(NamedTuple):
+    item: WarmupItem
+    tasks: List[TaskResult]
+    seconds: float
+
+    @property
+    def success(self) -> bool:
+        return self.item.error is None and all(task.error is None for task in self.tasks)
+
+class WarmupJournal:
+    """
+    Append-only NDJSON record of the finished tasks of a warm-up run. Each task is flushed
+    as soon as it finishes, so an interrupted run resumes where it stopped.
+    """
+
+    def __init__(self, path: Optional[str], fresh: bool = False):
+        self.path = path
+        self.done: Set[str] = set()
+        self._lock = threading.Lock()
+        self._file: Optional[TextIO] = None
+        if path is None:
+            return
+        if fresh and os.path.exists(path):
+            os.remove(path)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        self.done.add(json.loads(line)["task"])
+                    except (ValueError, KeyError, TypeError):
+                        # A line cut short by the interruption
+                        continue
+        self._file = open(path, "a", encoding="utf-8")
+
+    def record(self, task: TaskResult) -> None:
+        with self._lock:
+            self.done.add(task.task)
+            if self._file is not None:
+                self._file.write(json.dumps({"task": task.task, "seconds": round(task.seconds, 3), "cached": task.cached}) + "\n")
+                self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+class WarmupService:
+    """
+    Precomputes summaries and stored audio for a list of videos by running the regular
+    pipeline off-line, so the first real request for them is a cache hit. It fills the
+    summary store and the audio store, which are shared with the API; the metadata and
+    transcript cache is shared too when VIDEO_CACHE_DIR is set.
+    """
+
+    def __init__(self, service: VideoService):
+        self.service = service
+
+    def read_sources(self, lines: Iterable[str]) -> Iterator[Dict]:
+        """
+        Yields {"url", "start", "end"} from plain lines of URLs or NDJSON records.
+        Blank lines and lines starting with # are skipped.
+        """
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if not line.startswith("{"):
+                yield {"url": line, "start": None, "end": None}
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield {"url": line, "start": None, "end": None}
+                continue
+            url = next((record[field] for field in URL_FIELDS if isinstance(record.get(field), str)), None)
+            if url is None:
+                url = next((value for value in record.values() if isinstance(value, str) and self._is_youtube_url(value)), line)
+            yield {"url": url, "start": record.get("start"), "end": record.get("end")}
+
+    def resolve(self, sources: Iterable[Dict], playlist_limit: int) -> Iterator[WarmupItem]:
+        """
+        Turns sources into items, expanding playlist URLs and dropping repeated videos.
+        """
+        seen = set()
+        for source in sources:
+            url = source["url"]
+            try:
+                clip = parse_clip(source.get("start"), source.get("end"))
+                playlist_id = extract_playlist_id(url)
+                if playlist_id and not extract_video_id(url):
+                    video_ids = self.service._expand_playlist(playlist_id, playlist_limit)
+                else:
+                    video_ids = [self.service._validate_url(url)]
+            except Exception as ex:
+                yield WarmupItem(url, None, None, ex)
+                continue
+            for video_id in video_ids:
+                item = WarmupItem(url, video_id, clip)
+                if item.key() not in seen:
+                    seen.add(item.key())
+                    yield item
+
+    @staticmethod
+    def task_names(item: WarmupItem, summary: bool, audio_codec: Optional[str]) -> List[str]:
+        names = [f"summary:{item.key()}"] if summary else []
+        if audio_codec:
+            names.append(f"audio:{audio_codec}:{item.key()}")
+        return names
+
+    def run(self, items: List[WarmupItem], journal: WarmupJournal, concurrency: int,
+            summary: bool = True, audio_codec: Optional[str] = None) -> Iterator[ItemResult]:
+        """
+        Warms the items with `concurrency` in flight and yields their results as they finish.
+        Tasks already in the journal are skipped. Closing the generator cancels queued items
+        and waits for the ones in flight, so their finished tasks still reach the journal.
+        """
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="warmup")
+        try:
+            futures = [executor.submit(self._warm, item, journal, summary, audio_codec) for item in items]
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _warm(self, item: WarmupItem, journal: WarmupJournal, summary: bool, audio_codec: Optional[str]) -> ItemResult:
+        started = time.monotonic()
+        if item.error is not None:
+            return ItemResult(item, [], 0.0)
+        tasks = []
+        for name in self.task_names(item, summary, audio_codec):
+            if name in journal.done:
+                continue
+            task_started = time.monotonic()
+            try:
+                if name.startswith("summary:"):
+                    cached = self._warm_summary(item)
+                else:
+                    cached = self._warm_audio(item, audio_codec)
+            except Exception as ex:
+                message, _ = self.service._batch_error(ex)
+                tasks.append(TaskResult(name, time.monotonic() - task_started, False, message))
+                continue
+            task = TaskResult(name, time.monotonic() - task_started, cached)
+            journal.record(task)
+            tasks.append(task)
+        return ItemResult(item, tasks, time.monotonic() - started)
+
+    def _warm_summary(self, item: WarmupItem) -> bool:
+        """
+        Runs the summary pipeline; returns whether the summary was already stored.
+        """
+        result = self.service._build_summary(item.video_id, item.clip)
+        return bool((result.get("llm") or {}).get("cached"))
+
+    def _warm_audio(self, item: WarmupItem, codec: str) -> bool:
+        """
+        Stores the audio of the video or clip; returns whether it was already stored.
+        """
+        clip = self.service._bound_audio_clip(item.video_id, item.clip) if item.clip is not None else None
+        existing = self.service.audio_store.acquire_existing(item.video_id, codec, self.service._audio_quality(codec, clip))
+        if existing is not None:
+            self.service.audio_store.release(existing)
+            return True
+        self.service.audio_store.release(self.service._stored_audio(item.video_id, codec, clip))
+        return False
+
+    @staticmethod
+    def _is_youtube_url(value: str) -> bool:
+        return "youtu" in value and bool(extract_video_id(value) or extract_playlist_id(value))
+
+def summarize(results: List[ItemResult], skipped: int, elapsed: float) -> Dict:
+    """
+    Totals, throughput and per-task latency percentiles of a warm-up run.
+    """
+    durations: Dict[str, List[float]] = {}
+    for result in results:
+        for task in result.tasks:
+            if task.error is None:
+                durations.setdefault(task.task.split(":", 1)[0], []).append(task.seconds)
+    warmed = sum(1 for result in results if result.success and result.tasks)
+    return {
+        "items": len(results) + skipped,
+        "warmed": warmed,
+        "skipped": skipped,
+        "failed": sum(1 for result in results if not result.success),
+        "elapsed_seconds": round(elapsed, 3),
+        "items_per_second": round(warmed / elapsed, 3) if elapsed else 0.0,
+        "tasks": {
+            name: {
+                "count": len(values),
+                "p50": round(_percentile(values, 50), 3),
+                "p95": round(_percentile(values, 95), 3),
+                "max": round(max(values), 3),
+            }
+            for name, values in sorted(durations.items())
+        },
+    }
+
+def _percentile(values: List[float], rank: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(rank / 100 * len(ordered)) - 1)]
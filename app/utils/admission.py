@@ -0,0 +1,191 @@
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Deque, Dict, Iterator, Optional, Tuple
+from app.utils.metrics import ADMISSION_SHED
+
+# Weight of the latest request in the moving average of the time a slot is held
+HOLD_TIME_SMOOTHING = 0.2
+
+class AdmissionRejectedException(Exception):
+    def __init__(self, message: str, reason: str, status_code: int, retry_after: int, queue_depth: int):
+        super().__init__(message)
+        self.reason = reason
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.queue_depth = queue_depth
+
+class AdmissionController:
+    """
+    Admits at most max_concurrency requests to an endpoint and lets up to max_queue more
+    wait, for at most queue_timeout seconds. Anything beyond is shed at once: 429 when the
+    queue is full, 503 when the wait runs out. Shedding early keeps the latency of the
+    admitted requests stable instead of letting every request slow down together.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int = 0, queue_timeout: float = 5.0,
+                 default_retry_after: int = 5, max_retry_after: int = 60):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.default_retry_after = default_retry_after
+        self.max_retry_after = max_retry_after
+        self._condition = threading.Condition()
+        # Async callers wait on a future of their own loop, resolved from release()
+        self._async_waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self._running = 0
+        self._waiting = 0
+        self._admitted = 0
+        self._shed = {"queue_full": 0, "timeout": 0}
+        self._hold_time: Optional[float] = None
+
+    def acquire(self) -> float:
+        """
+        Blocks until the request is admitted and returns the time spent queued, in seconds.
+        """
+        started = time.monotonic()
+        with self._condition:
+            if self._running < self.max_concurrency:
+                return self._admit(started)
+            self._enqueue()
+            try:
+                admitted = self._condition.wait_for(lambda: self._running < self.max_concurrency, self.queue_timeout)
+            finally:
+                self._waiting -= 1
+            if not admitted:
+                raise self._reject("timeout")
+            return self._admit(started)
+
+    async def aacquire(self) -> float:
+        """
+        Async variant of acquire; waiting happens on the event loop, not in a thread, and
+        ends as soon as release() signals a free slot.
+        """
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        with self._condition:
+            if self._running < self.max_concurrency:
+                return self._admit(started)
+            self._enqueue()
+        admitted = False
+        try:
+            while True:
+                with self._condition:
+                    if self._running < self.max_concurrency:
+                        admitted = True
+                        return self._admit(started)
+                    remaining = self.queue_timeout - (time.monotonic() - started)
+                    if remaining <= 0:
+                        raise self._reject("timeout")
+                    waiter = (loop, loop.create_future())
+                    self._async_waiters.append(waiter)
+                try:
+                    # Unlike wait_for, wait never swallows a cancellation that races the wake-up
+                    await asyncio.wait((waiter[1],), timeout=remaining)
+                finally:
+                    waiter[1].cancel()
+                    with self._condition:
+                        if waiter in self._async_waiters:
+                            self._async_waiters.remove(waiter)
+        finally:
+            with self._condition:
+                self._waiting -= 1
+                if not admitted and self._running < self.max_concurrency:
+                    # This waiter may have been the one woken for the free slot; pass it on.
+                    self._wake_one()
+
+    def release(self, held: float) -> None:
+        with self._condition:
+            self._running -= 1
+            previous = self._hold_time
+            self._hold_time = held if previous is None else previous + HOLD_TIME_SMOOTHING * (held - previous)
+            self._wake_one()
+
+    @contextmanager
+    def slot(self) -> Iterator[float]:
+        waited = self.acquire()
+        started = time.monotonic()
+        try:
+            yield waited
+        finally:
+            self.release(time.monotonic() - started)
+
+    @asynccontextmanager
+    async def aslot(self) -> AsyncIterator[float]:
+        waited = await self.aacquire()
+        started = time.monotonic()
+        try:
+            yield waited
+        finally:
+            self.release(time.monotonic() - started)
+
+    def queue_depth(self) -> int:
+        with self._condition:
+            return self._waiting
+
+    def stats(self) -> Dict[str, float]:
+        with self._condition:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "waiting": self._waiting,
+                "admitted": self._admitted,
+                "shed_queue_full": self._shed["queue_full"],
+                "shed_timeout": self._shed["timeout"],
+                "average_hold_seconds": self._hold_time or 0.0,
+            }
+
+    def _admit(self, started: float) -> float:
+        self._running += 1
+        self._admitted += 1
+        return time.monotonic() - started
+
+    def _enqueue(self) -> None:
+        if self._waiting >= self.max_queue:
+            raise self._reject("queue_full")
+        self._waiting += 1
+
+    def _wake_one(self) -> None:
+        """
+        Wakes one thread and one async waiter for a free slot; whichever loses the race
+        waits again. Called with the condition held.
+        """
+        self._condition.notify()
+        while self._async_waiters:
+            loop, future = self._async_waiters.popleft()
+            try:
+                loop.call_soon_threadsafe(_resolve, future)
+                return
+            except RuntimeError:
+                # The waiter's loop has been closed
+                continue
+
+    def _reject(self, reason: str) -> AdmissionRejectedException:
+        """
+        Counts a shed request and builds its exception. Called with the condition held.
+        """
+        self._shed[reason] += 1
+        ADMISSION_SHED.inc(endpoint=self.name, reason=reason)
+        if reason == "queue_full":
+            message, status_code = f"Too many {self.name} requests are in progress. Please try again later.", 429
+        else:
+            message, status_code = f"No {self.name} slot became free within {self.queue_timeout:g} seconds. Please try again later.", 503
+        return AdmissionRejectedException(message, reason, status_code, self._retry_after(), self._waiting)
+
+    def _retry_after(self) -> int:
+        """
+        Roughly when the queue ahead will have drained, from the average time a slot is held.
+        """
+        if self._hold_time is None:
+            return self.default_retry_after
+        drain = self._hold_time * (self._waiting + 1) / self.max_concurrency
+        return max(1, min(self.max_retry_after, math.ceil(drain)))
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
@@ -0,0 +1,142 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+STAGING_FOLDER = ".staging"
+# Staging directories older than this are leftovers from interrupted downloads
+STALE_STAGING_SECONDS = 6 * 3600
+
+class AudioStore:
+    """
+    Content-addressed store for transcoded audio, keyed by (video ID, codec, quality).
+
+    Artifacts are written into a private staging directory and renamed into place, so a
+    reader never sees a partial file. Files being served are reference counted, and a
+    background janitor evicts the least recently used unreferenced files once the store
+    grows beyond its disk quota. A file's mtime records when it was stored and its atime
+    its last use; neither is taken from the download, whose mtime may be the upload date.
+    """
+
+    def __init__(self, directory: str, quota_bytes: int, janitor_interval: float = 60, grace_period: float = 60):
+        self.directory = directory
+        self.staging_directory = os.path.join(directory, STAGING_FOLDER)
+        self.quota_bytes = quota_bytes
+        self.janitor_interval = janitor_interval
+        self.grace_period = grace_period
+        self._refs: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._janitor: Optional[threading.Thread] = None
+        os.makedirs(self.staging_directory, exist_ok=True)
+
+    def path_for(self, video_id: str, codec: str, quality: str) -> str:
+        return os.path.abspath(os.path.join(self.directory, f"{video_id}-{quality}.{codec}"))
+
+    def acquire_existing(self, video_id: str, codec: str, quality: str) -> Optional[str]:
+        """
+        Returns the artifact path with one reference held, or None if it is not stored.
+        """
+        path = self.path_for(video_id, codec, quality)
+        with self._lock:
+            if not os.path.exists(path):
+                return None
+            self._refs[path] = self._refs.get(path, 0) + 1
+        self._touch(path)
+        return path
+
+    def acquire(self, path: str, count: int = 1) -> None:
+        with self._lock:
+            self._refs[path] = self._refs.get(path, 0) + count
+        self._touch(path)
+
+    def release(self, path: str) -> None:
+        with self._lock:
+            remaining = self._refs.get(path, 1) - 1
+            if remaining > 0:
+                self._refs[path] = remaining
+            else:
+                self._refs.pop(path, None)
+
+    def create_staging_directory(self) -> str:
+        """
+        Returns a fresh directory for one download; remove it with discard_staging_directory.
+        """
+        return tempfile.mkdtemp(dir=self.staging_directory)
+
+    def discard_staging_directory(self, staging_directory: str) -> None:
+        shutil.rmtree(staging_directory, ignore_errors=True)
+
+    def commit(self, staged_file: str, video_id: str, codec: str, quality: str) -> str:
+        """
+        Atomically moves a finished file from staging into the store and returns its path.
+        """
+        path = self.path_for(video_id, codec, quality)
+        now = time.time_ns()
+        os.utime(staged_file, ns=(now, now))
+        os.replace(staged_file, path)
+        return path
+
+    def start_janitor(self) -> None:
+        if self._janitor is not None:
+            return
+        self._janitor = threading.Thread(target=self._run_janitor, name="audio-store-janitor", daemon=True)
+        self._janitor.start()
+
+    def enforce_quota(self) -> int:
+        """
+        Deletes least recently used, unreferenced artifacts until the store fits its quota.
+        Returns the number of bytes freed.
+        """
+        artifacts = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+            artifacts.append((stat.st_atime, stat.st_size, os.path.abspath(entry.path)))
+            total += stat.st_size
+
+        freed = 0
+        cutoff = time.time() - self.grace_period
+        for used, size, path in sorted(artifacts):
+            if total - freed <= self.quota_bytes:
+                break
+            if used > cutoff:
+                continue
+            with self._lock:
+                if self._refs.get(path):
+                    continue
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+            freed += size
+        return freed
+
+    def remove_stale_staging(self) -> None:
+        cutoff = time.time() - STALE_STAGING_SECONDS
+        for entry in os.scandir(self.staging_directory):
+            if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+    def _run_janitor(self) -> None:
+        while True:
+            time.sleep(self.janitor_interval)
+            try:
+                self.enforce_quota()
+                self.remove_stale_staging()
+            except Exception:
+                # The janitor must survive transient filesystem errors; it retries next cycle.
+                pass
+
+    @staticmethod
+    def _touch(path: str) -> None:
+        """
+        Records a use in the atime and keeps the mtime, which identifies the stored version.
+        """
+        try:
+            os.utime(path, ns=(time.time_ns(), os.stat(path).st_mtime_ns))
+        except OSError:
+            pass
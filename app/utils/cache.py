@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, NamedTuple, Optional
+
+
+class CacheEntry(NamedTuple):
+    value: Any
+    error: Optional[str]
+    expires_at: float
+
+
+class VideoCache:
+    """
+    Bounded LRU cache with per-entry TTL and an optional on-disk tier.
+
+    Entries are either positive (a value) or negative (an error message), so permanent
+    failures can be remembered without repeating the work that produced them.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: int = 6 * 3600, negative_ttl: int = 600, directory: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.directory = directory
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """
+        Returns the live entry for a key, checking memory first and then disk.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._entries.move_to_end(key)
+                    return entry
+                del self._entries[key]
+
+        entry = self._read_from_disk(key, now)
+        if entry is not None:
+            self._store_in_memory(key, entry)
+        return entry
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Stores a positive entry.
+        """
+        self._store(key, CacheEntry(value, None, time.time() + self.ttl))
+
+    def set_error(self, key: str, message: str) -> None:
+        """
+        Stores a negative entry that expires after the negative TTL.
+        """
+        self._store(key, CacheEntry(None, message, time.time() + self.negative_ttl))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.directory:
+            try:
+                os.remove(self._disk_path(key))
+            except OSError:
+                pass
+
+    def _store(self, key: str, entry: CacheEntry) -> None:
+        self._store_in_memory(key, entry)
+        self._write_to_disk(key, entry)
+
+    def _store_in_memory(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _disk_path(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def _read_from_disk(self, key: str, now: float) -> Optional[CacheEntry]:
+        if not self.directory:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        if data.get("key") != key:
+            return None
+        if data.get("expires_at", 0) <= now:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return CacheEntry(data.get("value"), data.get("error"), data["expires_at"])
+
+    def _write_to_disk(self, key: str, entry: CacheEntry) -> None:
+        if not self.directory:
+            return
+        data = {"key": key, "value": entry.value, "error": entry.error, "expires_at": entry.expires_at}
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(data, file, ensure_ascii=False)
+            os.replace(temp_path, self._disk_path(key))
+        except (OSError, TypeError, ValueError):
+            # The disk tier is best effort; the in-memory entry is still valid.
+            try:
+                os.remove(temp_path)
+            except (OSError, UnboundLocalError):
+                pass
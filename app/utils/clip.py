@@ -0,0 +1,68 @@
+import re
+from typing import NamedTuple, Optional, Union
+
+TIMESTAMP_PATTERN = re.compile(r"^(?:(\d+):)?(?:(\d+):)?(\d+(?:\.\d+)?)$")
+
+class InvalidClipException(Exception):
+    pass
+
+class ClipRange(NamedTuple):
+    """
+    A time range of a video in seconds; end None means the end of the video.
+    """
+    start: float = 0.0
+    end: Optional[float] = None
+
+    def key(self) -> str:
+        """
+        Short stable form for cache keys and file names, e.g. "180-300".
+        """
+        return f"{self.start:g}-{self.end:g}" if self.end is not None else f"{self.start:g}-end"
+
+    def bounded(self, duration: Optional[float]) -> "ClipRange":
+        """
+        Checks the range against the video duration and fills in or clamps its end.
+        """
+        if duration:
+            if self.start >= duration:
+                raise InvalidClipException(f"The clip starts after the end of the video ({duration:g} seconds).")
+            return ClipRange(self.start, min(self.end, duration) if self.end is not None else float(duration))
+        return self
+
+    @property
+    def duration(self) -> Optional[float]:
+        return self.end - self.start if self.end is not None else None
+
+def parse_timestamp(value: Union[str, int, float]) -> float:
+    """
+    Seconds from a number of seconds or an "mm:ss" / "hh:mm:ss" timestamp.
+    """
+    if isinstance(value, bool):
+        raise InvalidClipException(f"Invalid timestamp: {value!r}.")
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        match = TIMESTAMP_PATTERN.match(str(value).strip())
+        if not match:
+            raise InvalidClipException(f"Invalid timestamp: {value!r}. Use seconds or mm:ss.")
+        parts = [float(part) for part in match.groups() if part is not None]
+        seconds = 0.0
+        for part in parts:
+            seconds = seconds * 60 + part
+    if seconds < 0:
+        raise InvalidClipException("Timestamps cannot be negative.")
+    return seconds
+
+def parse_clip(start=None, end=None) -> Optional[ClipRange]:
+    """
+    Builds a ClipRange from optional start/end request parameters, or None for the whole video.
+    """
+    if start in (None, "") and end in (None, ""):
+        return None
+    clip = ClipRange(
+        parse_timestamp(start) if start not in (None, "") else 0.0,
+        parse_timestamp(end) if end not in (None, "") else None,
+    )
+    if clip.end is not None and clip.end <= clip.start:
+        raise InvalidClipException("The clip end must be after its start.")
+    return clip
@@ -0,0 +1,41 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Optional
+
+from app.config.config import Config
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+class StageTimeoutError(Exception):
+    pass
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Returns the bounded executor shared by the blocking pipeline stages (yt-dlp, captions).
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=Config.STAGE_EXECUTOR_WORKERS,
+                    thread_name_prefix="stage",
+                )
+    return _executor
+
+def wait_for(future: Future, timeout: float, stage: str) -> Any:
+    """
+    Waits for a stage result, cancelling the future and raising StageTimeoutError on timeout.
+    A stage that is already running keeps its executor thread until it returns, but the
+    caller is released immediately.
+    """
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        if future.done():
+            # The stage itself raised a TimeoutError (e.g. a socket timeout).
+            raise
+        future.cancel()
+        raise StageTimeoutError(f"Stage '{stage}' did not finish within {timeout} seconds.")
@@ -0,0 +1,130 @@
+import subprocess
+from typing import Callable, Dict, Iterator, List, Optional
+
+# Output container FFmpeg should mux each codec into when writing to a pipe
+PIPE_MUXERS = {
+    "mp3": "mp3",
+    "aac": "adts",
+    "opus": "ogg",
+    "vorbis": "ogg",
+    "flac": "flac",
+    "wav": "wav",
+}
+
+class FFmpegError(Exception):
+    pass
+
+def select_audio_format(info: Dict, ext: Optional[str] = None) -> Optional[Dict]:
+    """
+    Returns the selected audio format (URL and HTTP headers) from a processed yt-dlp info dict,
+    or with ext, the best audio-only format in that container.
+    """
+    if ext:
+        candidates = [
+            candidate for candidate in info.get("formats") or []
+            if candidate.get("ext") == ext and candidate.get("url")
+            and candidate.get("acodec") not in (None, "none") and candidate.get("vcodec") in (None, "none")
+        ]
+        return max(candidates, key=lambda candidate: candidate.get("abr") or 0, default=None)
+    if info.get("url"):
+        return info
+    for requested in info.get("requested_formats") or []:
+        if requested.get("acodec") not in (None, "none") and requested.get("url"):
+            return requested
+    return None
+
+def build_transcode_command(ffmpeg_path: str, source_url: str, http_headers: Dict[str, str], codec: str, quality: str,
+                            start: Optional[float] = None, duration: Optional[float] = None) -> List[str]:
+    """
+    FFmpeg command that reads a remote stream and writes the encoded audio to stdout.
+    With start/duration only that range is read and encoded.
+    """
+    command = [ffmpeg_path, "-nostdin", "-hide_banner", "-loglevel", "error"]
+    command += _input_options(source_url, http_headers, start, duration)
+    command += ["-vn", "-b:a", f"{quality}k", "-f", PIPE_MUXERS.get(codec, codec), "pipe:1"]
+    return command
+
+def transcode_range(ffmpeg_path: str, source_url: str, http_headers: Dict[str, str], target_file: str, quality: Optional[str],
+                    start: float, duration: Optional[float]) -> None:
+    """
+    Writes a time range of a remote stream to a local file. Input seeking makes FFmpeg
+    request only the bytes around the range. Without a quality the audio is copied as is
+    (passthrough), otherwise the codec follows the target file extension.
+    """
+    command = [ffmpeg_path, "-nostdin", "-hide_banner", "-loglevel", "error", "-y"]
+    command += _input_options(source_url, http_headers, start, duration)
+    command += ["-vn"] + (["-b:a", f"{quality}k"] if quality else ["-c:a", "copy"]) + [target_file]
+    _run(command)
+
+def _input_options(source_url: str, http_headers: Dict[str, str], start: Optional[float], duration: Optional[float]) -> List[str]:
+    headers = "".join(f"{name}: {value}\r\n" for name, value in http_headers.items())
+    options = ["-headers", headers] if headers else []
+    if start:
+        options += ["-ss", f"{start:g}"]
+    if duration:
+        options += ["-t", f"{duration:g}"]
+    return options + ["-i", source_url]
+
+def transcode_file(ffmpeg_path: str, source_file: str, target_file: str, quality: str) -> None:
+    """
+    Transcodes a local audio file; the output codec follows the target file extension.
+    """
+    command = [
+        ffmpeg_path, "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+        "-i", source_file, "-vn", "-b:a", f"{quality}k", target_file,
+    ]
+    _run(command)
+
+def _run(command: List[str]) -> None:
+    try:
+        result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    except OSError as e:
+        raise FFmpegError(f"Could not start FFmpeg: {e}") from e
+    if result.returncode != 0:
+        raise FFmpegError(result.stderr.decode("utf-8", errors="replace").strip() or "FFmpeg failed.")
+
+class TranscodeStream:
+    """
+    Runs FFmpeg with its output on a pipe and exposes the encoded bytes as an iterator of
+    bounded chunks. The first chunk is read eagerly so start-up failures surface before
+    any response is sent; closing the iterator kills FFmpeg (e.g. on client disconnect).
+    """
+
+    def __init__(self, command: List[str], chunk_size: int = 64 * 1024, on_close: Optional[Callable[[], None]] = None):
+        self.chunk_size = chunk_size
+        self.on_close = on_close
+        try:
+            self.process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except OSError as e:
+            self._run_on_close()
+            raise FFmpegError(f"Could not start FFmpeg: {e}") from e
+
+        self._first_chunk = self.process.stdout.read1(self.chunk_size)
+        if not self._first_chunk:
+            error = self.process.stderr.read().decode("utf-8", errors="replace").strip()
+            self.close()
+            raise FFmpegError(error or "FFmpeg produced no audio data.")
+
+    def __iter__(self) -> Iterator[bytes]:
+        try:
+            yield self._first_chunk
+            while True:
+                chunk = self.process.stdout.read1(self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+        self.process.stdout.close()
+        self.process.stderr.close()
+        self._run_on_close()
+
+    def _run_on_close(self) -> None:
+        on_close, self.on_close = self.on_close, None
+        if on_close:
+            on_close()
@@ -0,0 +1,189 @@
+import hashlib
+import re
+import threading
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+FINGERPRINT_BITS = 64
+SLOT_BITS = 32
+SLOT_MASK = (1 << SLOT_BITS) - 1
+# Reference of a removed slot
+REMOVED = -1
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+def simhash(text: str, shingle_size: int = 3, min_words: int = 0) -> Optional[int]:
+    """
+    64-bit SimHash of the word shingles of a normalized transcript (lowercased, punctuation
+    and spacing ignored). Near-identical transcripts differ in only a few bits. Returns None
+    below min_words, where a handful of shared phrases would already look like a match.
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    if not words or len(words) < min_words:
+        return None
+    size = min(shingle_size, len(words))
+    shingles = Counter(" ".join(words[index:index + size]) for index in range(len(words) - size + 1))
+
+    # Sum the shingle weights per byte value of each byte position, then expand to bits:
+    # 8 dictionary updates per shingle instead of 64 bit tests.
+    byte_weights = [Counter() for _ in range(FINGERPRINT_BITS // 8)]
+    for shingle, weight in shingles.items():
+        digest = hashlib.blake2b(shingle.encode("utf-8"), digest_size=FINGERPRINT_BITS // 8).digest()
+        for position, value in enumerate(digest):
+            byte_weights[position][value] += weight
+
+    total = sum(shingles.values())
+    fingerprint = 0
+    for position, weights in enumerate(byte_weights):
+        for bit in range(8):
+            ones = sum(weight for value, weight in weights.items() if value >> bit & 1)
+            if 2 * ones > total:
+                fingerprint |= 1 << (position * 8 + bit)
+    return fingerprint
+
+def hamming_distance(first: int, second: int) -> int:
+    return (first ^ second).bit_count()
+
+def to_signed(fingerprint: int) -> int:
+    """
+    SQLite integers are signed 64-bit.
+    """
+    return fingerprint - (1 << FINGERPRINT_BITS) if fingerprint >= 1 << (FINGERPRINT_BITS - 1) else fingerprint
+
+def to_unsigned(fingerprint: int) -> int:
+    return fingerprint & ((1 << FINGERPRINT_BITS) - 1)
+
+class Match(NamedTuple):
+    ref: int
+    fingerprint: int
+    distance: int
+
+class SimHashIndex:
+    """
+    Finds fingerprints within max_distance bits of a query.
+
+    The 64 bits are split into max_distance + 1 bands; two fingerprints that differ in at
+    most max_distance bits agree exactly on at least one band. Each band keeps a sorted
+    array of (band value << 32 | slot), so candidates are a bisection per band, and an
+    entry costs 8 bytes per band plus its fingerprint and reference: 64 bytes at a
+    distance of 5, or about 19 MB for 300,000 entries. Removed entries leave their slot
+    empty until the empty slots outnumber the live ones, when the index is compacted.
+    """
+
+    def __init__(self, max_distance: int = 5):
+        if not 0 <= max_distance < 8:
+            raise ValueError("max_distance must be between 0 and 7.")
+        self.max_distance = max_distance
+        # At least two bands, so a band value shifted past the slot still fits in 64 bits.
+        self._bands = self._band_layout(max(max_distance + 1, 2))
+        self._tables: List[array] = [array("Q") for _ in self._bands]
+        self._fingerprints = array("Q")
+        self._refs = array("q")
+        self._removed = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._fingerprints) - self._removed
+
+    def add(self, fingerprint: int, ref: int) -> None:
+        """
+        Indexes a fingerprint under an integer reference, e.g. the row ID of its summary.
+        """
+        self.add_many([(fingerprint, ref)])
+
+    def add_many(self, entries: List[Tuple[int, int]]) -> None:
+        """
+        Indexes (fingerprint, ref) pairs. Large batches, such as loading the index at
+        startup, re-sort each band once instead of inserting entry by entry.
+        """
+        with self._lock:
+            first_slot = len(self._fingerprints)
+            if first_slot + len(entries) > SLOT_MASK:
+                raise OverflowError("The fingerprint index is full.")
+            for fingerprint, ref in entries:
+                self._fingerprints.append(fingerprint)
+                self._refs.append(ref)
+            for index, (table, band) in enumerate(zip(self._tables, self._bands)):
+                values = [
+                    self._band_value(fingerprint, band) << SLOT_BITS | slot
+                    for slot, (fingerprint, _) in enumerate(entries, first_slot)
+                ]
+                if len(values) > 16:
+                    self._tables[index] = array("Q", sorted(table + array("Q", values)))
+                else:
+                    for value in values:
+                        insort(table, value)
+
+    def remove(self, fingerprint: int, ref: int) -> bool:
+        """
+        Drops the entry indexed under ref with this fingerprint; returns whether there was one.
+        """
+        with self._lock:
+            slot = next(
+                (slot for slot in self._band_slots(self._tables[0], self._band_value(fingerprint, self._bands[0]))
+                 if self._refs[slot] == ref),
+                None,
+            )
+            if slot is None:
+                return False
+            for table, band in zip(self._tables, self._bands):
+                del table[bisect_left(table, self._band_value(fingerprint, band) << SLOT_BITS | slot)]
+            self._refs[slot] = REMOVED
+            self._removed += 1
+            if self._removed > max(len(self._fingerprints) - self._removed, 64):
+                self._compact()
+            return True
+
+    def search(self, fingerprint: int, limit: int = 8) -> List[Match]:
+        """
+        Up to limit indexed entries within max_distance, nearest first.
+        """
+        with self._lock:
+            slots = set()
+            for table, band in zip(self._tables, self._bands):
+                slots.update(self._band_slots(table, self._band_value(fingerprint, band)))
+            matches = []
+            for slot in slots:
+                distance = hamming_distance(fingerprint, self._fingerprints[slot])
+                if distance <= self.max_distance:
+                    matches.append(Match(self._refs[slot], self._fingerprints[slot], distance))
+        matches.sort(key=lambda match: match.distance)
+        return matches[:limit]
+
+    def _compact(self) -> None:
+        """
+        Rebuilds the arrays without the removed slots. Must be called with the lock held.
+        """
+        entries = [(fingerprint, ref) for fingerprint, ref in zip(self._fingerprints, self._refs) if ref != REMOVED]
+        self._fingerprints = array("Q", (fingerprint for fingerprint, _ in entries))
+        self._refs = array("q", (ref for _, ref in entries))
+        self._removed = 0
+        self._tables = [
+            array("Q", sorted(self._band_value(fingerprint, band) << SLOT_BITS | slot for slot, (fingerprint, _) in enumerate(entries)))
+            for band in self._bands
+        ]
+
+    @staticmethod
+    def _band_layout(count: int) -> List[Tuple[int, int]]:
+        """
+        (shift, width) of each band, spreading the 64 bits as evenly as possible.
+        """
+        bands, shift = [], 0
+        for index in range(count):
+            width = FINGERPRINT_BITS // count + (1 if index < FINGERPRINT_BITS % count else 0)
+            bands.append((shift, width))
+            shift += width
+        return bands
+
+    @staticmethod
+    def _band_value(fingerprint: int, band: Tuple[int, int]) -> int:
+        shift, width = band
+        return fingerprint >> shift & ((1 << width) - 1)
+
+    @staticmethod
+    def _band_slots(table: array, value: int) -> Iterator[int]:
+        index = bisect_left(table, value << SLOT_BITS)
+        while index < len(table) and table[index] >> SLOT_BITS == value:
+            yield table[index] & SLOT_MASK
+            index += 1
@@ -1,18 +1,145 @@
+import asyncio
+import hashlib
+import math
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import AsyncIterator, Dict, Iterator, List, NamedTuple, Optional, Tuple
 from dotenv import load_dotenv
+from groq import APIConnectionError, APITimeoutError
 from langchain.prompts import ChatPromptTemplate
 from langchain_groq import ChatGroq
 
+from app.utils.model_router import ModelRouter
+from app.utils.rate_limiter import RateLimiter, RateLimitExceededError
+
 # Load environment variables
 load_dotenv()
 
+MODEL_NAME = 'llama-3.1-70b-versatile'
+FAST_MODEL_NAME = 'llama-3.1-8b-instant'
+CHUNK_TOKENS = 6000
+CHUNK_OVERLAP_TOKENS = 100
+MAP_CONCURRENCY = 4
+MAX_MAP_ROUNDS = 3
+CHARS_PER_TOKEN = 4
+# Output tokens reserved per call in the tokens-per-minute budget
+COMPLETION_TOKENS = 1024
+# Transport errors the rate limiter may retry, besides retryable HTTP status codes
+RETRYABLE_EXCEPTIONS = (ConnectionError, TimeoutError, APIConnectionError)
+
+CHUNK_SUMMARY_INSTRUCTIONS = (
+    "Eres un asistente experto en análisis y resumen de contenido. "
+    "Recibirás un fragmento de la transcripción de un video de YouTube. "
+    "Resume en español, en texto plano y con viñetas breves, las ideas, hechos, pasos o emociones clave del fragmento. "
+    "No agregues introducciones ni conclusiones y no uses HTML."
+)
+
+VIDEO_ANALYSIS_INSTRUCTIONS = (
+    "Eres un asistente experto en análisis, resumen y diseño de contenido. "
+    "Tu tarea es analizar un texto transcrito de un video de YouTube, identificar el tipo de contenido y "
+    "proporcionar un resumen breve y claro en español, formateado en HTML estilizado con Tailwind CSS. "
+    "El resultado debe ser visualmente atractivo y responsivo.\n\n"
+
+    "### Tipos de contenido y directrices:\n"
+    "- **Musicales**: Describe el tema o género, menciona el artista y destaca emociones o mensajes clave.\n"
+    "- **Noticias**: Resume eventos clave y su impacto; usa listas para múltiples eventos relevantes.\n"
+    "- **Tutoriales**: Enumera los pasos principales y consejos clave.\n"
+    "- **Tecnología**: Destaca productos, innovaciones o conceptos clave y tendencias.\n"
+    "- **Educativos**: Resalta conceptos principales, aprendizajes y utilidad práctica.\n"
+    "- **Entretenimiento**: Identifica el tema central, personajes o eventos destacados.\n"
+    "- **Salud/Ciencia**: Resume puntos clave, hallazgos o consejos prácticos.\n\n"
+
+    "### Formato del HTML:\n"
+    "- Usa `<section>` como contenedor principal con las clases `flex flex-col gap-y-4`.\n"
+    "- Párrafos: Usa `<p>` con las clases `text-gray-500 text-sm md:text-md tracking-wide leading-tight font-normal`.\n"
+    "- Listas: Usa `<ul>` y `<li>` con las clases `list-disc text-gray-500 text-sm md:text-md tracking-wide leading-tight font-normal`.\n\n"
+
+    "### Ejemplo de salida:\n"
+    "<section class='flex flex-col gap-y-4'>"
+    "  <p class='text-gray-500 text-sm md:text-md tracking-wide leading-tight font-normal'>Resumen adaptado al tipo de contenido.</p>\n"
+    "  <ul class='list-disc text-gray-500 text-sm md:text-md tracking-wide leading-tight font-normal'>\n"
+    "    <li>Punto clave 1</li>\n"
+    "    <li>Punto clave 2</li>\n"
+    "  </ul>\n"
+    "</section>"
+
+    "Responde únicamente con el bloque de código HTML estilizado con Tailwind CSS, adaptado al tipo de video analizado."
+)
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate for Llama-family tokenizers (about four characters per token).
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def split_into_chunks(text: str, max_tokens: int = CHUNK_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> List[str]:
+    """
+    Splits text on word boundaries into chunks of at most max_tokens estimated tokens,
+    repeating the last overlap_tokens of each chunk at the start of the next one.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    overlap_chars = overlap_tokens * CHARS_PER_TOKEN
+    chunks, current, current_chars = [], [], 0
+    for word in text.split():
+        if current and current_chars + len(word) > max_chars:
+            chunks.append(" ".join(current))
+            overlap, overlap_size = [], 0
+            for previous in reversed(current):
+                overlap_size += len(previous) + 1
+                if overlap_size > overlap_chars:
+                    break
+                overlap.insert(0, previous)
+            current, current_chars = overlap, sum(len(w) + 1 for w in overlap)
+        current.append(word)
+        current_chars += len(word) + 1
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
 class LangchainError(Exception):
     pass
 
+class LangchainRateLimitError(LangchainError):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class ModelUsage(NamedTuple):
+    model: str
+    latency_seconds: float
+    fallback: bool
+
+class ModelClient(NamedTuple):
+    model: ChatGroq
+    rate_limiter: Optional[RateLimiter]
+
 class Langchain:
-    def __init__(self):
+    def __init__(self, model_name: str = MODEL_NAME, chunk_tokens: int = CHUNK_TOKENS, map_concurrency: int = MAP_CONCURRENCY,
+                 rate_limiter: Optional[RateLimiter] = None, completion_tokens: int = COMPLETION_TOKENS,
+                 router: Optional[ModelRouter] = None, fast_rate_limiter: Optional[RateLimiter] = None,
+                 latency_budget: Optional[float] = None):
+        self.model_name = model_name
+        self.chunk_tokens = chunk_tokens
+        self.completion_tokens = completion_tokens
+        # Retries are left to the rate limiter so it sees every 429.
+        self.rate_limiter = rate_limiter
+        self.router = router or ModelRouter(model_name)
+        self.latency_budget = latency_budget
         self.api_key = self._load_api_key()
-        self.model = self._initialize_model()
+        # One client per model. The latency budget is not a client timeout: each call gets the
+        # time left in its request's budget (see _bounded_model).
+        self.clients: Dict[str, ModelClient] = {}
+        self.clients[model_name] = ModelClient(self._initialize_model(model_name, rate_limiter), rate_limiter)
+        fast_model = self.router.fast_model
+        if fast_model and fast_model not in self.clients:
+            self.clients[fast_model] = ModelClient(self._initialize_model(fast_model, fast_rate_limiter), fast_rate_limiter)
+        self.model = self.clients[model_name].model
+        # Shared by every request so the total number of concurrent chunk calls stays bounded.
+        self._map_executor = ThreadPoolExecutor(max_workers=map_concurrency, thread_name_prefix="summary-map")
+        # Same bound for the async path; the semaphore binds to the event loop on first use.
+        self._amap_semaphore = asyncio.Semaphore(map_concurrency)
 
     @staticmethod
     def _load_api_key() -> str:
@@ -22,68 +149,446 @@ class Langchain:
             raise LangchainError("GROQ API key is not configured.")
         return api_key
 
-    def _initialize_model(self) -> ChatGroq:
-        """Initialize the ChatGroq model with the loaded API key."""
+    def _initialize_model(self, model_name: str, rate_limiter: Optional[RateLimiter] = None) -> ChatGroq:
+        """Initialize a ChatGroq model with the loaded API key."""
+        options = {}
+        if rate_limiter is not None:
+            options["max_retries"] = 0
         try:
-            return ChatGroq(model='llama-3.1-70b-versatile', api_key=self.api_key)
+            return ChatGroq(model=model_name, api_key=self.api_key, **options)
         except Exception as e:
             raise LangchainError(f"Error initializing ChatGroq model: {str(e)}") from e
 
-    def generate_summary(self, prompt_template: ChatPromptTemplate) -> str:
+    def generate_summary(self, prompt_template: ChatPromptTemplate, variables: Optional[Dict[str, str]] = None, model_name: Optional[str] = None) -> str:
         """
-        Generate a summary based on the input prompt template.
+        Generate a summary based on the input prompt template and its variables.
         """
         try:
-            chain = prompt_template | self.model
-            response = chain.invoke({})
-            summary = response.content if response else None
-            if not summary:
-                raise LangchainError("Failed to generate a summary for the transcription.")
+            summary, _ = self._complete(prompt_template, variables or {}, model_name or self.model_name, self._budget_deadline())
             return summary
+        except LangchainError:
+            raise
         except Exception as e:
             raise LangchainError(f"Error generating summary: {str(e)}") from e
 
+    def stream_summary(self, prompt_template: ChatPromptTemplate, variables: Optional[Dict[str, str]] = None,
+                       model_name: Optional[str] = None, usage: Optional[Dict] = None) -> Iterator[str]:
+        """
+        Stream the summary as it is generated, yielding text chunks from the model.
+        The model used and its latency are written into `usage` once the stream ends.
+        """
+        try:
+            yield from self._stream_complete(prompt_template, variables or {}, model_name or self.model_name, usage, self._budget_deadline())
+        except LangchainError:
+            raise
+        except Exception as e:
+            raise LangchainError(f"Error generating summary: {str(e)}") from e
+
+    async def agenerate_summary(self, prompt_template: ChatPromptTemplate, variables: Optional[Dict[str, str]] = None, model_name: Optional[str] = None) -> str:
+        """
+        Async variant of generate_summary, awaiting the model through the chain's async interface.
+        """
+        try:
+            summary, _ = await self._acomplete(prompt_template, variables or {}, model_name or self.model_name, self._budget_deadline())
+            return summary
+        except LangchainError:
+            raise
+        except Exception as e:
+            raise LangchainError(f"Error generating summary: {str(e)}") from e
+
+    async def astream_summary(self, prompt_template: ChatPromptTemplate, variables: Optional[Dict[str, str]] = None,
+                              model_name: Optional[str] = None, usage: Optional[Dict] = None) -> AsyncIterator[str]:
+        """
+        Async variant of stream_summary.
+        """
+        try:
+            async for chunk in self._astream_complete(prompt_template, variables or {}, model_name or self.model_name, usage,
+                                                      self._budget_deadline()):
+                yield chunk
+        except LangchainError:
+            raise
+        except Exception as e:
+            raise LangchainError(f"Error generating summary: {str(e)}") from e
+
+    def summarize_transcript(self, transcription: str) -> Tuple[str, ModelUsage]:
+        """
+        Summarize a transcript of any length and report the model used and the total LLM latency.
+        Transcripts that do not fit in one chunk are condensed with a parallel map stage before
+        the final HTML summary is generated; the final stage runs on the routed model. The
+        latency budget covers the whole request, map stage included.
+        """
+        started = time.monotonic()
+        deadline = self._budget_deadline(started)
+        model_name = self.router.select(transcription)
+        prompt = self.generate_prompt_template_video_analysis()
+        try:
+            variables = {"transcript": self._reduce_input(transcription, deadline)}
+            summary, usage = self._complete(prompt, variables, model_name, deadline)
+        except LangchainError:
+            raise
+        except Exception as e:
+            raise LangchainError(f"Error generating summary: {str(e)}") from e
+        return summary, usage._replace(latency_seconds=round(time.monotonic() - started, 3))
+
+    def stream_transcript_summary(self, transcription: str, usage: Optional[Dict] = None) -> Iterator[str]:
+        """
+        Streaming variant of summarize_transcript; only the final stage is streamed.
+        """
+        started = time.monotonic()
+        deadline = self._budget_deadline(started)
+        model_name = self.router.select(transcription)
+        prompt = self.generate_prompt_template_video_analysis()
+        try:
+            variables = {"transcript": self._reduce_input(transcription, deadline)}
+            yield from self._stream_complete(prompt, variables, model_name, usage, deadline)
+        except LangchainError:
+            raise
+        except Exception as e:
+            raise LangchainError(f"Error generating summary: {str(e)}") from e
+        if usage is not None:
+            usage["latency_seconds"] = round(time.monotonic() - started, 3)
+
+    async def asummarize_transcript(self, transcription: str) -> Tuple[str, ModelUsage]:
+        """
+        Async variant of summarize_transcript.
+        """
+        started = time.monotonic()
+        deadline = self._budget_deadline(started)
+        model_name = self.router.select(transcription)
+        prompt = self.generate_prompt_template_video_analysis()
+        try:
+            variables = {"transcript": await self._areduce_input(transcription, deadline)}
+            summary, usage = await self._acomplete(prompt, variables, model_name, deadline)
+        except LangchainError:
+            raise
+        except Exception as e:
+            raise LangchainError(f"Error generating summary: {str(e)}") from e
+        return summary, usage._replace(latency_seconds=round(time.monotonic() - started, 3))
+
+    async def astream_transcript_summary(self, transcription: str, usage: Optional[Dict] = None) -> AsyncIterator[str]:
+        """
+        Async variant of stream_transcript_summary.
+        """
+        started = time.monotonic()
+        deadline = self._budget_deadline(started)
+        model_name = self.router.select(transcription)
+        prompt = self.generate_prompt_template_video_analysis()
+        try:
+            variables = {"transcript": await self._areduce_input(transcription, deadline)}
+            async for chunk in self._astream_complete(prompt, variables, model_name, usage, deadline):
+                yield chunk
+        except LangchainError:
+            raise
+        except Exception as e:
+            raise LangchainError(f"Error generating summary: {str(e)}") from e
+        if usage is not None:
+            usage["latency_seconds"] = round(time.monotonic() - started, 3)
+
+    @classmethod
+    def count_prompt_tokens(cls, transcription: str) -> int:
+        """
+        Estimated input tokens of a single-pass analysis prompt for the given transcript.
+        """
+        return estimate_tokens(VIDEO_ANALYSIS_INSTRUCTIONS) + estimate_tokens(transcription)
+
+    def _reduce_input(self, text: str, deadline: Optional[float] = None) -> str:
+        """
+        Map stage: summarizes chunks concurrently until the combined partial summaries fit
+        in a single chunk, which then becomes the input of the final (reduce) prompt.
+        """
+        for _ in range(MAX_MAP_ROUNDS):
+            if estimate_tokens(text) <= self.chunk_tokens:
+                break
+            chunks = split_into_chunks(text, self.chunk_tokens)
+            partial_summaries = list(self._map_executor.map(lambda chunk: self._summarize_chunk(chunk, deadline), chunks))
+            text = "\n\n".join(
+                f"Parte {index} de {len(chunks)}:\n{partial}" for index, partial in enumerate(partial_summaries, start=1)
+            )
+        return text
+
+    async def _areduce_input(self, text: str, deadline: Optional[float] = None) -> str:
+        """
+        Async map stage; chunk calls run concurrently, bounded by the shared map semaphore.
+        """
+        for _ in range(MAX_MAP_ROUNDS):
+            if estimate_tokens(text) <= self.chunk_tokens:
+                break
+            chunks = split_into_chunks(text, self.chunk_tokens)
+            partial_summaries = await asyncio.gather(*(self._asummarize_chunk(chunk, deadline) for chunk in chunks))
+            text = "\n\n".join(
+                f"Parte {index} de {len(chunks)}:\n{partial}" for index, partial in enumerate(partial_summaries, start=1)
+            )
+        return text
+
+    async def _asummarize_chunk(self, chunk: str, deadline: Optional[float] = None) -> str:
+        async with self._amap_semaphore:
+            try:
+                prompt = self.generate_prompt_template_chunk_summary()
+                partial, _ = await self._acomplete(prompt, {"fragment": chunk}, self.model_name, deadline)
+                return partial
+            except LangchainError:
+                raise
+            except Exception as e:
+                raise LangchainError(f"Error summarizing transcript chunk: {str(e)}") from e
+
+    def _summarize_chunk(self, chunk: str, deadline: Optional[float] = None) -> str:
+        try:
+            partial, _ = self._complete(self.generate_prompt_template_chunk_summary(), {"fragment": chunk}, self.model_name, deadline)
+            return partial
+        except LangchainError:
+            raise
+        except Exception as e:
+            raise LangchainError(f"Error summarizing transcript chunk: {str(e)}") from e
+
+    def _complete(self, prompt_template: ChatPromptTemplate, variables: Dict[str, str], model_name: str,
+                  deadline: Optional[float] = None) -> Tuple[str, ModelUsage]:
+        """
+        Runs one completion on model_name, falling back to the router's fallback model when
+        the call runs past the request's deadline (its latency budget) or is rate limited.
+        """
+        started = time.monotonic()
+        fallback = self.router.fallback_for(model_name)
+        # Without a fallback there is nothing to move to, so the call is left to finish.
+        deadline = deadline if fallback else None
+        used = model_name
+        try:
+            content = self._complete_with(model_name, prompt_template, variables, deadline)
+        except Exception as e:
+            if fallback is None or not self._should_fall_back(e, deadline):
+                raise
+            used = fallback
+            content = self._complete_with(fallback, prompt_template, variables)
+        return content, ModelUsage(used, round(time.monotonic() - started, 3), used != model_name)
+
+    async def _acomplete(self, prompt_template: ChatPromptTemplate, variables: Dict[str, str], model_name: str,
+                         deadline: Optional[float] = None) -> Tuple[str, ModelUsage]:
+        started = time.monotonic()
+        fallback = self.router.fallback_for(model_name)
+        deadline = deadline if fallback else None
+        used = model_name
+        try:
+            content = await self._acomplete_with(model_name, prompt_template, variables, deadline)
+        except Exception as e:
+            if fallback is None or not self._should_fall_back(e, deadline):
+                raise
+            used = fallback
+            content = await self._acomplete_with(fallback, prompt_template, variables)
+        return content, ModelUsage(used, round(time.monotonic() - started, 3), used != model_name)
+
+    def _complete_with(self, model_name: str, prompt_template: ChatPromptTemplate, variables: Dict[str, str], deadline: Optional[float] = None) -> str:
+        client = self.clients[model_name]
+        # The chain is built per attempt so each one gets the time left before the deadline.
+        invoke = lambda: (prompt_template | self._bounded_model(client, deadline)).invoke(variables)
+        if client.rate_limiter is None:
+            response = invoke()
+        else:
+            tokens = self._estimate_call_tokens(prompt_template, variables)
+            try:
+                response = client.rate_limiter.call(invoke, tokens, deadline)
+            except RateLimitExceededError as e:
+                raise LangchainRateLimitError(str(e), e.retry_after) from e
+        content = response.content if response else None
+        if not content:
+            raise LangchainError(f"The model {model_name} returned an empty response.")
+        return content
+
+    async def _acomplete_with(self, model_name: str, prompt_template: ChatPromptTemplate, variables: Dict[str, str], deadline: Optional[float] = None) -> str:
+        client = self.clients[model_name]
+        ainvoke = lambda: (prompt_template | self._bounded_model(client, deadline)).ainvoke(variables)
+        if client.rate_limiter is None:
+            response = await ainvoke()
+        else:
+            tokens = self._estimate_call_tokens(prompt_template, variables)
+            try:
+                response = await client.rate_limiter.acall(ainvoke, tokens, deadline)
+            except RateLimitExceededError as e:
+                raise LangchainRateLimitError(str(e), e.retry_after) from e
+        content = response.content if response else None
+        if not content:
+            raise LangchainError(f"The model {model_name} returned an empty response.")
+        return content
+
+    def _stream_complete(self, prompt_template: ChatPromptTemplate, variables: Dict[str, str], model_name: str,
+                         usage: Optional[Dict] = None, deadline: Optional[float] = None) -> Iterator[str]:
+        """
+        Streaming variant of _complete; the fallback model is used only if nothing was streamed yet.
+        """
+        started = time.monotonic()
+        fallback = self.router.fallback_for(model_name)
+        deadline = deadline if fallback else None
+        used, produced = model_name, False
+        try:
+            for text in self._stream_with(model_name, prompt_template, variables, deadline):
+                produced = True
+                yield text
+        except Exception as e:
+            if produced or fallback is None or not self._should_fall_back(e, deadline):
+                raise
+            used = fallback
+            for text in self._stream_with(fallback, prompt_template, variables):
+                produced = True
+                yield text
+        if not produced:
+            raise LangchainError("Failed to generate a summary for the transcription.")
+        if usage is not None:
+            usage.update(ModelUsage(used, round(time.monotonic() - started, 3), used != model_name)._asdict())
+
+    async def _astream_complete(self, prompt_template: ChatPromptTemplate, variables: Dict[str, str], model_name: str,
+                                usage: Optional[Dict] = None, deadline: Optional[float] = None) -> AsyncIterator[str]:
+        started = time.monotonic()
+        fallback = self.router.fallback_for(model_name)
+        deadline = deadline if fallback else None
+        used, produced = model_name, False
+        try:
+            async for text in self._astream_with(model_name, prompt_template, variables, deadline):
+                produced = True
+                yield text
+        except Exception as e:
+            if produced or fallback is None or not self._should_fall_back(e, deadline):
+                raise
+            used = fallback
+            async for text in self._astream_with(fallback, prompt_template, variables):
+                produced = True
+                yield text
+        if not produced:
+            raise LangchainError("Failed to generate a summary for the transcription.")
+        if usage is not None:
+            usage.update(ModelUsage(used, round(time.monotonic() - started, 3), used != model_name)._asdict())
+
+    def _stream_with(self, model_name: str, prompt_template: ChatPromptTemplate, variables: Dict[str, str],
+                     deadline: Optional[float] = None) -> Iterator[str]:
+        """
+        Streams text chunks through the model's rate limiter; a failure is retried only before the first chunk.
+        """
+        client = self.clients[model_name]
+        if client.rate_limiter is None:
+            for chunk in (prompt_template | self._bounded_model(client, deadline)).stream(variables):
+                if chunk.content:
+                    yield chunk.content
+            return
+        tokens = self._estimate_call_tokens(prompt_template, variables)
+        attempt = 0
+        while True:
+            produced = False
+            try:
+                with client.rate_limiter.slot(tokens, deadline):
+                    for chunk in (prompt_template | self._bounded_model(client, deadline)).stream(variables):
+                        if chunk.content:
+                            produced = True
+                            yield chunk.content
+                return
+            except RateLimitExceededError as e:
+                raise LangchainRateLimitError(str(e), e.retry_after) from e
+            except Exception as e:
+                delay = None if produced else self._retry_delay(client.rate_limiter, e, attempt, deadline)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+            attempt += 1
+
+    async def _astream_with(self, model_name: str, prompt_template: ChatPromptTemplate, variables: Dict[str, str],
+                            deadline: Optional[float] = None) -> AsyncIterator[str]:
+        client = self.clients[model_name]
+        if client.rate_limiter is None:
+            async for chunk in (prompt_template | self._bounded_model(client, deadline)).astream(variables):
+                if chunk.content:
+                    yield chunk.content
+            return
+        tokens = self._estimate_call_tokens(prompt_template, variables)
+        attempt = 0
+        while True:
+            produced = False
+            try:
+                async with client.rate_limiter.aslot(tokens, deadline):
+                    async for chunk in (prompt_template | self._bounded_model(client, deadline)).astream(variables):
+                        if chunk.content:
+                            produced = True
+                            yield chunk.content
+                return
+            except RateLimitExceededError as e:
+                raise LangchainRateLimitError(str(e), e.retry_after) from e
+            except Exception as e:
+                delay = None if produced else self._retry_delay(client.rate_limiter, e, attempt, deadline)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _budget_deadline(self, started: Optional[float] = None) -> Optional[float]:
+        """
+        Deadline (a time.monotonic() value) of a request that started at `started`, or None without a latency budget.
+        """
+        if not self.latency_budget:
+            return None
+        return (time.monotonic() if started is None else started) + self.latency_budget
+
     @staticmethod
-    def generate_prompt_template_video_analysis(text_to_be_analyzed: str) -> ChatPromptTemplate:
+    def _bounded_model(client: ModelClient, deadline: Optional[float]):
         """
-        Generate a prompt template to analyze a video and return a summary in formatted HTML with Tailwind CSS styles.
-        The prompt dynamically adapts to different types of video content such as music, news, tutorials, and more.
+        The client's model, with the time left before the deadline as the timeout of its next request.
         """
-        prompt_text = (
-            "Eres un asistente experto en análisis, resumen y diseño de contenido. "
-            "Tu tarea es analizar un texto transcrito de un video de YouTube, identificar el tipo de contenido y "
-            "proporcionar un resumen breve y claro en español, formateado en HTML estilizado con Tailwind CSS. "
-            "El resultado debe ser visualmente atractivo y responsivo.\n\n"
-
-            "### Tipos de contenido y directrices:\n"
-            "- **Musicales**: Describe el tema o género, menciona el artista y destaca emociones o mensajes clave.\n"
-            "- **Noticias**: Resume eventos clave y su impacto; usa listas para múltiples eventos relevantes.\n"
-            "- **Tutoriales**: Enumera los pasos principales y consejos clave.\n"
-            "- **Tecnología**: Destaca productos, innovaciones o conceptos clave y tendencias.\n"
-            "- **Educativos**: Resalta conceptos principales, aprendizajes y utilidad práctica.\n"
-            "- **Entretenimiento**: Identifica el tema central, personajes o eventos destacados.\n"
-            "- **Salud/Ciencia**: Resume puntos clave, hallazgos o consejos prácticos.\n\n"
-
-            "### Formato del HTML:\n"
-            "- Usa `<section>` como contenedor principal con las clases `flex flex-col gap-y-4`.\n"
-            "- Párrafos: Usa `<p>` con las clases `text-gray-500 text-sm md:text-md tracking-wide leading-tight font-normal`.\n"
-            "- Listas: Usa `<ul>` y `<li>` con las clases `list-disc text-gray-500 text-sm md:text-md tracking-wide leading-tight font-normal`.\n\n"
-
-            "### Ejemplo de salida:\n"
-            "<section class='flex flex-col gap-y-4'>"
-            "  <p class='text-gray-500 text-sm md:text-md tracking-wide leading-tight font-normal'>Resumen adaptado al tipo de contenido.</p>\n"
-            "  <ul class='list-disc text-gray-500 text-sm md:text-md tracking-wide leading-tight font-normal'>\n"
-            "    <li>Punto clave 1</li>\n"
-            "    <li>Punto clave 2</li>\n"
-            "  </ul>\n"
-            "</section>"
-
-            "Responde únicamente con el bloque de código HTML estilizado con Tailwind CSS, adaptado al tipo de video analizado.\n\n"
-            f"{text_to_be_analyzed}"
-        )
+        if deadline is None:
+            return client.model
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("The latency budget ran out before the call started.")
+        return client.model.bind(timeout=remaining)
+
+    @staticmethod
+    def _retry_delay(rate_limiter: RateLimiter, ex: Exception, attempt: int, deadline: Optional[float]) -> Optional[float]:
+        try:
+            return rate_limiter.retry_delay(ex, attempt, deadline)
+        except RateLimitExceededError as e:
+            raise LangchainRateLimitError(str(e), e.retry_after) from e
+
+    @staticmethod
+    def _should_fall_back(ex: Exception, deadline: Optional[float]) -> bool:
+        """
+        Rate limits, timeouts and any failure past the latency budget move the call to the fallback model.
+        """
+        if isinstance(ex, (LangchainRateLimitError, TimeoutError, APITimeoutError)):
+            return True
+        return deadline is not None and time.monotonic() >= deadline
+
+    def _estimate_call_tokens(self, prompt_template: ChatPromptTemplate, variables: Dict[str, str]) -> int:
+        """
+        Estimated prompt tokens plus the completion reservation, charged to the tokens-per-minute budget.
+        """
+        prompt_tokens = sum(estimate_tokens(message.prompt.template) for message in prompt_template.messages)
+        prompt_tokens += sum(estimate_tokens(value) for value in variables.values())
+        return prompt_tokens + self.completion_tokens
 
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def generate_prompt_template_chunk_summary() -> ChatPromptTemplate:
+        """
+        Prompt for the map stage; the transcript fragment is passed as the `fragment` variable.
+        """
         return ChatPromptTemplate.from_messages([
-            ('system', prompt_text),
-            ('user', text_to_be_analyzed)
+            ('system', CHUNK_SUMMARY_INSTRUCTIONS),
+            ('user', '{fragment}')
         ])
 
+    @classmethod
+    def prompt_version(cls) -> str:
+        """
+        Short hash of the summarization prompts, used to version stored summaries.
+        """
+        prompts = [cls.generate_prompt_template_video_analysis(), cls.generate_prompt_template_chunk_summary()]
+        prompt_text = "\n".join(
+            f"{type(message).__name__}:{message.prompt.template}" for prompt in prompts for message in prompt.messages
+        )
+        return hashlib.sha256(prompt_text.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def generate_prompt_template_video_analysis() -> ChatPromptTemplate:
+        """
+        Generate a prompt template to analyze a video and return a summary in formatted HTML with Tailwind CSS styles.
+        The prompt dynamically adapts to different types of video content such as music, news, tutorials, and more.
+        The template is built once; the transcript is sent only once, as the `transcript` variable of the user message.
+        """
+        return ChatPromptTemplate.from_messages([
+            ('system', VIDEO_ANALYSIS_INSTRUCTIONS),
+            ('user', '{transcript}')
+        ])
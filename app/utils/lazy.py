@@ -0,0 +1,78 @@
+import threading
+import time
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+class ServiceUnavailableException(Exception):
+    pass
+
+class LazyService(Generic[T]):
+    """
+    Builds a service on first use, exactly once, even when several threads ask for it at
+    the same time. A failed build is not kept: the error is remembered for /ready and the
+    build is tried again on a later call, at most once every retry_interval seconds.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], T], retry_interval: float = 5.0):
+        self.name = name
+        self.factory = factory
+        self.retry_interval = retry_interval
+        self.init_seconds: Optional[float] = None
+        self._instance: Optional[T] = None
+        self._error: Optional[BaseException] = None
+        self._failed_at = 0.0
+        self._lock = threading.Lock()
+        self._starting = False
+
+    def get(self) -> T:
+        """
+        Returns the service, building it if needed; raises ServiceUnavailableException if it cannot be built.
+        """
+        instance = self._instance
+        if instance is not None:
+            return instance
+        with self._lock:
+            if self._instance is None:
+                if self._error is not None and time.monotonic() - self._failed_at < self.retry_interval:
+                    raise self._unavailable()
+                started = time.monotonic()
+                try:
+                    self._instance = self.factory()
+                except Exception as ex:
+                    self._error, self._failed_at = ex, time.monotonic()
+                    raise self._unavailable() from ex
+                self._error = None
+                self.init_seconds = time.monotonic() - started
+            return self._instance
+
+    def start(self) -> None:
+        """
+        Builds the service on a background thread unless it is built or already being built.
+        """
+        with self._lock:
+            if self._instance is not None or self._starting:
+                return
+            self._starting = True
+        threading.Thread(target=self._build_in_background, name=f"{self.name}-init", daemon=True).start()
+
+    @property
+    def ready(self) -> bool:
+        return self._instance is not None
+
+    @property
+    def error(self) -> Optional[BaseException]:
+        return self._error
+
+    def _build_in_background(self) -> None:
+        try:
+            self.get()
+        except ServiceUnavailableException:
+            # Kept in self.error for /ready
+            pass
+        finally:
+            with self._lock:
+                self._starting = False
+
+    def _unavailable(self) -> ServiceUnavailableException:
+        return ServiceUnavailableException(f"The {self.name} service is not available: {self._error}")
@@ -1,37 +1,213 @@
+import atexit
+import contextvars
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import threading
+import time
 import traceback
+from typing import Dict, Optional, Tuple
 
-class Logger:
-    def __init__(self, log_directory='app/logs', log_filename='app.log'):
-        self.logger = self.__set_logger(log_directory, log_filename)
+from app.config.config import Config
+from app.utils.metrics import LOG_RECORDS_DROPPED, TRACEBACKS_SUPPRESSED
+
+# Fields of the current request (request ID, video ID...) added to every record logged for it
+_log_context: contextvars.ContextVar[Optional[Dict]] = contextvars.ContextVar("log_context", default=None)
+
+# Attributes of a LogRecord that are not user-supplied fields
+RESERVED_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "fields"}
+
+def start_log_context(**fields) -> contextvars.Token:
+    """
+    Starts the log context of a request; work run in a copy of this context shares it.
+    """
+    return _log_context.set(dict(fields))
+
+def update_log_context(**fields) -> None:
+    """
+    Adds fields to the current request's log context, e.g. the video ID once it is known.
+    """
+    context = _log_context.get()
+    if context is not None:
+        context.update(fields)
+
+def stop_log_context(token: contextvars.Token) -> None:
+    try:
+        _log_context.reset(token)
+    except (ValueError, RuntimeError):
+        # Token from another context, as in stop_request_timings
+        _log_context.set(None)
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: time, level, logger, message, context fields and traceback.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update({key: value for key, value in (getattr(record, "fields", None) or {}).items() if value is not None})
+        entry.update({key: value for key, value in vars(record).items() if key not in RESERVED_ATTRIBUTES})
+        if record.exc_info:
+            entry["traceback"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["traceback"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the listener thread. The caller only snapshots the log context; message
+    and traceback formatting happen on the listener. When the queue is full the record is
+    dropped and counted instead of blocking the request.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        context = _log_context.get()
+        if context:
+            record.fields = {**context, **(getattr(record, "fields", None) or {})}
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+class TracebackSampler:
+    """
+    Lets one traceback per error site (exception type and raising line) through every
+    interval seconds; repeats in between are logged without it and counted.
+    """
+
+    def __init__(self, interval: float = 60.0, max_sites: int = 1024):
+        self.interval = interval
+        self.max_sites = max_sites
+        self._last_logged: Dict[Tuple, float] = {}
+        self._suppressed: Dict[Tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, exception: BaseException) -> Tuple[bool, int]:
+        """
+        Returns whether to log this exception's traceback and how many were suppressed since the last one.
+        """
+        key = self._site(exception)
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_logged.get(key)
+            if last is not None and now - last < self.interval:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                TRACEBACKS_SUPPRESSED.inc()
+                return False, 0
+            if len(self._last_logged) >= self.max_sites and key not in self._last_logged:
+                self._last_logged.clear()
+                self._suppressed.clear()
+            self._last_logged[key] = now
+            return True, self._suppressed.pop(key, 0)
+
+    @staticmethod
+    def _site(exception: BaseException) -> Tuple:
+        tb = exception.__traceback__
+        while tb is not None and tb.tb_next is not None:
+            tb = tb.tb_next
+        if tb is None:
+            return (type(exception).__name__,)
+        return (type(exception).__name__, tb.tb_frame.f_code.co_filename, tb.tb_lineno)
+
+_setup_lock = threading.Lock()
+_listener: Optional[logging.handlers.QueueListener] = None
+_log_target: Optional[Tuple[str, str]] = None
+_sampler = TracebackSampler(Config.LOG_TRACEBACK_INTERVAL)
+
+def _configure(log_directory: str, log_filename: str) -> logging.Logger:
+    """
+    Attaches the queue handler and starts the listener once per process; later calls reuse them.
+    """
+    global _listener, _log_target
+    logger = logging.getLogger(__name__)
+    with _setup_lock:
+        if _listener is not None:
+            return logger
+        _log_target = (log_directory, log_filename)
 
-    def __set_logger(self, log_directory, log_filename):
         os.makedirs(log_directory, exist_ok=True)
+        log_path = os.path.join(log_directory, log_filename)
+        if Config.LOG_ROTATE_WHEN:
+            file_handler = logging.handlers.TimedRotatingFileHandler(
+                log_path, when=Config.LOG_ROTATE_WHEN, backupCount=Config.LOG_BACKUP_COUNT, encoding='utf-8'
+            )
+        else:
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_path, maxBytes=Config.LOG_MAX_BYTES, backupCount=Config.LOG_BACKUP_COUNT, encoding='utf-8'
+            )
+        if Config.LOG_FORMAT == "json":
+            file_handler.setFormatter(JsonFormatter())
+        else:
+            file_handler.setFormatter(logging.Formatter('%(asctime)s | %(levelname)s | %(message)s', "%Y-%m-%d %H:%M:%S"))
 
-        logger = logging.getLogger(__name__)
+        log_queue = queue.Queue(maxsize=Config.LOG_QUEUE_SIZE)
         logger.setLevel(logging.DEBUG)
+        logger.propagate = False
+        logger.addHandler(NonBlockingQueueHandler(log_queue))
+        _listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_stop_listener)
+    return logger
 
-        log_path = os.path.join(log_directory, log_filename)
-        file_handler = logging.FileHandler(log_path, encoding='utf-8')
-        file_handler.setLevel(logging.DEBUG)
+def _stop_listener() -> None:
+    """
+    Flushes what is still queued; safe to call more than once.
+    """
+    global _listener
+    with _setup_lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
 
-        formatter = logging.Formatter('%(asctime)s | %(levelname)s | %(message)s', "%Y-%m-%d %H:%M:%S")
-        file_handler.setFormatter(formatter)
+def _restart_after_fork() -> None:
+    """
+    A forked child (gunicorn --preload) inherits the queue handler but not the listener
+    thread, so its records would never be written: rebuild both in the child.
+    """
+    global _setup_lock, _listener
+    _setup_lock = threading.Lock()
+    if _listener is None:
+        return
+    _listener = None
+    logger = logging.getLogger(__name__)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    _configure(*_log_target)
 
-        if logger.hasHandlers():
-            logger.handlers.clear()
+os.register_at_fork(after_in_child=_restart_after_fork)
 
-        logger.addHandler(file_handler)
-        return logger
+class Logger:
+    def __init__(self, log_directory=Config.LOG_DIRECTORY, log_filename='app.log'):
+        self.logger = _configure(log_directory, log_filename)
 
-    def add_to_log(self, level: str, message: str):
+    def add_to_log(self, level: str, message: str, **fields):
         try:
             log_method = getattr(self.logger, level, None)
             if log_method:
-                log_method(message)
+                log_method(message, extra={"fields": fields})
             else:
                 self.logger.error(f"Invalid log level: {level}")
         except Exception as ex:
             self.logger.error(f"Error while logging message: {message} - Exception: {str(ex)}")
-            print(traceback.format_exc())
+            traceback.print_exc()
+
+    def log_exception(self, message: str, exception: BaseException, **fields):
+        """
+        Logs an error with its traceback, sampled per error site so a storm of identical
+        failures writes one traceback per interval instead of one per request.
+        """
+        with_traceback, suppressed = _sampler.allow(exception)
+        if suppressed:
+            fields["tracebacks_suppressed"] = suppressed
+        exc_info = (type(exception), exception, exception.__traceback__) if with_traceback else None
+        self.logger.error(f"{message}: {exception}", exc_info=exc_info, extra={"fields": fields})
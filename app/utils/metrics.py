@@ -0,0 +1,245 @@
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds, from a cached lookup to a long LLM call or transcode
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+SIZE_BUCKETS = (100, 300, 1000, 3000, 10000, 30000, 100000, 300000, 1000000)
+
+LabelValues = Tuple[str, ...]
+
+class Metric:
+    """
+    Base class for metrics rendered in the Prometheus text exposition format.
+    """
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Optional["Registry"] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _format_labels(self, values: LabelValues, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        pairs = list(zip(self.labelnames, values)) + list(extra)
+        if not pairs:
+            return ""
+        escaped = (f'{name}="{_escape(value)}"' for name, value in pairs)
+        return "{" + ",".join(escaped) + "}"
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        return "\n".join(lines + self.samples())
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{self._format_labels(key)} {_number(value)}" for key, value in sorted(values.items())]
+
+class Gauge(Metric):
+    """
+    Gauge set directly, or read at scrape time from a function returning a number or a
+    dict of label-value tuples to numbers.
+    """
+    type = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+        self._function: Optional[Callable] = None
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable) -> None:
+        self._function = function
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        if self._function is not None:
+            try:
+                result = self._function()
+            except Exception:
+                # A failing collector must not break the whole scrape.
+                result = {}
+            values.update(result if isinstance(result, dict) else {(): result})
+        return [f"{self.name}{self._format_labels(key)} {_number(value)}" for key, value in sorted(values.items())]
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DURATION_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            counts = {key: list(value) for key, value in self._counts.items()}
+            sums = dict(self._sums)
+        lines = []
+        for key in sorted(counts):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts[key]):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else _number(bound)
+                lines.append(f"{self.name}_bucket{self._format_labels(key, (('le', le),))} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {_number(sums[key])}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {cumulative}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered.")
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Pipeline metrics
+STAGE_SECONDS = Histogram("youreview_stage_duration_seconds", "Duration of each pipeline stage.", ("stage",))
+STAGE_ERRORS = Counter("youreview_stage_errors_total", "Pipeline stages that raised an error.", ("stage",))
+CACHE_REQUESTS = Counter("youreview_cache_requests_total", "Cache lookups by cache and result (hit or miss).", ("cache", "result"))
+REQUESTS = Counter("youreview_http_requests_total", "HTTP requests by endpoint and status code.", ("endpoint", "status"))
+REQUEST_SECONDS = Histogram("youreview_http_request_duration_seconds", "Time until the response starts, by endpoint.", ("endpoint",))
+IN_FLIGHT = Gauge("youreview_http_requests_in_flight", "HTTP requests being served, by endpoint.", ("endpoint",))
+TRANSCRIPT_CHARACTERS = Histogram("youreview_transcript_characters", "Transcript size in characters.", buckets=SIZE_BUCKETS)
+PROMPT_TOKENS = Histogram("youreview_prompt_tokens", "Estimated prompt tokens before and after compression.", ("phase",), buckets=SIZE_BUCKETS)
+
+# Per-request stage timings, for the Server-Timing header
+_request_timings: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar("request_timings", default=None)
+
+def start_request_timings() -> contextvars.Token:
+    return _request_timings.set([])
+
+def stop_request_timings(token: contextvars.Token) -> None:
+    try:
+        _request_timings.reset(token)
+    except (ValueError, RuntimeError):
+        # Token from another context: Flask >= 3.1 tears down streamed responses in a copy.
+        _request_timings.set(None)
+
+def record_stage(name: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, stage=name)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Times a pipeline stage into the stage histogram and the current request's timings.
+    Work handed to other threads must run in a copy of the caller's context to be attributed.
+    """
+    started = time.monotonic()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=name)
+        raise
+    finally:
+        record_stage(name, time.monotonic() - started)
+
+def count_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+def request_stage_durations() -> Optional[Dict[str, float]]:
+    """
+    Seconds per stage recorded so far in this request (repeated stages are summed).
+    """
+    timings = _request_timings.get()
+    if timings is None:
+        return None
+    durations: Dict[str, float] = {}
+    for name, seconds in list(timings):
+        durations[name] = durations.get(name, 0.0) + seconds
+    return durations
+
+def server_timing_header(total_seconds: Optional[float] = None) -> Optional[str]:
+    """
+    Server-Timing value for the stages recorded so far in this request.
+    """
+    durations = request_stage_durations()
+    if durations is None:
+        return None
+    if total_seconds is not None:
+        durations["total"] = total_seconds
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in durations.items()) or None
+
+# Service state, read at scrape time (see VideoService)
+JOB_QUEUE_DEPTH = Gauge("youreview_job_queue_depth", "Summary jobs queued or running.")
+TRANSCODES = Gauge("youreview_transcodes", "FFmpeg transcodes by state (running or waiting).", ("state",))
+LLM_IN_FLIGHT = Gauge("youreview_llm_calls_in_flight", "LLM calls in flight, by model.", ("model",))
+LLM_CONCURRENCY_LIMIT = Gauge("youreview_llm_concurrency_limit", "Current adaptive concurrency limit, by model.", ("model",))
+ADMISSION_QUEUE_DEPTH = Gauge("youreview_admission_queue_depth", "Requests waiting for admission, by endpoint.", ("endpoint",))
+ADMISSION_RUNNING = Gauge("youreview_admission_running", "Admitted requests in progress, by endpoint.", ("endpoint",))
+NEAR_DUPLICATE_INDEX_ENTRIES = Gauge("youreview_near_duplicate_index_entries", "Transcript fingerprints in the near-duplicate index.")
+ADMISSION_SHED = Counter("youreview_admission_shed_total", "Requests shed by admission control, by endpoint and reason.", ("endpoint", "reason"))
+TRANSCODE_WAIT_SECONDS = Histogram("youreview_transcode_wait_seconds", "Time spent queued for an FFmpeg transcode slot, by outcome (acquired or timeout).", ("outcome",))
+TRANSCODES_REJECTED = Counter("youreview_transcodes_rejected_total", "Transcodes rejected because the queue was full or the wait timed out.", ("reason",))
+
+# Logging
+LOG_RECORDS_DROPPED = Counter("youreview_log_records_dropped_total", "Log records dropped because the log queue was full.")
+TRACEBACKS_SUPPRESSED = Counter("youreview_log_tracebacks_suppressed_total", "Error tracebacks not written because the same error site logged one recently.")
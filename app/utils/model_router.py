@@ -0,0 +1,49 @@
+import re
+from typing import Optional
+
+# Words this long, or containing digits, are typical of technical or information-dense speech
+LONG_WORD_CHARS = 9
+DIGIT_PATTERN = re.compile(r"\d")
+
+class ModelRouter:
+    """
+    Chooses the model for a transcript: the fast model for short, plain transcripts and
+    the primary model for long or dense ones. Without a fast model everything goes to
+    the primary model.
+    """
+
+    def __init__(self, primary_model: str, fast_model: Optional[str] = None,
+                 short_transcript_tokens: int = 1500, dense_word_ratio: float = 0.25, chars_per_token: int = 4):
+        self.primary_model = primary_model
+        self.fast_model = fast_model
+        self.short_transcript_tokens = short_transcript_tokens
+        self.dense_word_ratio = dense_word_ratio
+        self.chars_per_token = chars_per_token
+
+    def select(self, transcript: str) -> str:
+        if not self.fast_model:
+            return self.primary_model
+        if len(transcript) > self.short_transcript_tokens * self.chars_per_token:
+            return self.primary_model
+        if self.density(transcript) >= self.dense_word_ratio:
+            return self.primary_model
+        return self.fast_model
+
+    def fallback_for(self, model_name: str) -> Optional[str]:
+        """
+        Model to retry on when model_name is too slow or rate limited, if any.
+        """
+        if self.fast_model and model_name != self.fast_model:
+            return self.fast_model
+        return None
+
+    @staticmethod
+    def density(text: str) -> float:
+        """
+        Share of long or numeric words in the text.
+        """
+        words = text.split()
+        if not words:
+            return 0.0
+        dense = sum(1 for word in words if len(word) >= LONG_WORD_CHARS or DIGIT_PATTERN.search(word))
+        return dense / len(words)
@@ -0,0 +1,30 @@
+import importlib
+import time
+from typing import Dict
+
+# Heavy modules the video service needs; importing them is most of a cold worker's startup
+PRELOAD_MODULES = (
+    "yt_dlp",
+    "langchain_groq",
+    "langchain.prompts",
+    "app.services.video_service",
+)
+
+def preload_modules() -> Dict[str, float]:
+    """
+    Imports the heavy dependencies, and yt-dlp's extractor classes, which YoutubeDL would
+    otherwise load on its first use. Meant for the gunicorn master with preload_app: the
+    imported code is then shared copy-on-write by every forked worker. Nothing that starts
+    threads is built here, since threads do not survive the fork. Returns seconds per module.
+    """
+    timings = {}
+    for name in PRELOAD_MODULES:
+        started = time.perf_counter()
+        importlib.import_module(name)
+        timings[name] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    from yt_dlp.extractor import gen_extractor_classes
+    gen_extractor_classes()
+    timings["yt_dlp.extractor"] = time.perf_counter() - started
+    return timings
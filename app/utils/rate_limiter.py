@@ -0,0 +1,385 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterator, Optional, Tuple
+
+# Status codes worth retrying: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+class RateLimitExceededError(Exception):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class TokenBucket:
+    """
+    Refills at per_minute units per minute up to capacity. Reservations may drive the
+    level negative, so callers queue in arrival order and each one sleeps for its share.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self._level = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """
+        Takes amount from the bucket and returns how long the caller must wait before using it.
+        Amounts above the capacity are clamped so a single huge request cannot block forever.
+        """
+        with self._lock:
+            self._refill()
+            self._level -= min(amount, self.capacity)
+            return max(0.0, -self._level / self.rate)
+
+    def refund(self, amount: float) -> None:
+        with self._lock:
+            self._level = min(self.capacity, self._level + min(amount, self.capacity))
+
+    def pause(self, seconds: float) -> None:
+        """
+        Empties the bucket so nothing is admitted for the next seconds (server retry-after).
+        """
+        with self._lock:
+            self._refill()
+            self._level = min(self._level, -seconds * self.rate)
+
+    def level(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._level
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+class AIMDConcurrencyLimiter:
+    """
+    Concurrency limit that grows by `increase` per limit's worth of successful calls and is
+    multiplied by `decrease` when a call is throttled, at most once per decrease_interval
+    so one burst of 429s counts as a single congestion signal. Slots given back with
+    discard() (failed admissions, errors other than throttling) leave the limit unchanged.
+    """
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: int = 64,
+                 increase: float = 1.0, decrease: float = 0.5, decrease_interval: float = 1.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.decrease_interval = decrease_interval
+        self._limit = float(min(max(initial, minimum), maximum))
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+        # Async callers wait on a future of their own loop, resolved when a slot frees up
+        self._async_waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._in_flight < int(self._limit), timeout):
+                return False
+            self._in_flight += 1
+            return True
+
+    async def aacquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Async variant of acquire; waits on the event loop until release() or discard()
+        signals a free slot.
+        """
+        loop = asyncio.get_running_loop()
+        give_up_at = None if timeout is None else time.monotonic() + timeout
+        acquired = False
+        try:
+            while True:
+                with self._condition:
+                    if self._in_flight < int(self._limit):
+                        self._in_flight += 1
+                        acquired = True
+                        return True
+                    remaining = None if give_up_at is None else give_up_at - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    waiter = (loop, loop.create_future())
+                    self._async_waiters.append(waiter)
+                try:
+                    await asyncio.wait((waiter[1],), timeout=remaining)
+                finally:
+                    waiter[1].cancel()
+                    with self._condition:
+                        if waiter in self._async_waiters:
+                            self._async_waiters.remove(waiter)
+        finally:
+            if not acquired:
+                with self._condition:
+                    # This waiter may have been woken for a free slot; pass it on.
+                    self._wake()
+
+    def try_acquire(self) -> bool:
+        with self._condition:
+            if self._in_flight >= int(self._limit):
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self, throttled: bool = False) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            now = time.monotonic()
+            if throttled:
+                if now - self._last_decrease >= self.decrease_interval:
+                    self._limit = max(self.minimum, self._limit * self.decrease)
+                    self._last_decrease = now
+            else:
+                self._limit = min(self.maximum, self._limit + self.increase / self._limit)
+            self._wake()
+
+    def discard(self) -> None:
+        """
+        Gives a slot back without a congestion signal either way.
+        """
+        with self._condition:
+            self._in_flight -= 1
+            self._wake()
+
+    def stats(self) -> Dict[str, float]:
+        with self._condition:
+            return {"limit": int(self._limit), "in_flight": self._in_flight}
+
+    def _wake(self) -> None:
+        """
+        Wakes the waiting threads and one async waiter per free slot; a waiter that loses
+        the race waits again. Called with the condition held.
+        """
+        self._condition.notify_all()
+        free = int(self._limit) - self._in_flight
+        while free > 0 and self._async_waiters:
+            loop, future = self._async_waiters.popleft()
+            try:
+                loop.call_soon_threadsafe(_resolve, future)
+            except RuntimeError:
+                # The waiter's loop has been closed
+                continue
+            free -= 1
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+class RateLimiter:
+    """
+    Client-side admission control for a rate-limited API such as Groq.
+
+    Each call takes a concurrency slot from an AIMD limiter, then one request from the
+    requests-per-minute bucket and its estimated tokens from the tokens-per-minute bucket.
+    Retryable failures are retried with jittered exponential backoff; a retry-after
+    signal from the server pauses both buckets so every caller backs off together.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float,
+                 initial_concurrency: int = 4, min_concurrency: int = 1, max_concurrency: int = 32,
+                 max_retries: int = 4, backoff_base: float = 1.0, backoff_max: float = 30.0,
+                 acquire_timeout: float = 60.0,
+                 retryable_exceptions: Tuple[type, ...] = (ConnectionError, TimeoutError)):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.concurrency = AIMDConcurrencyLimiter(initial_concurrency, min_concurrency, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.acquire_timeout = acquire_timeout
+        self.retryable_exceptions = retryable_exceptions
+        self._throttled = 0
+        self._retries = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config, **overrides) -> "RateLimiter":
+        """
+        Builds a limiter from the GROQ_* settings; keyword arguments override individual settings.
+        """
+        settings = dict(
+            requests_per_minute=config.GROQ_REQUESTS_PER_MINUTE,
+            tokens_per_minute=config.GROQ_TOKENS_PER_MINUTE,
+            initial_concurrency=config.GROQ_INITIAL_CONCURRENCY,
+            min_concurrency=config.GROQ_MIN_CONCURRENCY,
+            max_concurrency=config.GROQ_MAX_CONCURRENCY,
+            max_retries=config.GROQ_MAX_RETRIES,
+            backoff_base=config.GROQ_BACKOFF_BASE,
+            backoff_max=config.GROQ_BACKOFF_MAX,
+            acquire_timeout=config.GROQ_ACQUIRE_TIMEOUT,
+        )
+        settings.update(overrides)
+        return cls(**settings)
+
+    def call(self, fn: Callable[[], Any], tokens: int, deadline: Optional[float] = None) -> Any:
+        """
+        Runs fn once admitted, retrying retryable failures. With a deadline (a time.monotonic()
+        value), no waiting or retrying goes past it, so the caller can fall back in time.
+        """
+        attempt = 0
+        while True:
+            try:
+                with self.slot(tokens, deadline):
+                    return fn()
+            except Exception as ex:
+                delay = self.retry_delay(ex, attempt, deadline)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+            attempt += 1
+
+    async def acall(self, fn: Callable[[], Awaitable[Any]], tokens: int, deadline: Optional[float] = None) -> Any:
+        """
+        Async variant of call; waiting happens on the event loop, not in a thread.
+        """
+        attempt = 0
+        while True:
+            try:
+                async with self.aslot(tokens, deadline):
+                    return await fn()
+            except Exception as ex:
+                delay = self.retry_delay(ex, attempt, deadline)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    @contextmanager
+    def slot(self, tokens: int, deadline: Optional[float] = None) -> Iterator[None]:
+        """
+        Holds one admitted call for the duration of the block, e.g. while a response streams.
+        """
+        self._acquire(tokens, deadline)
+        try:
+            yield
+        except BaseException as ex:
+            self._release_failed(ex)
+            raise
+        self.concurrency.release()
+
+    @asynccontextmanager
+    async def aslot(self, tokens: int, deadline: Optional[float] = None) -> AsyncIterator[None]:
+        await self._aacquire(tokens, deadline)
+        try:
+            yield
+        except BaseException as ex:
+            self._release_failed(ex)
+            raise
+        self.concurrency.release()
+
+    def retry_delay(self, ex: Exception, attempt: int, deadline: Optional[float] = None) -> Optional[float]:
+        """
+        Returns how long to wait before retrying after a failed attempt, or None if the error
+        must be raised. A throttled call that is out of retries raises RateLimitExceededError.
+        """
+        throttled = self._is_throttled(ex)
+        status_code = self._status_code(ex)
+        retryable = throttled or status_code in RETRYABLE_STATUS_CODES or (status_code or 0) >= 500 \
+            or (status_code is None and isinstance(ex, self.retryable_exceptions))
+        if not retryable:
+            return None
+
+        retry_after = self._retry_after(ex)
+        if throttled:
+            with self._lock:
+                self._throttled += 1
+            if retry_after:
+                self.requests.pause(retry_after)
+                self.tokens.pause(retry_after)
+        # Full jitter keeps retrying callers from synchronizing into another burst.
+        backoff = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        delay = max(retry_after or 0.0, backoff)
+        if attempt >= self.max_retries or (deadline is not None and time.monotonic() + delay >= deadline):
+            if throttled:
+                raise RateLimitExceededError(f"The LLM is rate limited: {ex}", retry_after=retry_after) from ex
+            return None
+
+        with self._lock:
+            self._retries += 1
+        return delay
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            counters = {"throttled": self._throttled, "retries": self._retries}
+        return {
+            **self.concurrency.stats(),
+            **counters,
+            "requests_available": self.requests.level(),
+            "tokens_available": self.tokens.level(),
+        }
+
+    def _acquire(self, tokens: int, deadline: Optional[float] = None) -> None:
+        timeout = self._acquire_timeout(deadline)
+        if not self.concurrency.acquire(timeout):
+            raise RateLimitExceededError(f"No LLM slot became free within {timeout:.1f} seconds.")
+        try:
+            time.sleep(self._reserve(tokens, self._acquire_timeout(deadline)))
+        except BaseException:
+            self.concurrency.discard()
+            raise
+
+    async def _aacquire(self, tokens: int, deadline: Optional[float] = None) -> None:
+        timeout = self._acquire_timeout(deadline)
+        if not await self.concurrency.aacquire(timeout):
+            raise RateLimitExceededError(f"No LLM slot became free within {timeout:.1f} seconds.")
+        try:
+            await asyncio.sleep(self._reserve(tokens, self._acquire_timeout(deadline)))
+        except BaseException:
+            self.concurrency.discard()
+            raise
+
+    def _release_failed(self, ex: BaseException) -> None:
+        """
+        Only a 429 lowers the limit and only a success raises it; other failures are neutral.
+        """
+        if isinstance(ex, Exception) and self._is_throttled(ex):
+            self.concurrency.release(throttled=True)
+        else:
+            self.concurrency.discard()
+
+    def _acquire_timeout(self, deadline: Optional[float]) -> float:
+        if deadline is None:
+            return self.acquire_timeout
+        return max(0.0, min(self.acquire_timeout, deadline - time.monotonic()))
+
+    def _reserve(self, tokens: int, timeout: float) -> float:
+        """
+        Reserves one request and the estimated tokens, returning how long to wait.
+        Gives the reservation back and fails fast if the wait exceeds the timeout.
+        """
+        wait = max(self.requests.reserve(1), self.tokens.reserve(tokens))
+        if wait > timeout:
+            self.requests.refund(1)
+            self.tokens.refund(tokens)
+            raise RateLimitExceededError(f"The LLM rate limit is saturated for the next {wait:.0f} seconds.", retry_after=wait)
+        return wait
+
+    @classmethod
+    def _is_throttled(cls, ex: Exception) -> bool:
+        return cls._status_code(ex) == 429
+
+    @staticmethod
+    def _status_code(ex: Exception) -> Optional[int]:
+        status_code = getattr(ex, "status_code", None)
+        if status_code is None:
+            status_code = getattr(getattr(ex, "response", None), "status_code", None)
+        return status_code if isinstance(status_code, int) else None
+
+    @staticmethod
+    def _retry_after(ex: Exception) -> Optional[float]:
+        headers = getattr(getattr(ex, "response", None), "headers", None) or {}
+        try:
+            return float(headers.get("retry-after"))
+        except (TypeError, ValueError):
+            return None
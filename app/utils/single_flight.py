@@ -0,0 +1,56 @@
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional
+
+class _Call:
+    def __init__(self):
+        self.future: Future = Future()
+        self.participants = 1
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller (the leader) runs the
+    function and every caller that arrives while it is in flight waits for the same result.
+    Exceptions raised by the leader are raised in every waiting caller as well.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any], on_complete: Optional[Callable[[Any, int], None]] = None) -> Any:
+        """
+        Runs fn once for all concurrent callers of key and returns its result.
+
+        on_complete(result, participants) is called by the leader once no more callers can
+        join the flight and before the followers are released, so shared resources can be
+        reserved for exactly the callers that will use them.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.participants += 1
+        if not leader:
+            return call.future.result()
+
+        try:
+            result = fn()
+            with self._lock:
+                del self._calls[key]
+            if on_complete:
+                on_complete(result, call.participants)
+        except BaseException as ex:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.future.set_exception(ex)
+            raise
+
+        call.future.set_result(result)
+        return result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,289 @@
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, NamedTuple, Optional, Tuple, Type
+
+from app.utils.fingerprint import SimHashIndex, to_signed, to_unsigned
+
+class SummaryStoreError(Exception):
+    pass
+
+class SimilarSummary(NamedTuple):
+    video_id: str
+    summary: str
+    distance: int
+
+class SummaryBackend(ABC):
+    """
+    Storage interface for generated summaries keyed by (video ID, prompt version, model name).
+    Implementations must be safe to share between threads and worker processes.
+    """
+
+    @abstractmethod
+    def get(self, video_id: str, prompt_version: str, model_name: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def set(self, video_id: str, prompt_version: str, model_name: str, summary: str, fingerprint: Optional[int] = None) -> None:
+        ...
+
+    @abstractmethod
+    def fingerprints(self, prompt_version: str, after: int = 0) -> List[Tuple[int, str, int]]:
+        """
+        (row ID, model name, fingerprint) of the entries with a fingerprint written after the given row ID.
+        """
+        ...
+
+    @abstractmethod
+    def fingerprint_count(self, prompt_version: str) -> int:
+        """
+        Number of entries with a fingerprint.
+        """
+        ...
+
+    @abstractmethod
+    def get_row(self, row_id: int, prompt_version: str, model_name: str) -> Optional[Tuple[str, str]]:
+        """
+        (video ID, summary) of an entry by row ID, or None once it has been evicted or replaced.
+        """
+        ...
+
+    @abstractmethod
+    def purge_versions(self, prompt_version: str, accessed_before: float) -> int:
+        """
+        Removes the entries of prompt versions other than the given one that were last
+        accessed before accessed_before (a time.time() value); returns how many.
+        """
+        ...
+
+class SQLiteSummaryBackend(SummaryBackend):
+    """
+    SQLite backend in WAL mode, so several gunicorn workers on one host can share it.
+    The table is kept under max_entries by evicting the least recently accessed rows.
+    """
+
+    # Reads only refresh accessed_at when it is older than this, to keep reads write-free.
+    TOUCH_INTERVAL = 60
+
+    def __init__(self, path: str, max_entries: int = 10000, timeout: float = 10.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._create_schema()
+
+    def get(self, video_id: str, prompt_version: str, model_name: str) -> Optional[str]:
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT summary, accessed_at FROM summaries WHERE video_id = ? AND prompt_version = ? AND model_name = ?",
+            (video_id, prompt_version, model_name),
+        ).fetchone()
+        if row is None:
+            return None
+
+        now = time.time()
+        if now - row[1] > self.TOUCH_INTERVAL:
+            with connection:
+                connection.execute(
+                    "UPDATE summaries SET accessed_at = ? WHERE video_id = ? AND prompt_version = ? AND model_name = ?",
+                    (now, video_id, prompt_version, model_name),
+                )
+        return row[0]
+
+    def set(self, video_id: str, prompt_version: str, model_name: str, summary: str, fingerprint: Optional[int] = None) -> None:
+        now = time.time()
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO summaries "
+                "(video_id, prompt_version, model_name, summary, created_at, accessed_at, fingerprint) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (video_id, prompt_version, model_name, summary, now, now,
+                 to_signed(fingerprint) if fingerprint is not None else None),
+            )
+            connection.execute(
+                "DELETE FROM summaries WHERE rowid IN ("
+                "SELECT rowid FROM summaries ORDER BY accessed_at ASC "
+                "LIMIT MAX(0, (SELECT COUNT(*) FROM summaries) - ?))",
+                (self.max_entries,),
+            )
+
+    def purge_versions(self, prompt_version: str, accessed_before: float) -> int:
+        connection = self._connection()
+        with connection:
+            cursor = connection.execute(
+                "DELETE FROM summaries WHERE prompt_version != ? AND accessed_at < ?",
+                (prompt_version, accessed_before),
+            )
+        return cursor.rowcount
+
+    def fingerprints(self, prompt_version: str, after: int = 0) -> List[Tuple[int, str, int]]:
+        rows = self._connection().execute(
+            "SELECT rowid, model_name, fingerprint FROM summaries WHERE rowid > ? AND fingerprint IS NOT NULL "
+            "AND prompt_version = ? ORDER BY rowid",
+            (after, prompt_version),
+        ).fetchall()
+        return [(row_id, model_name, to_unsigned(fingerprint)) for row_id, model_name, fingerprint in rows]
+
+    def fingerprint_count(self, prompt_version: str) -> int:
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM summaries WHERE fingerprint IS NOT NULL AND prompt_version = ?",
+            (prompt_version,),
+        ).fetchone()[0]
+
+    def get_row(self, row_id: int, prompt_version: str, model_name: str) -> Optional[Tuple[str, str]]:
+        row = self._connection().execute(
+            "SELECT video_id, summary FROM summaries WHERE rowid = ? AND prompt_version = ? AND model_name = ?",
+            (row_id, prompt_version, model_name),
+        ).fetchone()
+        return (row[0], row[1]) if row is not None else None
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _create_schema(self) -> None:
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                "video_id TEXT NOT NULL, "
+                "prompt_version TEXT NOT NULL, "
+                "model_name TEXT NOT NULL, "
+                "summary TEXT NOT NULL, "
+                "created_at REAL NOT NULL, "
+                "accessed_at REAL NOT NULL, "
+                "PRIMARY KEY (video_id, prompt_version, model_name))"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS idx_summaries_accessed_at ON summaries (accessed_at)")
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(summaries)")}
+            if "fingerprint" not in columns:
+                # Stores created before near-duplicate detection
+                connection.execute("ALTER TABLE summaries ADD COLUMN fingerprint INTEGER")
+
+SUMMARY_BACKENDS: Dict[str, Type[SummaryBackend]] = {
+    "sqlite": SQLiteSummaryBackend,
+}
+
+class SummaryStore:
+    """
+    Summary store bound to the current prompt version. Entries are keyed by the model
+    that produced them, model_name by default, so a summary from the fast or fallback
+    model is never served as the primary model's. Reads only see the current prompt
+    version; entries of other versions are left to workers still running them during a
+    rolling deploy, and purged once unused for stale_version_ttl seconds by the TTL pass
+    run when a store is created.
+
+    Entries may carry a transcript fingerprint. With max_distance set, an in-memory
+    SimHashIndex per model over those fingerprints finds stored summaries of
+    near-identical transcripts. The indexes only hold row IDs; they catch up with rows
+    written by other workers on each lookup. Rows evicted or replaced since are dropped
+    when a lookup meets them, and the indexes are reloaded from the table once more than
+    STALE_RATIO of their entries are stale, so memory follows the table size.
+    """
+
+    STALE_RATIO = 0.25
+    # Stale entries always tolerated, so small stores are not reloaded on every write
+    MIN_STALE_ENTRIES = 256
+
+    def __init__(self, backend: SummaryBackend, prompt_version: str, model_name: str, max_distance: Optional[int] = None,
+                 stale_version_ttl: float = 86400):
+        self.backend = backend
+        self.prompt_version = prompt_version
+        self.model_name = model_name
+        self.max_distance = max_distance
+        self.stale_version_ttl = stale_version_ttl
+        self.purge_stale_versions()
+        self.indexes: Dict[str, SimHashIndex] = {}
+        self._indexed_row_id = 0
+        self._index_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config, prompt_version: str, model_name: str) -> "SummaryStore":
+        """
+        Builds the store from the SUMMARY_STORE_* settings.
+        """
+        backend_class = SUMMARY_BACKENDS.get(config.SUMMARY_STORE_BACKEND)
+        if backend_class is None:
+            raise SummaryStoreError(f"Unknown summary store backend: {config.SUMMARY_STORE_BACKEND}")
+        backend = backend_class(config.SUMMARY_STORE_PATH, max_entries=config.SUMMARY_STORE_MAX_ENTRIES)
+        max_distance = config.NEAR_DUPLICATE_MAX_DISTANCE if config.NEAR_DUPLICATE_SUMMARIES else None
+        return cls(backend, prompt_version, model_name, max_distance, config.SUMMARY_STORE_STALE_VERSION_TTL)
+
+    @property
+    def near_duplicates(self) -> bool:
+        return self.max_distance is not None
+
+    def purge_stale_versions(self) -> int:
+        """
+        Removes entries of other prompt versions unused for stale_version_ttl seconds. Workers
+        still on those versions refresh their entries on read, so theirs are kept.
+        """
+        return self.backend.purge_versions(self.prompt_version, time.time() - self.stale_version_ttl)
+
+    def index_size(self) -> int:
+        return sum(len(index) for index in list(self.indexes.values()))
+
+    def get(self, video_id: str, model_name: Optional[str] = None) -> Optional[str]:
+        return self.backend.get(video_id, self.prompt_version, model_name or self.model_name)
+
+    def set(self, video_id: str, summary: str, fingerprint: Optional[int] = None, model_name: Optional[str] = None) -> None:
+        self.backend.set(video_id, self.prompt_version, model_name or self.model_name, summary, fingerprint)
+
+    def find_similar(self, fingerprint: int, model_name: Optional[str] = None) -> Optional[SimilarSummary]:
+        """
+        The summary stored by the model whose transcript fingerprint is nearest to this one,
+        within the index distance, or None.
+        """
+        if not self.near_duplicates:
+            return None
+        model_name = model_name or self.model_name
+        self.sync_index()
+        index = self.indexes.get(model_name)
+        if index is None:
+            return None
+        for match in index.search(fingerprint):
+            row = self.backend.get_row(match.ref, self.prompt_version, model_name)
+            if row is not None:
+                return SimilarSummary(row[0], row[1], match.distance)
+            index.remove(match.fingerprint, match.ref)
+        return None
+
+    def sync_index(self) -> int:
+        """
+        Indexes fingerprints written since the last sync, by any worker; returns how many.
+        The first call, and any call that finds too many stale entries, loads the whole
+        table in one batch.
+        """
+        if not self.near_duplicates:
+            return 0
+        with self._index_lock:
+            rows = self.backend.fingerprints(self.prompt_version, after=self._indexed_row_id)
+            if rows and self._indexed_row_id and self._too_stale(len(rows)):
+                # Only new writes can have replaced or evicted rows, so staleness is checked then.
+                self.indexes, self._indexed_row_id = {}, 0
+                rows = self.backend.fingerprints(self.prompt_version)
+            entries: Dict[str, List[Tuple[int, int]]] = {}
+            for row_id, model_name, fingerprint in rows:
+                entries.setdefault(model_name, []).append((fingerprint, row_id))
+            for model_name, model_entries in entries.items():
+                if model_name not in self.indexes:
+                    self.indexes[model_name] = SimHashIndex(self.max_distance)
+                self.indexes[model_name].add_many(model_entries)
+            if rows:
+                self._indexed_row_id = rows[-1][0]
+            return len(rows)
+
+    def _too_stale(self, new_rows: int) -> bool:
+        indexed = self.index_size() + new_rows
+        stale = indexed - self.backend.fingerprint_count(self.prompt_version)
+        return stale > max(self.MIN_STALE_ENTRIES, indexed * self.STALE_RATIO)
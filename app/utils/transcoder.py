@@ -0,0 +1,83 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from app.utils.metrics import TRANSCODE_WAIT_SECONDS, TRANSCODES_REJECTED
+
+class TranscodeQueueFullException(Exception):
+    pass
+
+class TranscodeScheduler:
+    """
+    Limits how many FFmpeg transcodes run at once in this process (by default one per CPU
+    core) and queues the rest, rejecting new work once max_waiting callers are queued.
+    Wait times are recorded so queueing delay can be monitored.
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None, max_waiting: int = 32, wait_timeout: float = 120):
+        self.max_concurrency = max_concurrency or os.cpu_count() or 1
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def acquire(self) -> float:
+        """
+        Blocks until a transcode slot is free and returns the time spent waiting, in seconds.
+        """
+        with self._lock:
+            if self._waiting >= self.max_waiting:
+                self._rejected += 1
+                TRANSCODES_REJECTED.inc(reason="queue_full")
+                raise TranscodeQueueFullException(f"Too many audio transcodes are queued ({self._waiting}).")
+            self._waiting += 1
+
+        started = time.monotonic()
+        acquired = self._slots.acquire(timeout=self.wait_timeout)
+        waited = time.monotonic() - started
+        TRANSCODE_WAIT_SECONDS.observe(waited, outcome="acquired" if acquired else "timeout")
+        with self._lock:
+            self._waiting -= 1
+            if not acquired:
+                self._rejected += 1
+                TRANSCODES_REJECTED.inc(reason="timeout")
+                raise TranscodeQueueFullException(f"No transcode slot became free within {self.wait_timeout} seconds.")
+            self._running += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+        return waited
+
+    def release(self) -> None:
+        with self._lock:
+            self._running -= 1
+            self._completed += 1
+        self._slots.release()
+
+    @contextmanager
+    def slot(self) -> Iterator[float]:
+        waited = self.acquire()
+        try:
+            yield waited
+        finally:
+            self.release()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            started = self._completed + self._running
+            return {
+                "max_concurrency": self.max_concurrency,
+                "running": self._running,
+                "waiting": self._waiting,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "average_wait_seconds": self._total_wait / started if started else 0.0,
+                "max_wait_seconds": self._max_wait,
+            }
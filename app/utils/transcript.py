@@ -0,0 +1,91 @@
+import re
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
+
+# Caption annotations such as [Música], [Music], [Aplausos], (risas) and music notes
+NOISE_MARKER_PATTERN = re.compile(r"\[[^\]]{1,40}\]|\((?:m[uú]sica|music|aplausos|applause|risas|laughter|laughs)\)|[♪♫]+", re.IGNORECASE)
+FILLER_WORDS = {"uh", "uhh", "um", "umm", "uhm", "hmm", "mm", "mhm", "eh", "ehm", "ah", "er"}
+MAX_REPEATED_PHRASE_WORDS = 12
+
+
+def compress_transcript(text: str) -> str:
+    """
+    Removes caption noise before the transcript is sent to the model: annotation markers,
+    filler words and immediately repeated words or phrases (rolling captions, choruses).
+    """
+    text = NOISE_MARKER_PATTERN.sub(" ", text)
+    words = [word for word in text.split() if word.strip(".,!?¡¿…").lower() not in FILLER_WORDS]
+    return " ".join(_drop_repeats(words))
+
+
+def _drop_repeats(words: List[str]) -> List[str]:
+    """
+    Collapses phrases of up to MAX_REPEATED_PHRASE_WORDS words that repeat back to back.
+    """
+    output, normalized = [], []
+    index = 0
+    while index < len(words):
+        longest = min(MAX_REPEATED_PHRASE_WORDS, len(output), len(words) - index)
+        for size in range(longest, 0, -1):
+            candidate = [word.lower() for word in words[index:index + size]]
+            if candidate == normalized[-size:]:
+                index += size
+                break
+        else:
+            output.append(words[index])
+            normalized.append(words[index].lower())
+            index += 1
+    return output
+
+
+class TranscriptSegments:
+    """
+    Caption segments kept as one text plus parallel lists of start times, end times and
+    text offsets. The full transcript costs nothing and a time window is two bisections
+    and a slice. The dict form is JSON-friendly, for the video cache.
+    """
+
+    def __init__(self, text: str, starts: List[float], ends: List[float], offsets: List[int]):
+        self.text = text
+        self.starts = starts
+        self.ends = ends
+        # offsets[i] is where segment i starts in text; the last entry is len(text).
+        self.offsets = offsets
+
+    @classmethod
+    def from_captions(cls, segments: List[Tuple[float, float, str]]) -> "TranscriptSegments":
+        starts, ends, offsets, pieces = [], [], [], []
+        position = 0
+        for start, duration, text in sorted(segments, key=lambda segment: segment[0]):
+            if pieces:
+                position += 1
+            starts.append(round(start, 3))
+            ends.append(round(start + duration, 3))
+            offsets.append(position)
+            pieces.append(text)
+            position += len(text)
+        offsets.append(position)
+        return cls(" ".join(pieces), starts, ends, offsets)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "TranscriptSegments":
+        return cls(data["text"], data["starts"], data["ends"], data["offsets"])
+
+    def to_dict(self) -> Dict:
+        return {"text": self.text, "starts": self.starts, "ends": self.ends, "offsets": self.offsets}
+
+    @property
+    def duration(self) -> float:
+        return max(self.ends, default=0.0)
+
+    def window(self, start: float = 0.0, end: Optional[float] = None) -> str:
+        """
+        Text of the segments that overlap [start, end).
+        """
+        first = bisect_right(self.starts, start) - 1
+        if first < 0 or self.ends[first] <= start:
+            first += 1
+        last = bisect_left(self.starts, end) if end is not None else len(self.starts)
+        if first >= last:
+            return ""
+        return self.text[self.offsets[first]:self.offsets[last]].strip()
@@ -0,0 +1,176 @@
+import html
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+VIDEO_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{11}$")
+PLAYLIST_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{2,64}$")
+YOUTUBE_HOSTS = {"youtube.com", "m.youtube.com", "music.youtube.com", "youtube-nocookie.com"}
+SHORT_HOSTS = {"youtu.be"}
+PATH_PREFIXES = ("shorts", "embed", "live", "v", "e")
+SRV1_TEXT_PATTERN = re.compile(r'<text start="([\d.]+)"(?: dur="([\d.]+)")?[^>]*>(.*?)</text>', re.DOTALL)
+TAG_PATTERN = re.compile(r"<[^>]+>")
+CAPTION_LANGUAGES = ["es", "pt", "en"]
+CAPTION_FORMATS = ["json3", "srv1", "vtt"]
+
+
+def extract_video_id(video_url: str) -> Optional[str]:
+    """
+    Returns the canonical 11-character video ID for any supported YouTube URL form
+    (watch, youtu.be, mobile, music, shorts, embed, live), or None if it cannot be found.
+    """
+    if not video_url:
+        return None
+
+    url = video_url.strip()
+    if "://" not in url:
+        url = f"https://{url}"
+
+    try:
+        parsed = urlparse(url)
+    except ValueError:
+        return None
+
+    host = (parsed.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    segments = [segment for segment in parsed.path.split("/") if segment]
+
+    candidate = None
+    if host in SHORT_HOSTS:
+        candidate = segments[0] if segments else None
+    elif host in YOUTUBE_HOSTS:
+        if segments[:1] == ["watch"]:
+            candidate = parse_qs(parsed.query).get("v", [None])[0]
+        elif len(segments) >= 2 and segments[0] in PATH_PREFIXES:
+            candidate = segments[1]
+
+    if candidate and VIDEO_ID_PATTERN.match(candidate):
+        return candidate
+    return None
+
+
+def extract_playlist_id(video_url: str) -> Optional[str]:
+    """
+    Returns the playlist ID of a YouTube playlist URL (`list=` parameter), or None.
+    """
+    if not video_url:
+        return None
+    url = video_url.strip()
+    if "://" not in url:
+        url = f"https://{url}"
+    try:
+        parsed = urlparse(url)
+    except ValueError:
+        return None
+    host = (parsed.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if host not in YOUTUBE_HOSTS and host not in SHORT_HOSTS:
+        return None
+    playlist_id = parse_qs(parsed.query).get("list", [None])[0]
+    return playlist_id if playlist_id and PLAYLIST_ID_PATTERN.match(playlist_id) else None
+
+
+def canonical_playlist_url(playlist_id: str) -> str:
+    """
+    Builds the canonical playlist URL for a playlist ID.
+    """
+    return f"https://www.youtube.com/playlist?list={playlist_id}"
+
+
+def canonical_video_url(video_id: str) -> str:
+    """
+    Builds the canonical watch URL for a video ID.
+    """
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+
+def select_caption_track(info: Dict, languages: List[str] = CAPTION_LANGUAGES) -> Optional[Dict]:
+    """
+    Picks the best caption track from a yt-dlp info dict.
+    Manual subtitles win over automatic captions, then language preference order applies,
+    and original-language automatic captions win over machine translations.
+    """
+    candidates = []
+    for source in ("subtitles", "automatic_captions"):
+        tracks = info.get(source) or {}
+        for language in languages:
+            for key, formats in tracks.items():
+                if key != language and not key.startswith(f"{language}-"):
+                    continue
+                track = _preferred_format(formats or [])
+                if track is None:
+                    continue
+                translated = "tlang=" in (track.get("url") or "")
+                candidates.append((source == "automatic_captions" and translated, len(candidates), track))
+        if candidates:
+            break
+
+    if not candidates:
+        return None
+    return min(candidates, key=lambda candidate: candidate[:2])[2]
+
+
+def _preferred_format(formats: List[Dict]) -> Optional[Dict]:
+    for ext in CAPTION_FORMATS:
+        for track in formats:
+            if track.get("ext") == ext and track.get("url"):
+                return track
+    return None
+
+
+def parse_captions(content: str, ext: str) -> List[Tuple[float, float, str]]:
+    """
+    Parses a caption file into (start, duration, text) segments, in seconds.
+    """
+    if ext == "json3":
+        return _parse_json3(content)
+    if ext == "vtt":
+        return _parse_vtt(content)
+    return _parse_srv1(content)
+
+
+def _parse_json3(content: str) -> List[Tuple[float, float, str]]:
+    segments = []
+    for event in json.loads(content).get("events", []):
+        text = "".join(seg.get("utf8", "") for seg in event.get("segs") or []).replace("\n", " ").strip()
+        if text:
+            segments.append((event.get("tStartMs", 0) / 1000, event.get("dDurationMs", 0) / 1000, text))
+    return segments
+
+
+def _parse_srv1(content: str) -> List[Tuple[float, float, str]]:
+    segments = []
+    for match in SRV1_TEXT_PATTERN.finditer(content):
+        start, duration, text = match.groups()
+        text = html.unescape(html.unescape(TAG_PATTERN.sub("", text))).replace("\n", " ").strip()
+        if text:
+            segments.append((float(start), float(duration or 0), text))
+    return segments
+
+
+def _parse_vtt(content: str) -> List[Tuple[float, float, str]]:
+    segments = []
+    previous_line = None
+    for block in re.split(r"\r?\n\r?\n", content):
+        lines = block.strip().splitlines()
+        timing_index = next((index for index, line in enumerate(lines) if "-->" in line), None)
+        if timing_index is None:
+            continue
+        start, end = (_vtt_seconds(part.split()[0]) for part in lines[timing_index].split("-->"))
+        for line in lines[timing_index + 1:]:
+            # Automatic captions repeat the previous line while the next one scrolls in.
+            text = html.unescape(TAG_PATTERN.sub("", line)).strip()
+            if text and text != previous_line:
+                segments.append((start, end - start, text))
+                previous_line = text
+    return segments
+
+
+def _vtt_seconds(timestamp: str) -> float:
+    seconds = 0.0
+    for part in timestamp.strip().split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
@@ -0,0 +1,38 @@
+from contextlib import asynccontextmanager
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.routing import Mount
+
+from app import init_app
+from app.config.cors_options import cors_options
+from app.routes import async_video_routes
+
+# The summary endpoints run natively on the event loop; every other route is served
+# by the Flask app. Run with: uvicorn asgi:app
+flask_app = init_app()
+cors_rule = cors_options[r"/api/*"]
+
+@asynccontextmanager
+async def lifespan(_app):
+    # Build the video services in the background so the first request rarely has to wait.
+    async_video_routes.video_service.start()
+    yield
+
+app = Starlette(
+    lifespan=lifespan,
+    routes=[
+        *async_video_routes.routes,
+        Mount('/', app=WSGIMiddleware(flask_app)),
+    ],
+    middleware=[
+        Middleware(
+            CORSMiddleware,
+            allow_origins=cors_rule["origins"],
+            allow_methods=cors_rule["methods"],
+            allow_headers=cors_rule["allow_headers"],
+        ),
+    ],
+)
@@ -0,0 +1,308 @@
+import asyncio
+import io
+import json
+import math
+import os
+import random
+import re
+import struct
+import sys
+import tempfile
+import threading
+import time
+import wave
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+# Words used to build synthetic transcripts; a few long ones keep the density router honest
+VOCABULARY = (
+    "el video explica como funciona la aplicacion paso a paso con ejemplos sencillos y "
+    "recomendaciones practicas para desarrolladores que empiezan arquitectura rendimiento "
+    "configuracion despliegue monitorizacion"
+).split()
+CAPTION_WORDS_PER_EVENT = 12
+SUMMARY_CHUNKS = 20
+SAMPLE_RATE = 16000
+
+class Latency(NamedTuple):
+    """
+    Log-normal latency given by its median and 95th percentile, in seconds.
+    """
+    median: float = 0.0
+    p95: float = 0.0
+
+    @classmethod
+    def parse(cls, value: str) -> "Latency":
+        """
+        Parses "median" or "median,p95" (seconds).
+        """
+        parts = [float(part) for part in value.split(",")]
+        return cls(parts[0], parts[1] if len(parts) > 1 else parts[0])
+
+    def sample(self, rng: random.Random) -> float:
+        if self.median <= 0:
+            return 0.0
+        if self.p95 <= self.median:
+            return self.median
+        sigma = math.log(self.p95 / self.median) / 1.645
+        return rng.lognormvariate(math.log(self.median), sigma)
+
+class FakeAPIError(Exception):
+    """
+    Error shaped like a Groq API error: status_code plus a response carrying headers.
+    """
+
+    def __init__(self, message: str, status_code: int, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+        self.response = SimpleNamespace(status_code=status_code, headers=headers)
+
+class FakeProfile:
+    """
+    Behaviour of the fake YouTube and Groq backends: latencies, transcript sizes, video
+    and playlist lengths, the containers served natively and error rates. Random draws come from one
+    seeded generator so runs repeat.
+    """
+
+    def __init__(self, metadata_latency: Latency = Latency(0.3, 0.8), captions_latency: Latency = Latency(0.15, 0.4),
+                 audio_latency: Latency = Latency(0.5, 1.5), llm_latency: Latency = Latency(2.0, 6.0),
+                 transcript_words: int = 1500, transcript_spread: float = 0.5, video_duration: int = 600,
+                 audio_seconds: int = 30, playlist_length: int = 10, native_containers: Tuple[str, ...] = (),
+                 youtube_error_rate: float = 0.0, llm_error_rate: float = 0.0, llm_throttle_rate: float = 0.0,
+                 throttle_retry_after: float = 1.0, seed: int = 0):
+        self.metadata_latency = metadata_latency
+        self.captions_latency = captions_latency
+        self.audio_latency = audio_latency
+        self.llm_latency = llm_latency
+        self.transcript_words = transcript_words
+        self.transcript_spread = transcript_spread
+        self.video_duration = video_duration
+        self.audio_seconds = audio_seconds
+        self.playlist_length = playlist_length
+        self.native_containers = native_containers
+        self.youtube_error_rate = youtube_error_rate
+        self.llm_error_rate = llm_error_rate
+        self.llm_throttle_rate = llm_throttle_rate
+        self.throttle_retry_after = throttle_retry_after
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._audio_file: Optional[str] = None
+
+    def delay(self, latency: Latency) -> float:
+        with self._lock:
+            return latency.sample(self._rng)
+
+    def chance(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self._rng.random() < rate
+
+    def transcript(self, video_id: str) -> List[str]:
+        """
+        Words of the video's transcript; the same video always gets the same transcript.
+        """
+        rng = random.Random(f"{self.seed}:{video_id}")
+        spread = self.transcript_words * self.transcript_spread
+        count = max(1, int(rng.uniform(self.transcript_words - spread, self.transcript_words + spread)))
+        return [rng.choice(VOCABULARY) for _ in range(count)]
+
+    def audio_file(self) -> str:
+        """
+        Path of a synthetic WAV tone used as the source audio for every video.
+        """
+        with self._lock:
+            if self._audio_file is None:
+                self._audio_file = write_tone(self.audio_seconds)
+            return self._audio_file
+
+def write_tone(seconds: int, frequency: float = 440.0) -> str:
+    """
+    Writes a mono 16-bit sine tone to a temporary WAV file and returns its path.
+    """
+    handle, path = tempfile.mkstemp(prefix="youreview-bench-", suffix=".wav")
+    os.close(handle)
+    frame = [struct.pack("<h", int(12000 * math.sin(2 * math.pi * frequency * i / SAMPLE_RATE))) for i in range(SAMPLE_RATE)]
+    second = b"".join(frame)
+    with wave.open(path, "wb") as output:
+        output.setnchannels(1)
+        output.setsampwidth(2)
+        output.setframerate(SAMPLE_RATE)
+        for _ in range(max(1, seconds)):
+            output.writeframes(second)
+    return path
+
+# The active profile; install() replaces it.
+PROFILE = FakeProfile()
+
+class FakeYoutubeDL:
+    """
+    Stand-in for yt_dlp.YoutubeDL covering what VideoService uses: extract_info (metadata,
+    playlists and downloads), process_ie_result and urlopen for caption tracks.
+    """
+
+    def __init__(self, options: Optional[Dict] = None):
+        self.options = options or {}
+
+    def __enter__(self) -> "FakeYoutubeDL":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+    def extract_info(self, url: str, download: bool = False) -> Dict:
+        self._wait(PROFILE.metadata_latency)
+        if "list=" in url and "v=" not in url:
+            return self._playlist_info(url)
+        info = self._video_info(url.rsplit("=", 1)[-1].rsplit("/", 1)[-1])
+        if download:
+            self._download(info)
+        return info
+
+    def process_ie_result(self, info: Dict, download: bool = True) -> Dict:
+        if download:
+            self._download(info)
+        return info
+
+    def urlopen(self, url: str) -> io.BytesIO:
+        self._wait(PROFILE.captions_latency)
+        video_id = url.rsplit("/", 1)[-1]
+        return io.BytesIO(json.dumps(self._captions(video_id)).encode("utf-8"))
+
+    def _wait(self, latency: Latency) -> None:
+        time.sleep(PROFILE.delay(latency))
+        if PROFILE.chance(PROFILE.youtube_error_rate):
+            raise FakeAPIError("Injected YouTube failure.", 503)
+
+    def _video_info(self, video_id: str) -> Dict:
+        audio_file = PROFILE.audio_file()
+        return {
+            "id": video_id,
+            "title": f"Benchmark video {video_id}",
+            "channel": "Benchmark channel",
+            "thumbnail": f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg",
+            "duration": PROFILE.video_duration,
+            "ext": "wav",
+            "acodec": "pcm_s16le",
+            "url": audio_file,
+            "http_headers": {},
+            "subtitles": {"es": [{"ext": "json3", "url": f"fake://captions/{video_id}"}]},
+            "automatic_captions": {},
+        }
+
+    def _playlist_info(self, url: str) -> Dict:
+        playlist_id = url.rsplit("list=", 1)[-1].split("&", 1)[0]
+        limit = min(self.options.get("playlistend") or PROFILE.playlist_length, PROFILE.playlist_length)
+        entries = [{"id": f"{playlist_id[:7]}{index:04d}"[:11].ljust(11, "x")} for index in range(limit)]
+        return {"id": playlist_id, "entries": entries}
+
+    def _captions(self, video_id: str) -> Dict:
+        words = PROFILE.transcript(video_id)
+        events = []
+        for index in range(0, len(words), CAPTION_WORDS_PER_EVENT):
+            text = " ".join(words[index:index + CAPTION_WORDS_PER_EVENT])
+            events.append({"tStartMs": index * 400, "dDurationMs": CAPTION_WORDS_PER_EVENT * 400, "segs": [{"utf8": text}]})
+        return {"events": events}
+
+    def _download(self, info: Dict) -> None:
+        time.sleep(PROFILE.delay(PROFILE.audio_latency))
+        template = self.options.get("outtmpl") or "%(id)s.%(ext)s"
+        target = template.replace("%(id)s", info["id"]).replace("%(ext)s", self._download_ext())
+        with open(PROFILE.audio_file(), "rb") as source, open(target, "wb") as output:
+            output.write(source.read())
+
+    def _download_ext(self) -> str:
+        """
+        Container a selector such as "bestaudio[ext=webm]/bestaudio" gets: the requested one
+        when the profile serves it natively, else the WAV tone. Native downloads carry the
+        tone's bytes too; passthrough never decodes them.
+        """
+        match = re.search(r"\[ext=(\w+)\]", self.options.get("format") or "")
+        return match.group(1) if match and match.group(1) in PROFILE.native_containers else "wav"
+
+class FakeChatGroq(BaseChatModel):
+    """
+    Stand-in for langchain_groq.ChatGroq with the profile's latency and error rates.
+    Streaming spreads the latency over the chunks; a sampled latency above the request
+    timeout (bound per call, or the client's) raises TimeoutError once it has passed, like
+    the real client.
+    """
+    model: str = "fake"
+    api_key: Optional[str] = None
+    max_retries: int = 2
+    timeout: Optional[float] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-groq"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self._admit(kwargs.get("timeout")))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._summary(messages)))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self._admit(kwargs.get("timeout")))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._summary(messages)))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        pause = self._admit(kwargs.get("timeout")) / SUMMARY_CHUNKS
+        for text in self._chunks(self._summary(messages)):
+            time.sleep(pause)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        pause = self._admit(kwargs.get("timeout")) / SUMMARY_CHUNKS
+        for text in self._chunks(self._summary(messages)):
+            await asyncio.sleep(pause)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text))
+
+    def _admit(self, timeout: Optional[float] = None) -> float:
+        """
+        Raises an injected failure or returns the latency of this call.
+        """
+        timeout = timeout or self.timeout
+        if PROFILE.chance(PROFILE.llm_throttle_rate):
+            raise FakeAPIError("Injected rate limit.", 429, PROFILE.throttle_retry_after)
+        if PROFILE.chance(PROFILE.llm_error_rate):
+            raise FakeAPIError("Injected server error.", 500)
+        latency = PROFILE.delay(PROFILE.llm_latency)
+        if timeout and latency > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"Request timed out after {timeout:.1f} seconds.")
+        return latency
+
+    def _summary(self, messages: List[BaseMessage]) -> str:
+        prompt_characters = sum(len(str(message.content)) for message in messages)
+        return f"<h2>Resumen</h2><p>Resumen sintético de {self.model} para un prompt de {prompt_characters} caracteres.</p>"
+
+    @staticmethod
+    def _chunks(text: str) -> List[str]:
+        size = max(1, math.ceil(len(text) / SUMMARY_CHUNKS))
+        return [text[index:index + size] for index in range(0, len(text), size)]
+
+def install(profile: FakeProfile) -> None:
+    """
+    Replaces YoutubeDL and ChatGroq with the fakes. Must run before the service modules
+    are imported, since they bind both names at import (`from yt_dlp import YoutubeDL`);
+    the services themselves are only built on first use.
+    """
+    global PROFILE
+    if "app.services.video_service" in sys.modules:
+        raise RuntimeError("install() must be called before the service modules are imported.")
+    PROFILE = profile
+    os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+    import langchain_groq
+    import yt_dlp
+    yt_dlp.YoutubeDL = FakeYoutubeDL
+    langchain_groq.ChatGroq = FakeChatGroq
@@ -0,0 +1,261 @@
+import json
+import math
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlencode
+
+# Endpoints the harness knows how to call, keyed by the name used in --mix and in reports
+ENDPOINTS = {
+    "summary": ("POST", "/api/generate_video_summary"),
+    "stream": ("GET", "/api/generate_video_summary/stream"),
+    "audio": ("GET", "/api/download_audio"),
+}
+PERCENTILES = (50, 95, 99)
+
+class RequestSpec(NamedTuple):
+    endpoint: str
+    method: str
+    path: str
+    query: Dict[str, str]
+    body: Optional[Dict]
+
+class Sample(NamedTuple):
+    endpoint: str
+    status: int
+    seconds: float
+    size: int
+    stages: Dict[str, float]
+
+def video_ids(count: int) -> List[str]:
+    """
+    Valid, deterministic 11-character video IDs, so runs with the same pool share cache keys.
+    """
+    return [f"bench{index:06d}" for index in range(count)]
+
+def build_workload(mix: Dict[str, int], videos: List[str], total: int, seed: int = 0) -> List[RequestSpec]:
+    """
+    Draws `total` requests from the weighted endpoint mix, each for a random video of the pool.
+    """
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    workload = []
+    for _ in range(total):
+        endpoint = rng.choices(names, weights)[0]
+        url = f"https://www.youtube.com/watch?v={rng.choice(videos)}"
+        method, path = ENDPOINTS[endpoint]
+        if method == "POST":
+            workload.append(RequestSpec(endpoint, method, path, {}, {"url": url}))
+        else:
+            workload.append(RequestSpec(endpoint, method, path, {"url": url}, None))
+    return workload
+
+class InProcessClient:
+    """
+    Calls the Flask app through its test client, with one client per worker thread.
+    Streamed bodies are read to the end so the full transfer is timed.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def send(self, spec: RequestSpec) -> Tuple[int, Dict[str, str], int]:
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(spec.path, method=spec.method, query_string=spec.query, json=spec.body, buffered=False)
+        try:
+            size = sum(len(chunk) for chunk in response.response)
+            return response.status_code, dict(response.headers), size
+        finally:
+            response.close()
+
+class HttpClient:
+    """
+    Calls a running server over HTTP.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 300.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def send(self, spec: RequestSpec) -> Tuple[int, Dict[str, str], int]:
+        url = self.base_url + spec.path + (f"?{urlencode(spec.query)}" if spec.query else "")
+        data = json.dumps(spec.body).encode("utf-8") if spec.body is not None else None
+        request = urllib.request.Request(url, data=data, method=spec.method, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, dict(response.headers), self._drain(response)
+        except urllib.error.HTTPError as e:
+            return e.code, dict(e.headers), self._drain(e)
+
+    @staticmethod
+    def _drain(response) -> int:
+        size = 0
+        while True:
+            chunk = response.read(64 * 1024)
+            if not chunk:
+                return size
+            size += len(chunk)
+
+def start_server(app, host: str = "127.0.0.1", port: int = 0):
+    """
+    Serves the app with Werkzeug's threaded server on a background thread; returns the server.
+    """
+    from werkzeug.serving import make_server
+
+    server = make_server(host, port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="benchmark-server", daemon=True).start()
+    return server
+
+def parse_server_timing(header: Optional[str]) -> Dict[str, float]:
+    """
+    Stage durations in seconds from a Server-Timing header, without the request total.
+    """
+    stages = {}
+    for entry in (header or "").split(","):
+        name, _, params = entry.strip().partition(";")
+        if not name or name == "total":
+            continue
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "dur":
+                try:
+                    stages[name] = float(value) / 1000
+                except ValueError:
+                    pass
+    return stages
+
+def run_load(client, workload: Iterable[RequestSpec], concurrency: int) -> Tuple[List[Sample], float]:
+    """
+    Sends the workload with `concurrency` requests in flight and returns the samples and the
+    wall-clock time. A request that raises is recorded with status 0.
+    """
+    pending = iter(workload)
+    lock = threading.Lock()
+    samples: List[Sample] = []
+
+    def worker():
+        while True:
+            with lock:
+                spec = next(pending, None)
+            if spec is None:
+                return
+            started = time.perf_counter()
+            try:
+                status, headers, size = client.send(spec)
+            except Exception:
+                status, headers, size = 0, {}, 0
+            sample = Sample(spec.endpoint, status, time.perf_counter() - started, size,
+                            parse_server_timing(headers.get("Server-Timing")))
+            with lock:
+                samples.append(sample)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="benchmark") as executor:
+        for future in [executor.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    return samples, time.perf_counter() - started
+
+def percentile(values: List[float], rank: float) -> float:
+    """
+    Nearest-rank percentile of an unsorted list.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(rank / 100 * len(ordered)) - 1)]
+
+def latency_summary(values: List[float]) -> Dict[str, float]:
+    summary = {f"p{rank}": round(percentile(values, rank), 4) for rank in PERCENTILES}
+    summary["mean"] = round(sum(values) / len(values), 4) if values else 0.0
+    summary["max"] = round(max(values), 4) if values else 0.0
+    return summary
+
+def summarize(samples: List[Sample], elapsed: float) -> Dict:
+    """
+    Throughput and latency percentiles per endpoint, and per stage from Server-Timing.
+    Streamed responses only report the stages that ran before the response started.
+    """
+    endpoints: Dict[str, Dict] = {}
+    for name in sorted({sample.endpoint for sample in samples}):
+        selected = [sample for sample in samples if sample.endpoint == name]
+        statuses: Dict[str, int] = {}
+        for sample in selected:
+            statuses[str(sample.status)] = statuses.get(str(sample.status), 0) + 1
+        endpoints[name] = {
+            "count": len(selected),
+            "errors": sum(1 for sample in selected if not 200 <= sample.status < 400),
+            "throughput_rps": round(len(selected) / elapsed, 3) if elapsed else 0.0,
+            "bytes": sum(sample.size for sample in selected),
+            "status": statuses,
+            "latency": latency_summary([sample.seconds for sample in selected]),
+        }
+
+    durations: Dict[str, List[float]] = {}
+    for sample in samples:
+        for stage, seconds in sample.stages.items():
+            durations.setdefault(stage, []).append(seconds)
+    stages = {name: {"count": len(values), **latency_summary(values)} for name, values in sorted(durations.items())}
+
+    return {
+        "requests": len(samples),
+        "errors": sum(endpoint["errors"] for endpoint in endpoints.values()),
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(samples) / elapsed, 3) if elapsed else 0.0,
+        "latency": latency_summary([sample.seconds for sample in samples]),
+        "endpoints": endpoints,
+        "stages": stages,
+    }
+
+def compare(baseline: Dict, current: Dict, tolerance: float = 0.1) -> Tuple[List[str], bool]:
+    """
+    Compares a run with a baseline report. Returns printable lines and whether any
+    endpoint or stage p95, or the overall throughput, regressed by more than `tolerance`.
+    """
+    lines, regressed = [], False
+
+    def check(label: str, before: float, after: float, higher_is_better: bool = False, gated: bool = True) -> None:
+        nonlocal regressed
+        change = (after - before) / before if before else 0.0
+        worse = -change if higher_is_better else change
+        flag = "  REGRESSION" if gated and before and worse > tolerance else ""
+        regressed = regressed or bool(flag)
+        lines.append(f"{label:<32} {before:>10.4f} -> {after:>10.4f} ({change:+.1%}){flag}")
+
+    check("throughput_rps", baseline.get("throughput_rps", 0.0), current["throughput_rps"], higher_is_better=True)
+    for section, kind in (("endpoints", "endpoint"), ("stages", "stage")):
+        for name, stats in current[section].items():
+            previous = baseline.get(section, {}).get(name)
+            if previous is None:
+                lines.append(f"{kind} {name}: not in baseline")
+                continue
+            before = previous["latency"] if kind == "endpoint" else previous
+            after = stats["latency"] if kind == "endpoint" else stats
+            for rank in PERCENTILES:
+                key = f"p{rank}"
+                check(f"{kind} {name} {key}", before.get(key, 0.0), after[key], gated=rank == 95)
+    return lines, regressed
+
+def format_report(report: Dict) -> str:
+    lines = [
+        f"{report['requests']} requests in {report['elapsed_seconds']:.2f}s: "
+        f"{report['throughput_rps']:.2f} req/s, {report['errors']} errors",
+        "",
+        f"{'endpoint':<12} {'count':>6} {'errors':>6} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}",
+    ]
+    for name, stats in report["endpoints"].items():
+        latency = stats["latency"]
+        lines.append(f"{name:<12} {stats['count']:>6} {stats['errors']:>6} {stats['throughput_rps']:>8.2f} "
+                     f"{latency['p50']:>8.3f} {latency['p95']:>8.3f} {latency['p99']:>8.3f}")
+    if report["stages"]:
+        lines += ["", f"{'stage':<16} {'count':>6} {'p50':>8} {'p95':>8} {'p99':>8}"]
+        for name, stats in report["stages"].items():
+            lines.append(f"{name:<16} {stats['count']:>6} {stats['p50']:>8.3f} {stats['p95']:>8.3f} {stats['p99']:>8.3f}")
+    return "\n".join(lines)
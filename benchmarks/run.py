@@ -0,0 +1,165 @@
+"""
+Offline benchmark for the summary API, with fake YouTube and Groq backends.
+
+    python -m benchmarks.run --requests 200 --concurrency 16 --output baseline.json
+    python -m benchmarks.run --requests 200 --concurrency 16 --compare baseline.json
+    python -m benchmarks.run --mode http --mix summary=6,stream=2,audio=2
+    python -m benchmarks.run --serve --port 5001      # faked app for external load tools
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict
+
+from benchmarks import fakes
+from benchmarks.harness import (
+    ENDPOINTS,
+    HttpClient,
+    InProcessClient,
+    build_workload,
+    compare,
+    format_report,
+    run_load,
+    start_server,
+    summarize,
+    video_ids,
+)
+
+# Groq limits used unless --groq-limits is given, so the fakes measure the service, not the quota
+UNLIMITED_GROQ = {
+    "GROQ_REQUESTS_PER_MINUTE": "1000000",
+    "GROQ_TOKENS_PER_MINUTE": "1000000000",
+    "GROQ_FAST_REQUESTS_PER_MINUTE": "1000000",
+    "GROQ_FAST_TOKENS_PER_MINUTE": "1000000000",
+}
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint '{name}'. Choose from: {', '.join(ENDPOINTS)}.")
+        mix[name] = int(weight or 1)
+    return mix
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the API against fake YouTube and Groq backends.")
+    load = parser.add_argument_group("load")
+    load.add_argument("--mode", choices=("inprocess", "http"), default="inprocess",
+                      help="Drive the Flask app through its test client or over HTTP (default: inprocess).")
+    load.add_argument("--base-url", help="Benchmark an already running server instead of starting one (implies --mode http).")
+    load.add_argument("--requests", type=int, default=100, help="Measured requests (default: 100).")
+    load.add_argument("--warmup", type=int, default=0, help="Requests sent before measuring (default: 0).")
+    load.add_argument("--concurrency", type=int, default=8, help="Requests in flight (default: 8).")
+    load.add_argument("--mix", type=parse_mix, default={"summary": 1}, help="Weighted endpoints, e.g. summary=8,stream=1,audio=1.")
+    load.add_argument("--videos", type=int, default=50, help="Distinct videos requested; fewer means more cache hits (default: 50).")
+
+    backends = parser.add_argument_group("fake backends (latencies are 'median' or 'median,p95' in seconds)")
+    backends.add_argument("--metadata-latency", type=fakes.Latency.parse, default=fakes.Latency(0.3, 0.8))
+    backends.add_argument("--captions-latency", type=fakes.Latency.parse, default=fakes.Latency(0.15, 0.4))
+    backends.add_argument("--audio-latency", type=fakes.Latency.parse, default=fakes.Latency(0.5, 1.5))
+    backends.add_argument("--llm-latency", type=fakes.Latency.parse, default=fakes.Latency(2.0, 6.0))
+    backends.add_argument("--transcript-words", type=int, default=1500, help="Mean transcript length in words.")
+    backends.add_argument("--transcript-spread", type=float, default=0.5, help="Relative spread of transcript lengths.")
+    backends.add_argument("--video-duration", type=int, default=600, help="Reported video duration in seconds.")
+    backends.add_argument("--audio-seconds", type=int, default=30, help="Length of the synthetic source audio.")
+    backends.add_argument("--youtube-error-rate", type=float, default=0.0)
+    backends.add_argument("--llm-error-rate", type=float, default=0.0)
+    backends.add_argument("--llm-throttle-rate", type=float, default=0.0, help="Share of LLM calls answered with a 429.")
+    backends.add_argument("--groq-limits", action="store_true", help="Keep the configured GROQ_* rate limits.")
+    backends.add_argument("--seed", type=int, default=0)
+
+    output = parser.add_argument_group("output")
+    output.add_argument("--output", help="Write the report as a JSON baseline.")
+    output.add_argument("--compare", help="Compare with a JSON baseline; exits with status 1 on a regression.")
+    output.add_argument("--tolerance", type=float, default=0.1, help="Allowed p95/throughput regression (default: 0.1).")
+
+    parser.add_argument("--serve", action="store_true", help="Only serve the faked app over HTTP until interrupted.")
+    parser.add_argument("--port", type=int, default=0, help="Port for --serve or --mode http (default: any free port).")
+    return parser.parse_args(argv)
+
+def create_app(args: argparse.Namespace):
+    """
+    Installs the fakes and builds the Flask app with throwaway stores, audio and logs.
+    """
+    data_directory = tempfile.mkdtemp(prefix="youreview-bench-")
+    os.environ.setdefault("SUMMARY_STORE_PATH", os.path.join(data_directory, "summaries.db"))
+    os.environ.setdefault("OUTPUT_FOLDER", os.path.join(data_directory, "audio"))
+    os.environ.setdefault("LOG_DIRECTORY", os.path.join(data_directory, "logs"))
+    if not args.groq_limits:
+        for name, value in UNLIMITED_GROQ.items():
+            os.environ.setdefault(name, value)
+
+    fakes.install(fakes.FakeProfile(
+        metadata_latency=args.metadata_latency,
+        captions_latency=args.captions_latency,
+        audio_latency=args.audio_latency,
+        llm_latency=args.llm_latency,
+        transcript_words=args.transcript_words,
+        transcript_spread=args.transcript_spread,
+        video_duration=args.video_duration,
+        audio_seconds=args.audio_seconds,
+        youtube_error_rate=args.youtube_error_rate,
+        llm_error_rate=args.llm_error_rate,
+        llm_throttle_rate=args.llm_throttle_rate,
+        seed=args.seed,
+    ))
+    from app import init_app
+    return init_app()
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    server = None
+    if args.base_url:
+        client = HttpClient(args.base_url)
+    else:
+        app = create_app(args)
+        if args.serve:
+            server = start_server(app, port=args.port)
+            print(f"Serving the faked app on http://127.0.0.1:{server.server_port} (Ctrl+C to stop)")
+            try:
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                server.shutdown()
+                return 0
+        if args.mode == "http":
+            server = start_server(app, port=args.port)
+            client = HttpClient(f"http://127.0.0.1:{server.server_port}")
+        else:
+            client = InProcessClient(app)
+
+    try:
+        videos = video_ids(args.videos)
+        if args.warmup:
+            run_load(client, build_workload(args.mix, videos, args.warmup, args.seed + 1), args.concurrency)
+        samples, elapsed = run_load(client, build_workload(args.mix, videos, args.requests, args.seed), args.concurrency)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    report = summarize(samples, elapsed)
+    print(format_report(report))
+
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key not in ("output", "compare")}
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "config": config, "report": report}, file, indent=2)
+        print(f"\nBaseline written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+        lines, regressed = compare(baseline["report"], report, args.tolerance)
+        print(f"\nCompared with {args.compare}:")
+        print("\n".join(lines))
+        if regressed:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+Startup benchmark: how long a fresh worker takes to import the app, create it, answer
+/health and build the video service on first use. Each run is a new interpreter.
+
+    python -m benchmarks.startup --runs 5 --output startup.json
+    python -m benchmarks.startup --runs 5 --compare startup.json
+    python -m benchmarks.startup --importtime 20      # slowest imports of one run
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+from benchmarks.harness import latency_summary
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PHASES = ("import_app", "create_app", "first_health", "ready_for_traffic", "service_init")
+
+# Runs in the child interpreter and prints one JSON object of phase durations in seconds
+PROBE = """
+import json, time
+phases = {}
+started = time.perf_counter()
+from app import init_app
+phases["import_app"] = time.perf_counter() - started
+mark = time.perf_counter()
+app = init_app()
+phases["create_app"] = time.perf_counter() - mark
+mark = time.perf_counter()
+status = app.test_client().get("/health").status_code
+phases["first_health"] = time.perf_counter() - mark
+if status != 200:
+    raise SystemExit(f"/health answered {status}")
+phases["ready_for_traffic"] = time.perf_counter() - started
+if SERVICE:
+    from app.routes.video_routes import video_service
+    mark = time.perf_counter()
+    video_service.get()
+    phases["service_init"] = time.perf_counter() - mark
+print(json.dumps(phases))
+"""
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure cold start of the app in fresh interpreters.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to measure (default: 5).")
+    parser.add_argument("--no-service", action="store_true", help="Skip building the video service.")
+    parser.add_argument("--importtime", type=int, metavar="N", help="Only list the N slowest top-level imports of one run.")
+    parser.add_argument("--output", help="Write the report as a JSON baseline.")
+    parser.add_argument("--compare", help="Compare with a JSON baseline; exits with status 1 on a regression.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed median regression per phase (default: 0.2).")
+    return parser.parse_args(argv)
+
+def child_environment() -> Dict[str, str]:
+    """
+    The current environment plus throwaway store, audio and log directories and a placeholder
+    Groq key, so the service builds without touching real data; nothing calls Groq or YouTube.
+    """
+    env = dict(os.environ)
+    data_directory = tempfile.mkdtemp(prefix="youreview-startup-")
+    env.setdefault("SUMMARY_STORE_PATH", os.path.join(data_directory, "summaries.db"))
+    env.setdefault("OUTPUT_FOLDER", os.path.join(data_directory, "audio"))
+    env.setdefault("LOG_DIRECTORY", os.path.join(data_directory, "logs"))
+    env.setdefault("GROQ_API_KEY", "startup-benchmark")
+    return env
+
+def run_probe(service: bool, env: Dict[str, str], python_options: Tuple[str, ...] = ()) -> Tuple[Dict[str, float], str]:
+    code = f"SERVICE = {service!r}\n{PROBE}"
+    result = subprocess.run(
+        [sys.executable, *python_options, "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Startup probe failed:\n{result.stderr.strip()}")
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+def slowest_imports(stderr: str, count: int) -> List[Tuple[str, float]]:
+    """
+    Top-level modules by cumulative import time, from `python -X importtime` output.
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if not cumulative.isdigit() or line.split("|")[2].startswith("  "):
+            continue
+        imports.append((name, int(cumulative) / 1_000_000))
+    return sorted(imports, key=lambda item: item[1], reverse=True)[:count]
+
+def summarize(samples: List[Dict[str, float]]) -> Dict:
+    phases = {}
+    for name in PHASES:
+        values = [sample[name] for sample in samples if name in sample]
+        if values:
+            phases[name] = latency_summary(values)
+    return {"runs": len(samples), "python": sys.version.split()[0], "phases": phases}
+
+def compare(baseline: Dict, current: Dict, tolerance: float) -> Tuple[List[str], bool]:
+    """
+    Flags phases whose median got slower than the baseline by more than `tolerance`.
+    """
+    lines, regressed = [], False
+    for name, stats in current["phases"].items():
+        previous = baseline.get("phases", {}).get(name)
+        if previous is None:
+            lines.append(f"{name}: not in baseline")
+            continue
+        before, after = previous["p50"], stats["p50"]
+        change = (after - before) / before if before else 0.0
+        flag = "  REGRESSION" if change > tolerance else ""
+        regressed = regressed or bool(flag)
+        lines.append(f"{name:<20} {before:>8.3f}s -> {after:>8.3f}s ({change:+.1%}){flag}")
+    return lines, regressed
+
+def format_report(report: Dict) -> str:
+    lines = [f"{report['runs']} cold starts (Python {report['python']})", "",
+             f"{'phase':<20} {'p50':>8} {'p95':>8} {'max':>8}"]
+    for name, stats in report["phases"].items():
+        lines.append(f"{name:<20} {stats['p50']:>8.3f} {stats['p95']:>8.3f} {stats['max']:>8.3f}")
+    return "\n".join(lines)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    env = child_environment()
+
+    if args.importtime:
+        _, stderr = run_probe(not args.no_service, env, ("-X", "importtime"))
+        for name, seconds in slowest_imports(stderr, args.importtime):
+            print(f"{seconds:>8.3f}s  {name}")
+        return 0
+
+    # One unmeasured run so bytecode compilation is not counted as startup time.
+    run_probe(not args.no_service, env)
+    samples = [run_probe(not args.no_service, env)[0] for _ in range(args.runs)]
+    report = summarize(samples)
+    print(format_report(report))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "report": report}, file, indent=2)
+        print(f"\nBaseline written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+        lines, regressed = compare(baseline["report"], report, args.tolerance)
+        print(f"\nCompared with {args.compare}:")
+        print("\n".join(lines))
+        if regressed:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,28 @@
+"""
+Gunicorn settings: gunicorn -c gunicorn.conf.py main:app
+
+With PRELOAD_SERVICES the master imports the app and the heavy dependencies once and every
+worker is forked from it, so a new or restarted worker is ready in milliseconds. The video
+service itself (thread pools, SQLite connections, the log listener) is still built in each
+worker on first use, because threads do not survive the fork.
+"""
+import gc
+import os
+
+from app.config.config import Config
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+preload_app = Config.PRELOAD_SERVICES
+
+def when_ready(server):
+    if not preload_app:
+        return
+    from app.utils.preload import preload_modules
+
+    timings = preload_modules()
+    server.log.info("Preloaded %s in %.2fs", ", ".join(timings), sum(timings.values()))
+    # Keep the preloaded objects out of the collector so workers do not copy their pages
+    gc.freeze()
@@ -0,0 +1,37 @@
+"""
+Shared fixtures. The fake YouTube and Groq backends are installed when this module is
+imported, before any test can import the service modules, so no test touches the network;
+the summary store, the audio files and the logs go to a temporary directory.
+"""
+import os
+import tempfile
+
+import pytest
+
+from benchmarks import fakes
+from benchmarks.run import UNLIMITED_GROQ
+
+DATA_DIRECTORY = tempfile.mkdtemp(prefix="youreview-tests-")
+os.environ.setdefault("SUMMARY_STORE_PATH", os.path.join(DATA_DIRECTORY, "summaries.db"))
+os.environ.setdefault("OUTPUT_FOLDER", os.path.join(DATA_DIRECTORY, "audio"))
+os.environ.setdefault("LOG_DIRECTORY", os.path.join(DATA_DIRECTORY, "logs"))
+for name, value in UNLIMITED_GROQ.items():
+    os.environ.setdefault(name, value)
+
+fakes.install(fakes.FakeProfile(
+    metadata_latency=fakes.Latency(),
+    captions_latency=fakes.Latency(),
+    audio_latency=fakes.Latency(),
+    llm_latency=fakes.Latency(),
+    transcript_words=300,
+    audio_seconds=5,
+))
+
+@pytest.fixture(scope="session")
+def flask_app():
+    from app import init_app
+    return init_app()
+
+@pytest.fixture
+def client(flask_app):
+    return flask_app.test_client()
@@ -0,0 +1,105 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.utils.admission import AdmissionController, AdmissionRejectedException
+
+def test_admits_up_to_max_concurrency():
+    controller = AdmissionController("test", max_concurrency=2)
+    with controller.slot(), controller.slot():
+        assert controller.stats()["running"] == 2
+    assert controller.stats()["running"] == 0
+    assert controller.stats()["admitted"] == 2
+
+def test_sheds_with_429_when_the_queue_is_full():
+    controller = AdmissionController("test", max_concurrency=1, max_queue=0, default_retry_after=7)
+    with controller.slot():
+        with pytest.raises(AdmissionRejectedException) as error:
+            controller.acquire()
+    assert (error.value.reason, error.value.status_code, error.value.retry_after) == ("queue_full", 429, 7)
+    assert controller.stats()["shed_queue_full"] == 1
+
+def test_sheds_with_503_when_the_wait_runs_out():
+    controller = AdmissionController("test", max_concurrency=1, max_queue=1, queue_timeout=0.01)
+    with controller.slot():
+        with pytest.raises(AdmissionRejectedException) as error:
+            controller.acquire()
+    assert (error.value.reason, error.value.status_code) == ("timeout", 503)
+    assert controller.queue_depth() == 0
+
+def test_release_admits_a_queued_request():
+    controller = AdmissionController("test", max_concurrency=1, max_queue=1, queue_timeout=5)
+    controller.acquire()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        waiter = executor.submit(controller.acquire)
+        while controller.queue_depth() < 1:
+            time.sleep(0.001)
+        controller.release(held=2.0)
+        assert waiter.result(5) >= 0
+    assert controller.stats()["running"] == 1
+    assert controller.stats()["average_hold_seconds"] == 2.0
+
+def test_retry_after_follows_the_hold_time():
+    controller = AdmissionController("test", max_concurrency=1, max_queue=0, max_retry_after=60)
+    controller.acquire()
+    controller.release(held=10.0)
+    with controller.slot():
+        with pytest.raises(AdmissionRejectedException) as error:
+            controller.acquire()
+    assert error.value.retry_after == 10
+
+def test_async_slot_waits_on_the_event_loop():
+    controller = AdmissionController("test", max_concurrency=1, max_queue=1, queue_timeout=5)
+
+    async def scenario():
+        async def hold():
+            async with controller.aslot():
+                await asyncio.sleep(0.1)
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        async with controller.aslot() as waited:
+            assert waited > 0
+        await holder
+
+    asyncio.run(scenario())
+    assert controller.stats()["admitted"] == 2
+    assert controller.stats()["waiting"] == 0
+
+def test_async_waiter_wakes_on_release_from_another_thread():
+    controller = AdmissionController("test", max_concurrency=1, max_queue=1, queue_timeout=5)
+    controller.acquire()
+
+    async def scenario():
+        waiter = asyncio.create_task(controller.aacquire())
+        while controller.queue_depth() < 1:
+            await asyncio.sleep(0.001)
+        released = time.monotonic()
+        await asyncio.get_running_loop().run_in_executor(None, controller.release, 0.0)
+        await waiter
+        return time.monotonic() - released
+
+    assert asyncio.run(scenario()) < 0.02
+    assert controller.stats()["running"] == 1
+
+def test_cancelled_async_waiter_passes_the_slot_on():
+    controller = AdmissionController("test", max_concurrency=1, max_queue=2, queue_timeout=5)
+    controller.acquire()
+
+    async def scenario():
+        first = asyncio.create_task(controller.aacquire())
+        second = asyncio.create_task(controller.aacquire())
+        while controller.queue_depth() < 2:
+            await asyncio.sleep(0.001)
+        # The release wakes the first waiter, which is cancelled before it runs.
+        controller.release(0.0)
+        first.cancel()
+        await asyncio.wait_for(second, 1)
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    asyncio.run(scenario())
+    assert controller.stats()["running"] == 1
+    assert controller.stats()["waiting"] == 0
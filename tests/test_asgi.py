@@ -0,0 +1,59 @@
+"""
+The ASGI entry point (asgi.py) driven through Starlette's TestClient, lifespan included.
+"""
+import json
+
+import pytest
+from starlette.testclient import TestClient
+
+import asgi
+
+
+def _url(video_id):
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+@pytest.fixture(scope="module")
+def asgi_client():
+    with TestClient(asgi.app) as client:
+        yield client
+
+def test_summary_runs_on_the_event_loop(asgi_client):
+    response = asgi_client.post("/api/generate_video_summary", json={"url": _url("asgi0000001")})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["title"] == "Benchmark video asgi0000001"
+    assert body["summary"]
+    assert "total;dur=" in response.headers["Server-Timing"]
+    assert response.headers["X-Request-ID"]
+
+def test_summary_rejects_bad_requests(asgi_client):
+    response = asgi_client.post("/api/generate_video_summary", json={"url": "https://example.com/video"})
+    assert response.status_code == 422
+    assert response.json()["success"] is False
+
+def test_stream_sends_server_sent_events(asgi_client):
+    response = asgi_client.get("/api/generate_video_summary/stream", params={"url": _url("asgi0000002")})
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/event-stream")
+    events = [message.split("\n", 1)[0] for message in response.text.strip().split("\n\n")]
+    assert events[0] == "event: metadata"
+    assert events[-1] == "event: done"
+
+def test_batch_streams_ndjson(asgi_client):
+    response = asgi_client.post("/api/generate_video_summary/batch", json={"urls": [_url("asgi0000003"), "not a video"]})
+    assert response.status_code == 200
+    *lines, totals = [json.loads(line) for line in response.text.strip().splitlines()]
+    assert sorted(line["success"] for line in lines) == [False, True]
+    assert (totals["succeeded"], totals["failed"]) == (1, 1)
+
+def test_other_routes_fall_through_to_flask(asgi_client):
+    assert asgi_client.get("/health").status_code == 200
+    assert asgi_client.get("/api/jobs/missing").status_code == 404
+
+def test_cors_preflight(asgi_client):
+    response = asgi_client.options("/api/generate_video_summary", headers={
+        "Origin": "http://localhost:5173",
+        "Access-Control-Request-Method": "POST",
+    })
+    assert response.status_code == 200
+    assert response.headers["Access-Control-Allow-Origin"] == "http://localhost:5173"
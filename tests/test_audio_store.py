@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+from app.utils.audio_store import AudioStore
+
+UPLOAD_DATE = 1_000_000_000
+
+@pytest.fixture
+def store(tmp_path):
+    return AudioStore(str(tmp_path), quota_bytes=0, grace_period=0)
+
+def _commit(store, video_id, size=100, mtime=None):
+    staging_directory = store.create_staging_directory()
+    staged_file = os.path.join(staging_directory, f"{video_id}.mp3")
+    with open(staged_file, "wb") as file:
+        file.write(b"\0" * size)
+    if mtime is not None:
+        os.utime(staged_file, (mtime, mtime))
+    path = store.commit(staged_file, video_id, "mp3", "192")
+    store.discard_staging_directory(staging_directory)
+    return path
+
+def test_commit_records_the_store_time_not_the_download_mtime(tmp_path):
+    store = AudioStore(str(tmp_path), quota_bytes=0, grace_period=60)
+    path = _commit(store, "abcdefghijk", mtime=UPLOAD_DATE)
+    assert os.path.getmtime(path) > UPLOAD_DATE
+    assert store.enforce_quota() == 0
+    assert os.path.exists(path)
+
+def test_use_keeps_the_mtime(store):
+    path = _commit(store, "abcdefghijk")
+    stored_at = os.stat(path).st_mtime_ns
+    os.utime(path, ns=(0, stored_at))
+    assert store.acquire_existing("abcdefghijk", "mp3", "192") == path
+    assert os.stat(path).st_mtime_ns == stored_at
+    assert os.stat(path).st_atime_ns > 0
+
+def test_least_recently_used_files_are_evicted_first(tmp_path):
+    store = AudioStore(str(tmp_path), quota_bytes=100, grace_period=0)
+    first, second = _commit(store, "first000000"), _commit(store, "second00000")
+    os.utime(first, (UPLOAD_DATE, os.path.getmtime(first)))
+    os.utime(second, (UPLOAD_DATE + 1, os.path.getmtime(second)))
+    store.release(store.acquire_existing("first000000", "mp3", "192"))
+
+    assert store.enforce_quota() == 100
+    assert os.path.exists(first)
+    assert not os.path.exists(second)
+
+def test_referenced_files_are_kept(store):
+    path = _commit(store, "abcdefghijk")
+    store.acquire(path)
+    assert store.enforce_quota() == 0
+    store.release(path)
+    assert store.enforce_quota() == 100
+    assert store.acquire_existing("abcdefghijk", "mp3", "192") is None
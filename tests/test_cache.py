@@ -0,0 +1,47 @@
+from app.utils.cache import VideoCache
+
+def test_least_recently_used_entry_is_evicted():
+    cache = VideoCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a").value == 1
+    assert cache.get("c").value == 3
+
+def test_expired_entries_are_dropped():
+    cache = VideoCache(ttl=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+def test_negative_entries_keep_the_error():
+    cache = VideoCache(negative_ttl=60)
+    cache.set_error("a", "Video unavailable")
+    entry = cache.get("a")
+    assert entry.value is None
+    assert entry.error == "Video unavailable"
+
+def test_negative_entries_use_their_own_ttl():
+    cache = VideoCache(ttl=60, negative_ttl=0)
+    cache.set_error("a", "Video unavailable")
+    assert cache.get("a") is None
+
+def test_disk_tier_outlives_the_memory_tier(tmp_path):
+    VideoCache(directory=str(tmp_path)).set("a", {"title": "Video"})
+    entry = VideoCache(directory=str(tmp_path)).get("a")
+    assert entry.value == {"title": "Video"}
+    assert entry.error is None
+
+def test_delete_removes_both_tiers(tmp_path):
+    cache = VideoCache(directory=str(tmp_path))
+    cache.set("a", 1)
+    cache.delete("a")
+    assert cache.get("a") is None
+    assert list(tmp_path.iterdir()) == []
+
+def test_unserializable_values_stay_in_memory(tmp_path):
+    cache = VideoCache(directory=str(tmp_path))
+    cache.set("a", object())
+    assert cache.get("a") is not None
+    assert list(tmp_path.iterdir()) == []
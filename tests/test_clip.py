@@ -0,0 +1,46 @@
+import pytest
+
+from app.utils.clip import ClipRange, InvalidClipException, parse_clip, parse_timestamp
+
+@pytest.mark.parametrize("value, seconds", [
+    (90, 90.0),
+    (12.5, 12.5),
+    ("90", 90.0),
+    ("1:30", 90.0),
+    ("01:02:03", 3723.0),
+    (" 2:05.5 ", 125.5),
+])
+def test_parse_timestamp(value, seconds):
+    assert parse_timestamp(value) == seconds
+
+@pytest.mark.parametrize("value", ["abc", "1:2:3:4", "-5", -5, True, "1:-2"])
+def test_parse_timestamp_rejects_invalid_values(value):
+    with pytest.raises(InvalidClipException):
+        parse_timestamp(value)
+
+def test_parse_clip_without_bounds_is_the_whole_video():
+    assert parse_clip() is None
+    assert parse_clip("", "") is None
+
+def test_parse_clip_fills_in_the_missing_bound():
+    assert parse_clip(start="1:00") == ClipRange(60.0, None)
+    assert parse_clip(end="2:00") == ClipRange(0.0, 120.0)
+
+def test_parse_clip_rejects_empty_ranges():
+    with pytest.raises(InvalidClipException):
+        parse_clip("2:00", "1:00")
+    with pytest.raises(InvalidClipException):
+        parse_clip(60, 60)
+
+def test_bounded_clamps_to_the_video_duration():
+    assert ClipRange(60, None).bounded(300) == ClipRange(60, 300.0)
+    assert ClipRange(60, 500).bounded(300) == ClipRange(60, 300)
+    assert ClipRange(60, 120).bounded(None) == ClipRange(60, 120)
+    with pytest.raises(InvalidClipException):
+        ClipRange(300, None).bounded(300)
+
+def test_key_and_duration():
+    assert ClipRange(180, 300).key() == "180-300"
+    assert ClipRange(1.5, None).key() == "1.5-end"
+    assert ClipRange(180, 300).duration == 120
+    assert ClipRange(180, None).duration is None
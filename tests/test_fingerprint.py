@@ -0,0 +1,96 @@
+import random
+
+import pytest
+
+from app.utils.fingerprint import SimHashIndex, hamming_distance, simhash, to_signed, to_unsigned
+
+def _words(seed, count=400):
+    rng = random.Random(seed)
+    return [f"palabra{rng.randrange(2000)}" for _ in range(count)]
+
+def _flip(fingerprint, *bits):
+    for bit in bits:
+        fingerprint ^= 1 << bit
+    return fingerprint
+
+def test_simhash_ignores_case_punctuation_and_spacing():
+    assert simhash("Hola, mundo.  ¿Qué tal?") == simhash("hola mundo qué tal")
+
+def test_near_duplicates_are_close_and_different_texts_are_not():
+    words = _words(1)
+    edited = list(words)
+    edited[200] = "cambiada"
+    original = simhash(" ".join(words))
+    assert hamming_distance(original, simhash(" ".join(edited))) <= 5
+    assert hamming_distance(original, simhash(" ".join(_words(2)))) > 10
+
+def test_short_texts_have_no_fingerprint():
+    assert simhash("") is None
+    assert simhash("solo tres palabras", min_words=5) is None
+
+@pytest.mark.parametrize("fingerprint", [0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1])
+def test_signed_round_trip(fingerprint):
+    signed = to_signed(fingerprint)
+    assert -(1 << 63) <= signed < 1 << 63
+    assert to_unsigned(signed) == fingerprint
+
+def test_search_finds_entries_within_max_distance():
+    index = SimHashIndex(max_distance=3)
+    base = 0x0123456789ABCDEF
+    index.add(base, 1)
+    index.add(_flip(base, 0, 17, 40), 2)
+    index.add(_flip(base, 0, 17, 40, 63), 3)
+
+    matches = index.search(base)
+    assert [(match.ref, match.distance) for match in matches] == [(1, 0), (2, 3)]
+    assert index.search(base, limit=1)[0].ref == 1
+
+def test_every_band_layout_finds_its_worst_case():
+    rng = random.Random(0)
+    for max_distance in range(8):
+        index = SimHashIndex(max_distance)
+        base = rng.getrandbits(64)
+        near = _flip(base, *rng.sample(range(64), max_distance))
+        index.add(near, 1)
+        assert [match.ref for match in index.search(base)] == [1]
+
+def test_invalid_max_distance():
+    with pytest.raises(ValueError):
+        SimHashIndex(max_distance=8)
+
+def test_add_many_matches_single_adds():
+    rng = random.Random(1)
+    entries = [(rng.getrandbits(64), ref) for ref in range(100)]
+    bulk, single = SimHashIndex(), SimHashIndex()
+    bulk.add_many(entries)
+    for fingerprint, ref in entries:
+        single.add(fingerprint, ref)
+    assert len(bulk) == len(single) == 100
+    for fingerprint, ref in entries:
+        assert bulk.search(fingerprint) == single.search(fingerprint)
+        assert bulk.search(fingerprint)[0].ref == ref
+
+def test_remove_drops_the_entry():
+    index = SimHashIndex()
+    index.add(42, 1)
+    index.add(42, 2)
+    assert not index.remove(42, 3)
+    assert index.remove(42, 1)
+    assert not index.remove(42, 1)
+    assert [match.ref for match in index.search(42)] == [2]
+    assert len(index) == 1
+
+def test_index_compacts_once_removed_entries_dominate():
+    rng = random.Random(2)
+    entries = [(rng.getrandbits(64), ref) for ref in range(200)]
+    index = SimHashIndex()
+    index.add_many(entries)
+    for fingerprint, ref in entries[:150]:
+        assert index.remove(fingerprint, ref)
+
+    assert len(index) == 50
+    assert len(index._fingerprints) < 200
+    for fingerprint, ref in entries[150:]:
+        assert index.search(fingerprint)[0].ref == ref
+    for fingerprint, _ in entries[:150]:
+        assert all(match.distance > 0 for match in index.search(fingerprint))
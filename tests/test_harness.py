@@ -0,0 +1,41 @@
+import shutil
+
+from app.config.config import Config
+from benchmarks.harness import InProcessClient, Sample, build_workload, compare, percentile, run_load, summarize, video_ids
+
+def test_percentile_is_nearest_rank():
+    values = [float(value) for value in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile([], 95) == 0.0
+
+def test_summarize_counts_errors_per_endpoint():
+    samples = [
+        Sample("summary", 200, 1.0, 10, {"llm": 0.8}),
+        Sample("summary", 503, 0.1, 0, {}),
+        Sample("audio", 0, 0.2, 0, {}),
+    ]
+    report = summarize(samples, elapsed=2.0)
+    assert report["errors"] == 2
+    assert report["endpoints"]["summary"]["status"] == {"200": 1, "503": 1}
+    assert report["stages"]["llm"]["count"] == 1
+
+def test_compare_flags_p95_regressions():
+    samples = [Sample("summary", 200, 1.0, 10, {})]
+    baseline = summarize(samples, elapsed=1.0)
+    assert not compare(baseline, baseline)[1]
+    slower = summarize([Sample("summary", 200, 1.5, 10, {})], elapsed=1.5)
+    lines, regressed = compare(baseline, slower)
+    assert regressed
+    assert any("endpoint summary p95" in line and "REGRESSION" in line for line in lines)
+
+def test_workload_runs_without_errors(flask_app):
+    mix = {"summary": 3, "stream": 1}
+    if shutil.which(Config.FFMPEG_PATH):
+        mix["audio"] = 1
+    workload = build_workload(mix, video_ids(5), total=30, seed=1)
+    samples, elapsed = run_load(InProcessClient(flask_app), workload, concurrency=4)
+    report = summarize(samples, elapsed)
+    assert report["requests"] == 30
+    assert report["errors"] == 0, report["endpoints"]
+    assert sum(sample.size for sample in samples if sample.endpoint == "summary") > 0
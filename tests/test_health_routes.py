@@ -0,0 +1,51 @@
+"""
+Liveness and readiness probes while the video service is still being built.
+"""
+import threading
+import time
+
+from app.routes import video_routes
+from app.utils.lazy import LazyService
+
+def test_health_never_builds_the_service(client, monkeypatch):
+    service = LazyService("video", lambda: video_routes.video_service.get())
+    monkeypatch.setattr("app.routes.health_routes.video_service", service)
+    assert client.get("/health").get_json() == {"status": "ok"}
+    assert not service.ready
+
+def test_ready_reports_starting_until_the_service_is_built(client, monkeypatch):
+    release = threading.Event()
+
+    def build():
+        release.wait(5)
+        return video_routes.video_service.get()
+
+    service = LazyService("video", build)
+    monkeypatch.setattr("app.routes.health_routes.video_service", service)
+
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.get_json() == {"status": "starting"}
+    assert response.headers["Retry-After"]
+
+    release.set()
+    service.get()
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.get_json()["status"] == "ready"
+    assert response.get_json()["init_seconds"] >= 0
+
+def test_ready_reports_a_failed_build(client, monkeypatch):
+    def build():
+        raise RuntimeError("no API key")
+
+    service = LazyService("video", build, retry_interval=60)
+    monkeypatch.setattr("app.routes.health_routes.video_service", service)
+    client.get("/ready")
+    give_up_at = time.monotonic() + 5
+    while service.error is None and time.monotonic() < give_up_at:
+        time.sleep(0.001)
+
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.get_json() == {"status": "error", "error": "no API key"}
@@ -0,0 +1,62 @@
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import pytest
+
+from app.services.job_service import FAILED, SUCCEEDED, JobService, QueueFullException
+
+@pytest.fixture
+def jobs():
+    service = JobService(workers=1, queue_size=1)
+    yield service
+    service._executor.shutdown(wait=True)
+
+def test_job_returns_its_result(jobs):
+    job = jobs.submit("a", lambda: 42)
+    assert job.wait(5) == 42
+    assert job.status == SUCCEEDED
+    assert job.result == 42
+    assert jobs.get(job.id) is job
+
+def test_same_key_reuses_the_job(jobs):
+    first = jobs.submit("a", lambda: 1)
+    first.wait(5)
+    assert jobs.submit("a", lambda: 2) is first
+
+def test_failed_jobs_are_retried(jobs):
+    def fail():
+        raise ValueError("boom")
+
+    failed = jobs.submit("a", fail)
+    with pytest.raises(ValueError):
+        failed.wait(5)
+    assert failed.status == FAILED
+    assert isinstance(failed.error, ValueError)
+
+    retried = jobs.submit("a", lambda: 1)
+    assert retried is not failed
+    assert retried.wait(5) == 1
+
+def test_full_queue_rejects_new_keys(jobs):
+    release = threading.Event()
+    running = jobs.submit("a", lambda: release.wait(5))
+    queued = jobs.submit("b", lambda: 2)
+    with pytest.raises(QueueFullException) as error:
+        jobs.submit("c", lambda: 3)
+    assert (error.value.queue_depth, error.value.queue_capacity) == (2, 2)
+
+    release.set()
+    assert running.wait(5) is True
+    assert queued.wait(5) == 2
+    assert jobs.queue_depth() == 0
+
+def test_wait_times_out(jobs):
+    release = threading.Event()
+    job = jobs.submit("a", lambda: release.wait(5))
+    with pytest.raises(FutureTimeoutError):
+        job.wait(0.01)
+    release.set()
+    job.wait(5)
+
+def test_unknown_job_is_none(jobs):
+    assert jobs.get("missing") is None
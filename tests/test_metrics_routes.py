@@ -0,0 +1,46 @@
+"""
+Request instrumentation: the Server-Timing and X-Request-ID headers and the /metrics exposition.
+"""
+import re
+
+def _url(video_id):
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+def _server_timing(response):
+    """
+    {metric: milliseconds} from a Server-Timing header.
+    """
+    timings = {}
+    for metric in response.headers["Server-Timing"].split(","):
+        name, duration = metric.strip().split(";dur=")
+        timings[name] = float(duration)
+    return timings
+
+def test_responses_carry_the_stage_timings(client):
+    response = client.post("/api/generate_video_summary", json={"url": _url("test0000026")},
+                           headers={"X-Request-ID": "trace-26"})
+    assert response.status_code == 200
+    timings = _server_timing(response)
+    assert {"validate_url", "extract_info", "transcript", "llm", "total"} <= set(timings)
+    assert all(duration >= 0 for duration in timings.values())
+    assert response.headers["X-Request-ID"] == "trace-26"
+
+def test_invalid_request_ids_are_replaced(client):
+    response = client.get("/health", headers={"X-Request-ID": "not a token"})
+    assert re.fullmatch(r"[0-9a-f]{32}", response.headers["X-Request-ID"])
+
+def test_metrics_exposes_the_stage_histograms(client):
+    client.post("/api/generate_video_summary", json={"url": _url("test0000027")})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    body = response.get_data(as_text=True)
+
+    assert "# TYPE youreview_stage_duration_seconds histogram" in body
+    for stage in ("extract_info", "transcript", "llm"):
+        assert f'youreview_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}}' in body
+        assert f'youreview_stage_duration_seconds_sum{{stage="{stage}"}}' in body
+        assert f'youreview_stage_duration_seconds_count{{stage="{stage}"}}' in body
+    assert re.search(
+        r'^youreview_http_requests_total\{endpoint="/api/generate_video_summary",status="200"\} [1-9]', body, re.MULTILINE
+    )
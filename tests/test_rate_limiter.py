@@ -0,0 +1,164 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.utils.rate_limiter import AIMDConcurrencyLimiter, RateLimiter, RateLimitExceededError, TokenBucket
+
+class APIError(Exception):
+    """
+    Shaped like a Groq API error: a status code and a response carrying the headers.
+    """
+
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+        self.response = SimpleNamespace(status_code=status_code, headers=headers)
+
+def test_token_bucket_admits_up_to_capacity_without_waiting():
+    bucket = TokenBucket(per_minute=60)
+    assert bucket.reserve(60) == 0.0
+    assert bucket.reserve(30) == pytest.approx(30.0, abs=0.1)
+
+def test_token_bucket_clamps_oversized_reservations():
+    bucket = TokenBucket(per_minute=60, capacity=10)
+    assert bucket.reserve(1000) == 0.0
+    assert bucket.level() == pytest.approx(0.0, abs=0.1)
+
+def test_token_bucket_refund_and_pause():
+    bucket = TokenBucket(per_minute=60)
+    bucket.reserve(60)
+    bucket.refund(60)
+    assert bucket.level() == pytest.approx(60.0)
+    bucket.pause(5)
+    assert bucket.reserve(1) == pytest.approx(6.0, abs=0.1)
+
+def test_aimd_grows_on_success_and_halves_on_throttle():
+    limiter = AIMDConcurrencyLimiter(initial=4, maximum=8, decrease_interval=60)
+    # Each success adds 1/limit, so a limit's worth of successes raises it by about one.
+    for _ in range(5):
+        assert limiter.try_acquire()
+        limiter.release()
+    assert limiter.limit == 5
+
+    limiter.try_acquire()
+    limiter.release(throttled=True)
+    assert limiter.limit == 2
+    # A second 429 in the same interval is part of the same congestion signal.
+    limiter.try_acquire()
+    limiter.release(throttled=True)
+    assert limiter.limit == 2
+
+def test_aimd_discard_leaves_the_limit_unchanged():
+    limiter = AIMDConcurrencyLimiter(initial=2)
+    assert limiter.try_acquire() and limiter.try_acquire()
+    assert not limiter.try_acquire()
+    assert not limiter.acquire(timeout=0.01)
+    limiter.discard()
+    limiter.discard()
+    assert limiter.stats() == {"limit": 2, "in_flight": 0}
+
+def test_aimd_async_waiters_wake_on_release():
+    limiter = AIMDConcurrencyLimiter(initial=1)
+    assert limiter.try_acquire()
+
+    async def scenario():
+        waiter = asyncio.create_task(limiter.aacquire(timeout=5))
+        await asyncio.sleep(0.01)
+        released = time.monotonic()
+        await asyncio.get_running_loop().run_in_executor(None, limiter.discard)
+        assert await waiter
+        return time.monotonic() - released
+
+    assert asyncio.run(scenario()) < 0.02
+    assert limiter.stats() == {"limit": 1, "in_flight": 1}
+
+def test_aimd_async_acquire_times_out():
+    limiter = AIMDConcurrencyLimiter(initial=1)
+    assert limiter.try_acquire()
+    assert not asyncio.run(limiter.aacquire(timeout=0.01))
+    assert limiter.stats() == {"limit": 1, "in_flight": 1}
+
+def test_aimd_cancelled_async_waiter_passes_the_slot_on():
+    limiter = AIMDConcurrencyLimiter(initial=1)
+    assert limiter.try_acquire()
+
+    async def scenario():
+        first = asyncio.create_task(limiter.aacquire(timeout=5))
+        second = asyncio.create_task(limiter.aacquire(timeout=5))
+        await asyncio.sleep(0.01)
+        # The discard wakes the first waiter, which is cancelled before it runs.
+        limiter.discard()
+        first.cancel()
+        assert await asyncio.wait_for(second, 1)
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    asyncio.run(scenario())
+    assert limiter.stats() == {"limit": 1, "in_flight": 1}
+
+def test_slot_releases_by_outcome():
+    limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=100000, initial_concurrency=4)
+
+    with pytest.raises(APIError):
+        with limiter.slot(10):
+            raise APIError(500)
+    assert limiter.concurrency.stats() == {"limit": 4, "in_flight": 0}
+
+    with pytest.raises(APIError):
+        with limiter.slot(10):
+            raise APIError(429)
+    assert limiter.concurrency.stats() == {"limit": 2, "in_flight": 0}
+
+    with limiter.slot(10):
+        pass
+    assert limiter.concurrency.stats()["in_flight"] == 0
+
+def test_call_retries_retryable_errors():
+    limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=100000, backoff_base=0.0)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise APIError(503)
+        return "ok"
+
+    assert limiter.call(flaky, tokens=10) == "ok"
+    assert len(attempts) == 3
+    assert limiter.stats()["retries"] == 2
+
+def test_call_raises_non_retryable_errors_at_once():
+    limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=100000, backoff_base=0.0)
+    attempts = []
+
+    def invalid():
+        attempts.append(1)
+        raise APIError(400)
+
+    with pytest.raises(APIError):
+        limiter.call(invalid, tokens=10)
+    assert len(attempts) == 1
+
+def test_call_gives_up_on_throttling_with_retry_after():
+    limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=100000, max_retries=0)
+
+    def throttled():
+        raise APIError(429, retry_after=2.0)
+
+    with pytest.raises(RateLimitExceededError) as error:
+        limiter.call(throttled, tokens=10)
+    assert error.value.retry_after == 2.0
+    assert limiter.stats()["throttled"] == 1
+
+def test_saturated_bucket_fails_fast_and_refunds():
+    limiter = RateLimiter(requests_per_minute=1, tokens_per_minute=100000, acquire_timeout=1.0)
+    with limiter.slot(10):
+        pass
+    with pytest.raises(RateLimitExceededError):
+        with limiter.slot(10):
+            pass
+    assert limiter.concurrency.stats()["in_flight"] == 0
+    assert limiter.tokens.level() == pytest.approx(99990, abs=10)
@@ -0,0 +1,62 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.utils.single_flight import SingleFlight
+
+def _wait_for_participants(flight, key, count, timeout=5.0):
+    give_up_at = time.monotonic() + timeout
+    while flight._calls[key].participants < count:
+        assert time.monotonic() < give_up_at, "callers did not join the flight"
+        time.sleep(0.001)
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls, completions = [], []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        leader = executor.submit(flight.do, "key", work, lambda result, participants: completions.append(participants))
+        assert started.wait(5)
+        followers = [executor.submit(flight.do, "key", work) for _ in range(3)]
+        _wait_for_participants(flight, "key", 4)
+        release.set()
+        results = [leader.result(5)] + [future.result(5) for future in followers]
+
+    assert results == ["result"] * 4
+    assert calls == [1]
+    assert completions == [4]
+    assert flight.in_flight() == 0
+
+def test_leader_exception_reaches_every_caller():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(flight.do, "key", fail)
+        assert started.wait(5)
+        follower = executor.submit(flight.do, "key", fail)
+        _wait_for_participants(flight, "key", 2)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result(5)
+    assert flight.in_flight() == 0
+
+def test_later_calls_run_again():
+    flight = SingleFlight()
+    assert flight.do("key", lambda: 1) == 1
+    assert flight.do("key", lambda: 2) == 2
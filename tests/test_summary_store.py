@@ -0,0 +1,30 @@
+from app.utils.summary_store import SQLiteSummaryBackend, SummaryStore
+
+def _backend(tmp_path):
+    return SQLiteSummaryBackend(str(tmp_path / "summaries.db"))
+
+def test_reads_only_see_the_current_prompt_version(tmp_path):
+    backend = _backend(tmp_path)
+    old = SummaryStore(backend, "v1", "model")
+    old.set("video", "old summary")
+
+    # A worker on the new prompt starts while the old one is still serving (rolling deploy).
+    new = SummaryStore(backend, "v2", "model")
+    assert new.get("video") is None
+    assert old.get("video") == "old summary"
+
+    new.set("video", "new summary")
+    assert new.get("video") == "new summary"
+    assert old.get("video") == "old summary"
+
+def test_purges_other_versions_once_unused_for_the_ttl(tmp_path):
+    backend = _backend(tmp_path)
+    SummaryStore(backend, "v1", "model").set("video", "old summary")
+    current = SummaryStore(backend, "v2", "model", stale_version_ttl=3600)
+    current.set("video", "new summary")
+    assert current.purge_stale_versions() == 0
+
+    current.stale_version_ttl = 0
+    assert current.purge_stale_versions() == 1
+    assert SummaryStore(backend, "v1", "model").get("video") is None
+    assert current.get("video") == "new summary"
@@ -0,0 +1,45 @@
+from app.utils.transcript import TranscriptSegments, compress_transcript
+
+def test_compress_removes_markers_and_fillers():
+    text = "[Música] hola um a todos ♪ (risas) uh, bienvenidos"
+    assert compress_transcript(text) == "hola a todos bienvenidos"
+
+def test_compress_collapses_repeated_phrases():
+    assert compress_transcript("hoy vamos a ver hoy vamos a ver cómo funciona") == "hoy vamos a ver cómo funciona"
+    assert compress_transcript("sí sí Sí claro") == "sí claro"
+
+def test_compress_keeps_distinct_words():
+    assert compress_transcript("uno dos tres uno dos") == "uno dos tres uno dos"
+
+def _segments():
+    return TranscriptSegments.from_captions([
+        (10.0, 5.0, "tercero"),
+        (0.0, 5.0, "primero"),
+        (5.0, 5.0, "segundo"),
+    ])
+
+def test_segments_are_sorted_into_one_text():
+    segments = _segments()
+    assert segments.text == "primero segundo tercero"
+    assert segments.starts == [0.0, 5.0, 10.0]
+    assert segments.duration == 15.0
+
+def test_window_returns_the_overlapping_segments():
+    segments = _segments()
+    assert segments.window() == "primero segundo tercero"
+    assert segments.window(5.0, 10.0) == "segundo"
+    assert segments.window(4.0, 6.0) == "primero segundo"
+    assert segments.window(12.0) == "tercero"
+    assert segments.window(20.0) == ""
+
+def test_dict_round_trip():
+    segments = _segments()
+    restored = TranscriptSegments.from_dict(segments.to_dict())
+    assert restored.to_dict() == segments.to_dict()
+    assert restored.window(5.0, 10.0) == "segundo"
+
+def test_empty_transcript():
+    segments = TranscriptSegments.from_captions([])
+    assert segments.text == ""
+    assert segments.duration == 0.0
+    assert segments.window() == ""
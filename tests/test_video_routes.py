@@ -0,0 +1,245 @@
+"""
+End-to-end tests of the API over the fake YouTube and Groq backends (see conftest.py).
+"""
+import json
+import os
+import shutil
+import time
+
+import pytest
+
+from app.config.config import Config
+from benchmarks import fakes
+
+requires_ffmpeg = pytest.mark.skipif(shutil.which(Config.FFMPEG_PATH) is None, reason="ffmpeg is not installed")
+
+def _url(video_id):
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+def _events(body):
+    """
+    (event, data) pairs of a server-sent event stream.
+    """
+    events = []
+    for message in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in message.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+def test_generate_video_summary(client):
+    response = client.post("/api/generate_video_summary", json={"url": _url("test0000001")})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["title"] == "Benchmark video test0000001"
+    assert body["summary"].startswith("<h2>Resumen</h2>")
+    assert body["transcription"]
+    assert body["clip"] is None
+    assert body["llm"]["cached"] is False
+    assert body["prompt_tokens"]["after_compression"] <= body["prompt_tokens"]["before_compression"]
+    assert "total;dur=" in response.headers["Server-Timing"]
+
+    # Any URL form of the same video is answered from the finished job.
+    again = client.post("/api/generate_video_summary", json={"url": "https://youtu.be/test0000001"})
+    assert again.status_code == 200
+    assert again.get_json() == body
+
+def test_generate_video_summary_of_a_clip(client):
+    response = client.post("/api/generate_video_summary", json={"url": _url("test0000002"), "start": "0:30", "end": 90})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["clip"]["start"] == 30 and body["clip"]["end"] == 90
+    assert len(body["transcription"]) < len(client.post(
+        "/api/generate_video_summary", json={"url": _url("test0000002")}
+    ).get_json()["transcription"])
+
+def test_stream_reuses_the_stored_summary(client):
+    summary = client.post("/api/generate_video_summary", json={"url": _url("test0000007")}).get_json()["summary"]
+
+    response = client.get("/api/generate_video_summary/stream", query_string={"url": _url("test0000007")})
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    events = _events(response.get_data(as_text=True))
+    assert [name for name, _ in events] == ["metadata", "summary", "done"]
+    assert "".join(data["chunk"] for name, data in events if name == "summary") == summary
+    assert events[-1][1]["llm"]["cached"] is True
+
+def test_requests_inside_a_pushed_request_context(flask_app, client):
+    # pytest-flask and similar tools keep a request context pushed around the test client.
+    with flask_app.test_request_context():
+        response = client.get("/api/generate_video_summary/stream", query_string={"url": _url("test0000008")})
+        assert response.status_code == 200
+        assert _events(response.get_data(as_text=True))[-1][0] == "done"
+        assert client.post("/api/generate_video_summary", json={"url": _url("test0000008")}).status_code == 200
+
+@pytest.mark.parametrize("payload, status_code", [
+    ({"url": "https://example.com/video"}, 422),
+    ({"url": ""}, 422),
+    ({"url": _url("test0000003"), "start": 90, "end": 30}, 422),
+])
+def test_generate_video_summary_rejects_bad_requests(client, payload, status_code):
+    response = client.post("/api/generate_video_summary", json=payload)
+    assert response.status_code == status_code
+    assert response.get_json()["success"] is False
+
+def test_async_summary_job(client):
+    response = client.post("/api/generate_video_summary", json={"url": _url("test0000004"), "async": True})
+    assert response.status_code == 202
+    job_id = response.get_json()["job_id"]
+
+    give_up_at = time.monotonic() + 10
+    while True:
+        job = client.get(f"/api/jobs/{job_id}").get_json()
+        if job["status"] not in ("pending", "running") or time.monotonic() > give_up_at:
+            break
+        time.sleep(0.01)
+    assert job["status"] == "succeeded"
+    assert job["result"]["title"] == "Benchmark video test0000004"
+
+    assert client.get("/api/jobs/missing").status_code == 404
+
+@requires_ffmpeg
+def test_download_audio(client):
+    response = client.get("/api/download_audio", query_string={"url": _url("test0000005"), "stream": "false"})
+    assert response.status_code == 200
+    assert response.mimetype == "audio/mp3"
+    assert response.data[:3] == b"ID3" or response.data[0] == 0xFF
+    assert response.headers["Content-Disposition"].startswith("attachment;")
+    assert response.headers["Content-Disposition"].rstrip('"').endswith(".mp3")
+
+    clip = client.get("/api/download_audio", query_string={"url": _url("test0000005"), "start": 1, "end": 2})
+    assert clip.status_code == 200
+    assert 0 < len(clip.data) < len(response.data)
+
+@requires_ffmpeg
+def test_download_audio_streams(client):
+    response = client.get("/api/download_audio", query_string={"url": _url("test0000006"), "stream": "true"})
+    assert response.status_code == 200
+    assert len(response.data) > 0
+
+def _stored_audio(client, video_id, **headers):
+    return client.get("/api/download_audio", query_string={"url": _url(video_id), "stream": "false"}, headers=headers)
+
+@requires_ffmpeg
+def test_download_audio_serves_ranges(client):
+    full = _stored_audio(client, "test0000009")
+    response = _stored_audio(client, "test0000009", Range="bytes=0-99")
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == f"bytes 0-99/{len(full.data)}"
+    assert response.data == full.data[:100]
+
+@requires_ffmpeg
+def test_download_audio_answers_conditional_requests(client):
+    etag = _stored_audio(client, "test0000009").headers["ETag"]
+    response = _stored_audio(client, "test0000009", **{"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+
+@requires_ffmpeg
+def test_download_audio_etag_changes_with_the_file(client):
+    etag = _stored_audio(client, "test0000010").headers["ETag"]
+    # A file evicted and stored again has other bytes under the same name.
+    path = os.path.join(Config.OUTPUT_FOLDER, "test0000010-192.mp3")
+    with open(path, "ab") as file:
+        file.write(b"\0" * 16)
+    response = _stored_audio(client, "test0000010", **{"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+@requires_ffmpeg
+@pytest.mark.parametrize("offload, header, value", [
+    ("x-accel", "X-Accel-Redirect", "/protected-audio/test0000011-192.mp3"),
+    ("x-sendfile", "X-Sendfile", os.path.join(Config.OUTPUT_FOLDER, "test0000011-192.mp3")),
+])
+def test_download_audio_offloads_to_the_proxy(client, monkeypatch, offload, header, value):
+    monkeypatch.setattr(Config, "AUDIO_OFFLOAD", offload)
+    response = _stored_audio(client, "test0000011")
+    assert response.status_code == 200
+    assert response.headers[header] == value
+    assert response.data == b""
+    assert response.headers["Content-Disposition"].startswith("attachment;")
+
+    again = _stored_audio(client, "test0000011", **{"If-None-Match": response.headers["ETag"]})
+    assert again.status_code == 304
+    assert header not in again.headers
+
+def _stages(response):
+    return [metric.split(";", 1)[0].strip() for metric in response.headers.get("Server-Timing", "").split(",")]
+
+@requires_ffmpeg
+@pytest.mark.parametrize("video_id, query, headers, mimetype", [
+    ("test0000013", {"codec": "webm"}, {}, "audio/webm"),
+    ("test0000014", {"codec": "opus"}, {}, "audio/webm"),
+    ("test0000015", {"codec": "aac"}, {}, "audio/mp4"),
+    ("test0000016", {}, {"Accept": "audio/webm"}, "audio/webm"),
+    ("test0000017", {}, {"Accept": "audio/mp4, audio/mpeg;q=0.5"}, "audio/mp4"),
+    ("test0000018", {}, {"Accept": "*/*"}, "audio/mp3"),
+    ("test0000019", {}, {"Accept": "audio/*"}, "audio/mp3"),
+    ("test0000020", {"codec": "mp3"}, {"Accept": "audio/webm"}, "audio/mp3"),
+])
+def test_download_audio_selects_the_codec(client, video_id, query, headers, mimetype):
+    response = client.get("/api/download_audio", query_string={"url": _url(video_id), "stream": "false", **query},
+                          headers=headers)
+    assert response.status_code == 200
+    assert response.mimetype == mimetype
+
+def test_download_audio_rejects_unsupported_codecs(client):
+    response = client.get("/api/download_audio", query_string={"url": _url("test0000021"), "codec": "flac"})
+    assert response.status_code == 422
+
+@requires_ffmpeg
+def test_download_audio_passes_native_containers_through(client, monkeypatch):
+    monkeypatch.setattr(fakes.PROFILE, "native_containers", ("webm",))
+    response = _stored_audio(client, "test0000022", Accept="audio/webm")
+    assert response.status_code == 200
+    assert response.mimetype == "audio/webm"
+    assert "audio_download" in _stages(response)
+    assert "transcode" not in _stages(response)
+    assert os.path.exists(os.path.join(Config.OUTPUT_FOLDER, "test0000022-source.webm"))
+
+@requires_ffmpeg
+def test_download_audio_transcodes_other_containers(client):
+    # The fake serves WAV, so the webm selector falls back and the file is encoded.
+    response = _stored_audio(client, "test0000023", Accept="audio/webm")
+    assert response.status_code == 200
+    assert "transcode" in _stages(response)
+    assert os.path.exists(os.path.join(Config.OUTPUT_FOLDER, "test0000023-source.webm"))
+
+def test_download_audio_rejects_invalid_urls(client):
+    response = client.get("/api/download_audio", query_string={"url": "not a video"})
+    assert response.status_code == 422
+
+def _lines(body):
+    return [json.loads(line) for line in body.strip().splitlines()]
+
+def test_batch_summarizes_urls_and_playlists(client):
+    response = client.post("/api/generate_video_summary/batch", json={
+        "urls": [_url("test0000024"), "not a video", _url("test0000024")],
+        "playlist": "https://www.youtube.com/playlist?list=PLbatchtest01",
+    })
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    *lines, totals = _lines(response.get_data(as_text=True))
+
+    assert totals["done"] is True
+    assert (totals["total"], totals["succeeded"], totals["failed"]) == (13, 12, 1)
+    assert sorted(line["index"] for line in lines) == list(range(13))
+    by_index = {line["index"]: line for line in lines}
+    # The playlist comes first and is expanded into its ten videos.
+    assert [by_index[index]["video_id"] for index in range(10)] == [f"PLbatch{index:04d}" for index in range(10)]
+    assert all(by_index[index]["success"] for index in range(10))
+    assert by_index[10]["video_id"] == by_index[12]["video_id"] == "test0000024"
+    assert by_index[10]["result"]["summary"] == by_index[12]["result"]["summary"]
+    assert by_index[11]["success"] is False
+    assert by_index[11]["error"]["status_code"] == 422
+
+def test_batch_reports_jobs_past_the_deadline(client, monkeypatch):
+    monkeypatch.setattr(Config, "JOB_WAIT_TIMEOUT", 0.05)
+    monkeypatch.setattr(fakes.PROFILE, "llm_latency", fakes.Latency(0.5))
+    started = time.monotonic()
+    response = client.post("/api/generate_video_summary/batch", json={"urls": [_url("test0000025")]})
+    line, totals = _lines(response.get_data(as_text=True))
+
+    assert time.monotonic() - started < 0.5
+    assert line["success"] is False
+    assert line["error"]["status_code"] == 504
+    assert (totals["succeeded"], totals["failed"]) == (0, 1)
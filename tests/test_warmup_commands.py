@@ -0,0 +1,50 @@
+"""
+The `flask warmup` command run against the fake backends.
+"""
+import json
+import os
+import shutil
+
+import pytest
+
+from app.config.config import Config
+
+requires_ffmpeg = pytest.mark.skipif(shutil.which(Config.FFMPEG_PATH) is None, reason="ffmpeg is not installed")
+
+def _url(video_id):
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+def _run(flask_app, *args):
+    result = flask_app.test_cli_runner().invoke(args=["warmup", "--json", *args])
+    *lines, report = [json.loads(line) for line in result.output.strip().splitlines()]
+    return result.exit_code, lines, report
+
+@requires_ffmpeg
+def test_warmup_stores_summaries_and_audio(flask_app, tmp_path):
+    source = tmp_path / "urls.txt"
+    source.write_text(f"{_url('test0000028')}\n{_url('test0000029')}\n", encoding="utf-8")
+
+    exit_code, lines, report = _run(flask_app, str(source))
+    assert exit_code == 0
+    assert sorted(line["video_id"] for line in lines) == ["test0000028", "test0000029"]
+    assert all(line["success"] for line in lines)
+    assert (report["warmed"], report["skipped"], report["failed"]) == (2, 0, 0)
+    assert set(report["tasks"]) == {"summary", "audio"}
+    assert os.path.exists(os.path.join(Config.OUTPUT_FOLDER, "test0000028-192.mp3"))
+
+    # The journal next to the source lets a second run skip the finished videos.
+    exit_code, lines, report = _run(flask_app, str(source))
+    assert exit_code == 0
+    assert lines == []
+    assert (report["warmed"], report["skipped"]) == (0, 2)
+
+def test_warmup_expands_playlists_and_reports_failures(flask_app, tmp_path):
+    source = tmp_path / "urls.txt"
+    source.write_text("https://www.youtube.com/playlist?list=PLwarmtest01\nnot a video\n", encoding="utf-8")
+
+    exit_code, lines, report = _run(flask_app, str(source), "--no-audio", "--playlist-limit", "3")
+    assert exit_code == 1
+    assert sorted(line["video_id"] for line in lines if line["success"]) == ["PLwarmt0000", "PLwarmt0001", "PLwarmt0002"]
+    assert [line["source"] for line in lines if not line["success"]] == ["not a video"]
+    assert (report["warmed"], report["failed"]) == (3, 1)
+    assert set(report["tasks"]) == {"summary"}
@@ -0,0 +1,97 @@
+import json
+
+import pytest
+
+from app.utils.youtube import extract_playlist_id, extract_video_id, parse_captions, select_caption_track
+
+@pytest.mark.parametrize("url", [
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://youtube.com/watch?v=dQw4w9WgXcQ&t=42s",
+    "youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://m.youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://music.youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://youtu.be/dQw4w9WgXcQ?si=abc",
+    "https://www.youtube.com/shorts/dQw4w9WgXcQ",
+    "https://www.youtube.com/embed/dQw4w9WgXcQ",
+    "https://www.youtube.com/live/dQw4w9WgXcQ",
+    "https://www.youtube-nocookie.com/embed/dQw4w9WgXcQ",
+])
+def test_extract_video_id(url):
+    assert extract_video_id(url) == "dQw4w9WgXcQ"
+
+@pytest.mark.parametrize("url", [
+    "",
+    None,
+    "https://www.youtube.com/watch?v=short",
+    "https://example.com/watch?v=dQw4w9WgXcQ",
+    "https://www.youtube.com/playlist?list=PL123",
+    "https://youtu.be/",
+])
+def test_extract_video_id_rejects_other_urls(url):
+    assert extract_video_id(url) is None
+
+def test_extract_playlist_id():
+    assert extract_playlist_id("https://www.youtube.com/playlist?list=PLabc_123") == "PLabc_123"
+    assert extract_playlist_id("https://www.youtube.com/watch?v=dQw4w9WgXcQ&list=PLabc") == "PLabc"
+    assert extract_playlist_id("https://example.com/playlist?list=PLabc") is None
+    assert extract_playlist_id("https://www.youtube.com/watch?v=dQw4w9WgXcQ") is None
+
+def _track(ext, url="https://example.com/captions"):
+    return {"ext": ext, "url": url}
+
+def test_manual_subtitles_win_over_automatic_captions():
+    info = {
+        "subtitles": {"en": [_track("vtt", "manual")]},
+        "automatic_captions": {"es": [_track("json3", "automatic")]},
+    }
+    assert select_caption_track(info)["url"] == "manual"
+
+def test_language_preference_and_format_order():
+    info = {"subtitles": {"en": [_track("json3", "en")], "es-419": [_track("vtt", "es-vtt"), _track("json3", "es-json3")]}}
+    assert select_caption_track(info)["url"] == "es-json3"
+
+def test_original_automatic_captions_win_over_translations():
+    info = {"automatic_captions": {
+        "es": [_track("json3", "https://example.com/captions?tlang=es")],
+        "en": [_track("json3", "https://example.com/captions")],
+    }}
+    assert select_caption_track(info)["url"] == "https://example.com/captions"
+
+def test_no_caption_track():
+    assert select_caption_track({}) is None
+    assert select_caption_track({"subtitles": {"fr": [_track("vtt")]}}) is None
+
+def test_parse_json3():
+    content = json.dumps({"events": [
+        {"tStartMs": 0, "dDurationMs": 1500, "segs": [{"utf8": "hola "}, {"utf8": "mundo"}]},
+        {"tStartMs": 1500, "dDurationMs": 500, "segs": [{"utf8": "\n"}]},
+        {"tStartMs": 2000},
+        {"tStartMs": 2500, "dDurationMs": 1000, "segs": [{"utf8": "línea\nnueva"}]},
+    ]})
+    assert parse_captions(content, "json3") == [(0.0, 1.5, "hola mundo"), (2.5, 1.0, "línea nueva")]
+
+def test_parse_srv1():
+    content = (
+        '<?xml version="1.0" encoding="utf-8" ?><transcript>'
+        '<text start="0.5" dur="2.0">it&amp;#39;s <b>bold</b></text>'
+        '<text start="3">sin duración</text>'
+        '<text start="4" dur="1"> </text>'
+        '</transcript>'
+    )
+    assert parse_captions(content, "srv1") == [(0.5, 2.0, "it's bold"), (3.0, 0.0, "sin duración")]
+
+def test_parse_vtt_drops_rolling_repeats():
+    content = (
+        "WEBVTT\nKind: captions\nLanguage: es\n\n"
+        "00:00:01.000 --> 00:00:03.500 align:start position:0%\n"
+        "hola<00:00:01.500><c> a</c><c> todos</c>\n\n"
+        "00:00:03.500 --> 00:00:05.000\n"
+        "hola a todos\nbienvenidos &amp; gracias\n\n"
+        "1:02:03.000 --> 1:02:04.000\n"
+        "al final\n"
+    )
+    assert parse_captions(content, "vtt") == [
+        (1.0, 2.5, "hola a todos"),
+        (3.5, 1.5, "bienvenidos & gracias"),
+        (3723.0, 1.0, "al final"),
+    ]